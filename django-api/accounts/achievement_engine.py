@@ -0,0 +1,404 @@
+"""
+Achievement engine.
+
+Every achievement carries its unlock rule as data in
+``Achievement.metadata['rule']``. The built-in definitions below are synced
+into the table after ``migrate`` (see ``AccountsConfig``); more achievements
+can be added as rows without code changes. Supported rules::
+
+    {"type": "course_set", "course_ids": [10, 11], "count": 2}   # count defaults to all
+    {"type": "streak", "days": 30}
+    {"type": "subject_complete", "subject_id": 3}                 # every course of the subject
+    {"type": "score", "min_score": 100}
+
+Rules are compiled into a ``RuleIndex`` that maps *triggers* to the
+achievements they can affect: ``course:<id>`` for each course a rule
+references, ``login`` for streak rules and ``score`` for score rules. An event
+(see ``accounts.events``) therefore re-evaluates only the rules that reference
+what changed, so the number of definitions does not matter per event. The
+index is kept per process, rebuilt after ``ACHIEVEMENT_RULES_TTL`` seconds and
+dropped whenever an Achievement or Course row changes (``accounts.signals``).
+
+``refresh_achievements`` applies a batch of events, writing only the
+``UserAchievement`` rows whose state actually changed with
+``bulk_create``/``bulk_update``. Reading achievements never writes.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Achievement, Course, UserAchievement, UserCourse, UserProfile
+
+logger = logging.getLogger(__name__)
+
+LOGIN_STREAK = 'login_streak'
+COURSE_NEWBIE = 'course_newbie'
+
+LOGIN = 'login'
+SCORE = 'score'
+
+DEFINITION_FIELDS = ['category', 'title', 'description', 'icon', 'target', 'metadata']
+
+
+def course_trigger(course_id):
+    return f'course:{course_id}'
+
+
+def _build_definitions():
+    definitions = []
+    for target in [5, 10, 50, 100, 365, 500]:
+        definitions.append({
+            'key': f'login_streak_{target}',
+            'category': LOGIN_STREAK,
+            'title': f'Login Streak {target}',
+            'description': f'Log in for {target} days in a row.',
+            'icon': 'streak',
+            'target': target,
+            'metadata': {'rule': {'type': 'streak', 'days': target}},
+        })
+
+    newbie_specs = [
+        ('docker_newbie', 'Docker Newbie', [20, 21], 'docker'),
+        ('git_newbie', 'Git Newbie', [10, 11], 'git'),
+    ]
+    for key, title, required, icon in newbie_specs:
+        definitions.append({
+            'key': key,
+            'category': COURSE_NEWBIE,
+            'title': title,
+            'description': 'Finish the intro courses 1 and 2.',
+            'icon': icon,
+            'target': len(required),
+            'metadata': {
+                'required_course_ids': sorted(required),
+                'rule': {'type': 'course_set', 'course_ids': sorted(required)},
+            },
+        })
+    return definitions
+
+
+DEFINITIONS = _build_definitions()
+
+
+class UserContext:
+    """Everything the rules need to know about one user."""
+
+    __slots__ = ('login_streak', 'score', 'completed_course_ids')
+
+    def __init__(self, login_streak, score, completed_course_ids):
+        self.login_streak = login_streak
+        self.score = score
+        self.completed_course_ids = completed_course_ids
+
+
+class CompiledRule:
+    """A rule ready to evaluate: ``progress(context)`` counts toward ``target``."""
+
+    __slots__ = ('achievement_id', 'target', 'triggers', 'progress')
+
+    def __init__(self, achievement_id, target, triggers, progress):
+        self.achievement_id = achievement_id
+        self.target = target
+        self.triggers = triggers
+        self.progress = progress
+
+    def evaluate(self, context):
+        progress = min(int(self.progress(context)), self.target)
+        return progress, self.target > 0 and progress >= self.target
+
+
+RULE_TYPES = {}
+
+
+def rule_type(name):
+    """Register ``compile(rule, subject_courses) -> (target, triggers, progress)`` for rules of ``name``."""
+    def register(func):
+        RULE_TYPES[name] = func
+        return func
+    return register
+
+
+@rule_type('course_set')
+def _course_set(rule, subject_courses):
+    course_ids = frozenset(int(c) for c in rule['course_ids'])
+    target = int(rule.get('count', len(course_ids)))
+    triggers = {course_trigger(c) for c in course_ids}
+    return target, triggers, lambda context: len(course_ids & context.completed_course_ids)
+
+
+@rule_type('streak')
+def _streak(rule, subject_courses):
+    return int(rule['days']), {LOGIN}, lambda context: context.login_streak
+
+
+@rule_type('subject_complete')
+def _subject_complete(rule, subject_courses):
+    course_ids = subject_courses.get(int(rule['subject_id']), frozenset())
+    triggers = {course_trigger(c) for c in course_ids}
+    return len(course_ids), triggers, lambda context: len(course_ids & context.completed_course_ids)
+
+
+@rule_type('score')
+def _score(rule, subject_courses):
+    return int(rule['min_score']), {SCORE}, lambda context: context.score
+
+
+def compile_rule(achievement_id, rule, subject_courses):
+    """Compile one rule; raises ``ValueError`` when it is malformed."""
+    if not isinstance(rule, dict) or rule.get('type') not in RULE_TYPES:
+        raise ValueError(f'unknown achievement rule: {rule!r}')
+    try:
+        target, triggers, progress = RULE_TYPES[rule['type']](rule, subject_courses)
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f'invalid {rule["type"]} rule {rule!r}: {exc}') from exc
+    return CompiledRule(achievement_id, target, frozenset(triggers), progress)
+
+
+class RuleIndex:
+    def __init__(self, rules):
+        # {achievement id: CompiledRule}
+        self.rules = rules
+        # {trigger: [achievement id, ...]}
+        self.by_trigger = {}
+        for rule in rules.values():
+            for trigger in rule.triggers:
+                self.by_trigger.setdefault(trigger, []).append(rule.achievement_id)
+
+    def for_triggers(self, triggers):
+        """Rules affected by any of ``triggers`` (all rules when ``triggers`` is None)."""
+        if triggers is None:
+            return list(self.rules.values())
+        ids = set()
+        for trigger in triggers:
+            ids.update(self.by_trigger.get(trigger, ()))
+        return [self.rules[i] for i in ids]
+
+
+def build_rule_index():
+    subject_courses = {}
+    for course_id, subject_id in Course.objects.values_list('CourseID', 'SubjectID_id'):
+        subject_courses.setdefault(subject_id, set()).add(course_id)
+    subject_courses = {k: frozenset(v) for k, v in subject_courses.items()}
+
+    rules = {}
+    for achievement_id, metadata in Achievement.objects.values_list('id', 'metadata'):
+        rule = (metadata or {}).get('rule')
+        if rule is None:
+            continue
+        try:
+            rules[achievement_id] = compile_rule(achievement_id, rule, subject_courses)
+        except ValueError:
+            logger.warning('Skipping achievement %s', achievement_id, exc_info=True)
+    return RuleIndex(rules)
+
+
+_index_lock = threading.Lock()
+_index = None
+_index_built_at = 0.0
+
+
+def get_rule_index():
+    global _index, _index_built_at
+    ttl = getattr(settings, 'ACHIEVEMENT_RULES_TTL', 300)
+    with _index_lock:
+        if _index is not None and time.monotonic() - _index_built_at < ttl:
+            return _index
+    index = build_rule_index()
+    with _index_lock:
+        _index, _index_built_at = index, time.monotonic()
+    return index
+
+
+def invalidate_rules():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def load_user_contexts(user_ids):
+    """Build a ``UserContext`` for every id in ``user_ids`` with two queries."""
+    user_ids = list(user_ids)
+    profiles = {
+        user_id: (streak, score)
+        for user_id, streak, score in UserProfile.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'login_streak_days', 'score'
+        )
+    }
+    completed = {user_id: set() for user_id in user_ids}
+    rows = UserCourse.objects.filter(UserID_id__in=user_ids, CourseFlag='completed').values_list(
+        'UserID_id', 'CourseID_id'
+    )
+    for user_id, course_id in rows:
+        completed[user_id].add(course_id)
+
+    contexts = {}
+    for user_id in user_ids:
+        streak, score = profiles.get(user_id, (0, 0))
+        contexts[user_id] = UserContext(int(streak or 0), int(score or 0), completed[user_id])
+    return contexts
+
+
+def load_user_context(user):
+    return load_user_contexts([user.pk])[user.pk]
+
+
+def sync_definitions(definitions=None):
+    """Insert missing and update changed ``Achievement`` rows; returns (created, updated)."""
+    if definitions is None:
+        definitions = DEFINITIONS
+
+    existing = {a.key: a for a in Achievement.objects.filter(key__in=[d['key'] for d in definitions])}
+    to_create = []
+    to_update = []
+    for spec in definitions:
+        achievement = existing.get(spec['key'])
+        if achievement is None:
+            to_create.append(Achievement(key=spec['key'], **{f: spec[f] for f in DEFINITION_FIELDS}))
+            continue
+        if any(getattr(achievement, f) != spec[f] for f in DEFINITION_FIELDS):
+            for f in DEFINITION_FIELDS:
+                setattr(achievement, f, spec[f])
+            to_update.append(achievement)
+
+    with transaction.atomic():
+        Achievement.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            Achievement.objects.bulk_update(to_update, DEFINITION_FIELDS)
+    invalidate_rules()
+    return len(to_create), len(to_update)
+
+
+def diff_user_achievements(user_id, rules, context, existing, now=None):
+    """
+    Compare evaluated progress with stored rows.
+
+    ``rules`` are ``CompiledRule`` objects and ``existing`` maps achievement id
+    to the user's ``UserAchievement``. Returns ``(to_create, to_update)``
+    containing only rows whose state changed.
+    """
+    if now is None:
+        now = timezone.now()
+    to_create = []
+    to_update = []
+    for rule in rules:
+        progress, unlocked = rule.evaluate(context)
+        ua = existing.get(rule.achievement_id)
+        if ua is None:
+            to_create.append(
+                UserAchievement(
+                    user_id=user_id,
+                    achievement_id=rule.achievement_id,
+                    progress=progress,
+                    unlocked=unlocked,
+                    unlocked_at=now if unlocked else None,
+                    updated_at=now,
+                )
+            )
+            continue
+        if ua.progress == progress and ua.unlocked == unlocked:
+            continue
+        ua.progress = progress
+        if unlocked and not ua.unlocked:
+            ua.unlocked_at = now
+        if not unlocked:
+            ua.unlocked_at = None
+        ua.unlocked = unlocked
+        ua.updated_at = now
+        to_update.append(ua)
+    return to_create, to_update
+
+
+def refresh_achievements(user_triggers):
+    """
+    Recompute progress for a batch of users and persist what changed.
+
+    ``user_triggers`` maps a user id to the triggers that fired for it
+    (``None`` re-evaluates every rule). Contexts and existing rows are loaded
+    once for the whole batch, and only for the affected achievements. Returns
+    the number of rows written.
+    """
+    if not user_triggers:
+        return 0
+
+    index = get_rule_index()
+    selected = {user_id: index.for_triggers(triggers) for user_id, triggers in user_triggers.items()}
+    selected = {user_id: rules for user_id, rules in selected.items() if rules}
+    if not selected:
+        return 0
+
+    achievement_ids = {rule.achievement_id for rules in selected.values() for rule in rules}
+    contexts = load_user_contexts(selected)
+    existing = {}
+    for ua in UserAchievement.objects.filter(user_id__in=list(selected), achievement_id__in=achievement_ids):
+        existing.setdefault(ua.user_id, {})[ua.achievement_id] = ua
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for user_id, rules in selected.items():
+        created, updated = diff_user_achievements(user_id, rules, contexts[user_id], existing.get(user_id, {}), now=now)
+        to_create.extend(created)
+        to_update.extend(updated)
+
+    with transaction.atomic():
+        UserAchievement.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            UserAchievement.objects.bulk_update(to_update, ['progress', 'unlocked', 'unlocked_at', 'updated_at'])
+    return len(to_create) + len(to_update)
+
+
+def backfill_users(user_ids, batch_size=1000):
+    """
+    Evaluate every rule for ``user_ids`` and upsert the rows whose state changed.
+
+    Used by ``manage.py backfill_achievements``: contexts and existing rows are
+    loaded with three queries for the whole group, and all changes (new and
+    updated rows alike) are written with one
+    ``INSERT ... ON CONFLICT (user_id, achievement_id) DO UPDATE`` per
+    ``batch_size`` rows. ``unlocked_at`` of already-unlocked rows is kept.
+    """
+    user_ids = list(user_ids)
+    rules = get_rule_index().for_triggers(None)
+    if not user_ids or not rules:
+        return 0
+
+    contexts = load_user_contexts(user_ids)
+    existing = {}
+    for ua in UserAchievement.objects.filter(user_id__in=user_ids):
+        existing.setdefault(ua.user_id, {})[ua.achievement_id] = ua
+
+    now = timezone.now()
+    rows = []
+    for user_id in user_ids:
+        created, updated = diff_user_achievements(user_id, rules, contexts[user_id], existing.get(user_id, {}), now=now)
+        rows.extend(created)
+        rows.extend(
+            UserAchievement(
+                user_id=ua.user_id,
+                achievement_id=ua.achievement_id,
+                progress=ua.progress,
+                unlocked=ua.unlocked,
+                unlocked_at=ua.unlocked_at,
+                updated_at=ua.updated_at,
+            )
+            for ua in updated
+        )
+
+    UserAchievement.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'achievement'],
+        update_fields=['progress', 'unlocked', 'unlocked_at', 'updated_at'],
+    )
+    return len(rows)
+
+
+def refresh_user_achievements(user, triggers=None):
+    """Recompute ``user``'s progress for rules affected by ``triggers`` (all when None) and persist changes."""
+    return refresh_achievements({user.pk: None if triggers is None else set(triggers)})
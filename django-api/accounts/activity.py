@@ -0,0 +1,181 @@
+"""
+User activity log.
+
+``log_activity`` is what request handlers call instead of
+``UserActivity.objects.create``. With ``ACTIVITY_LOG_BUFFERED`` (the default)
+rows are collected in memory and written with one ``bulk_create`` by a
+background thread once ``ACTIVITY_LOG_BATCH_SIZE`` rows are waiting or every
+``ACTIVITY_LOG_FLUSH_INTERVAL`` seconds, and once more when the process exits.
+Each row keeps the time of the event, not of the flush. A crash loses at most
+one interval of activity, which is acceptable for an audit trail of this kind.
+
+On PostgreSQL ``accounts_useractivity`` is range-partitioned by month on
+``timestamp`` (migration 0023) with a default partition catching anything
+outside the created months. ``create_activity_partitions`` keeps partitions
+ahead of time and ``archive_activity`` exports old months to compressed CSV
+files and drops them, so the live table stays small and old data leaves
+without a bulk ``DELETE`` (and the vacuum work that follows it). Expired rows
+in the default partition, which should hold few, are exported and deleted.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from accounts.models import UserActivity
+
+logger = logging.getLogger(__name__)
+
+TABLE = UserActivity._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+class _Buffer:
+    def __init__(self, batch_size, interval):
+        self.pid = os.getpid()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.rows = []
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='activity-log', daemon=True)
+        self.thread.start()
+
+    def add(self, row):
+        with self.lock:
+            self.rows.append(row)
+            full = len(self.rows) >= self.batch_size
+        if full:
+            self.wake.set()
+
+    def flush(self):
+        with self.lock:
+            rows, self.rows = self.rows, []
+        if not rows:
+            return 0
+        try:
+            UserActivity.objects.bulk_create(rows, batch_size=self.batch_size)
+        except Exception:
+            logger.exception('Dropped %d activity row(s)', len(rows))
+            return 0
+        finally:
+            close_old_connections()
+        return len(rows)
+
+    def _run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def _get_buffer():
+    """Start the flusher thread on first use (and again in a forked child)."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None or _buffer.pid != os.getpid():
+            _buffer = _Buffer(
+                batch_size=max(1, getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 200)),
+                interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 2.0),
+            )
+        return _buffer
+
+
+@atexit.register
+def flush():
+    """Write everything still buffered in this process; returns the number of rows written."""
+    with _buffer_lock:
+        buffer = _buffer
+    if buffer is None or buffer.pid != os.getpid():
+        return 0
+    return buffer.flush()
+
+
+def log_activity(user, activity_type, payload=None):
+    """Record an activity (with an optional JSON ``payload``) for ``user`` once the current transaction commits."""
+    row = UserActivity(user_id=user.pk, activity_type=activity_type, payload=payload or {}, timestamp=timezone.now())
+    if not getattr(settings, 'ACTIVITY_LOG_BUFFERED', True):
+        row.save()
+        return
+    transaction.on_commit(lambda: _get_buffer().add(row))
+
+
+# Monthly partitions (PostgreSQL only).
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def monthly_partitions(connection):
+    """``[(month, partition_name), ...]`` for the attached monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s AND child.relname ~ %s
+            ORDER BY child.relname
+            """,
+            [TABLE, f'^{TABLE}_p[0-9]{{6}}$'],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    return [(date(int(name[-6:-2]), int(name[-2:]), 1), name) for name in names]
+
+
+def create_month_partition(connection, month):
+    """
+    Create and attach the partition for ``month`` unless it exists; returns True if created.
+
+    Rows for that month already sitting in the default partition are moved
+    into the new partition in the same transaction, so attaching never fails.
+    """
+    name = partition_name(month)
+    lower = f"'{month.isoformat()} 00:00:00+00'"
+    upper = f"'{add_months(month, 1).isoformat()} 00:00:00+00'"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+        cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE "timestamp" >= {lower} AND "timestamp" < {upper}
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        )
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})')
+    return True
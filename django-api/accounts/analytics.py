@@ -0,0 +1,144 @@
+"""
+Activity feed and analytics.
+
+The feed pages through one user's activity newest first with a keyset
+cursor on ``(timestamp, id)``, which the ``(user, -timestamp)`` index serves
+directly however deep the client scrolls (no ``OFFSET``).
+
+Aggregates are not computed from ``UserActivity`` on request. They come from
+``DailyActivityRollup`` and ``CourseSubmissionRollup``, which
+``refresh_rollups`` maintains incrementally: each run recomputes only the
+days from the last rolled-up day onwards (that day may have been partial),
+using the ``(activity_type, timestamp)`` index and, on PostgreSQL, touching
+only the partitions for those months.
+"""
+
+import base64
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, Q
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import CourseSubmissionRollup, DailyActivityRollup, UserActivity
+
+SUBMISSION_TYPES = ['COURSE_SUBMISSION']
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(activity):
+    raw = f'{activity.timestamp.isoformat()}|{activity.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        timestamp = parse_datetime(stamp)
+        if timestamp is None:
+            raise ValueError(stamp)
+        return timestamp, int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def activity_feed(user, cursor=None, limit=50, activity_types=None):
+    """Return ``(rows, next_cursor)`` for ``user``'s activity older than ``cursor``."""
+    queryset = UserActivity.objects.filter(user=user)
+    if activity_types:
+        queryset = queryset.filter(activity_type__in=activity_types)
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+
+    rows = list(queryset.order_by('-timestamp', '-id')[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+    return start, start + timedelta(days=1)
+
+
+def refresh_rollups(since=None):
+    """
+    Recompute rollup rows for every day from ``since`` (a date) through today.
+
+    Without ``since`` the refresh resumes at the last rolled-up day, or the
+    first recorded activity when the rollups are empty. Returns the number of
+    days refreshed.
+    """
+    if since is None:
+        since = DailyActivityRollup.objects.order_by('-day').values_list('day', flat=True).first()
+    if since is None:
+        first = UserActivity.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if first is None:
+            return 0
+        since = timezone.localtime(first).date()
+
+    today = timezone.localdate()
+    start, _ = _day_bounds(since)
+    _, end = _day_bounds(today)
+    window = UserActivity.objects.filter(timestamp__gte=start, timestamp__lt=end).annotate(day=TruncDate('timestamp'))
+
+    daily = {
+        row['day']: row
+        for row in window.values('day').annotate(
+            active_users=Count('user', distinct=True),
+            logins=Count('id', filter=Q(activity_type='LOGIN')),
+            registrations=Count('id', filter=Q(activity_type='REGISTRATION')),
+            submissions=Count('id', filter=Q(activity_type__in=SUBMISSION_TYPES)),
+        )
+    }
+    per_course = (
+        window.filter(activity_type__in=SUBMISSION_TYPES)
+        .annotate(course_id=Cast(KT('payload__course_id'), IntegerField()))
+        .exclude(course_id=None)
+        .values('day', 'course_id')
+        .annotate(submissions=Count('id'), users=Count('user', distinct=True))
+    )
+
+    now = timezone.now()
+    days = [since + timedelta(days=i) for i in range((today - since).days + 1)]
+    daily_rows = [
+        DailyActivityRollup(
+            day=day,
+            active_users=daily.get(day, {}).get('active_users', 0),
+            logins=daily.get(day, {}).get('logins', 0),
+            registrations=daily.get(day, {}).get('registrations', 0),
+            submissions=daily.get(day, {}).get('submissions', 0),
+            refreshed_at=now,
+        )
+        for day in days
+    ]
+    course_rows = [
+        CourseSubmissionRollup(
+            day=row['day'],
+            course_id=row['course_id'],
+            submissions=row['submissions'],
+            users=row['users'],
+            refreshed_at=now,
+        )
+        for row in per_course
+    ]
+
+    with transaction.atomic():
+        DailyActivityRollup.objects.bulk_create(
+            daily_rows,
+            update_conflicts=True,
+            unique_fields=['day'],
+            update_fields=['active_users', 'logins', 'registrations', 'submissions', 'refreshed_at'],
+        )
+        # Replace the window's per-course rows wholesale so a course whose
+        # submissions were removed does not keep a stale row.
+        CourseSubmissionRollup.objects.filter(day__gte=since).delete()
+        CourseSubmissionRollup.objects.bulk_create(course_rows)
+    return len(days)
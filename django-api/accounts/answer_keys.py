@@ -0,0 +1,162 @@
+"""
+Per-course answer keys.
+
+Course content (questions and options) changes rarely, so grading works from
+a compact answer key instead of querying ``Option`` rows: the course's
+question ids plus ``option_id -> (question_id, correct)``. Keys are loaded
+lazily and kept in a process-local LRU capped at ``ANSWER_KEY_CACHE_SIZE``
+courses, with an ``option_id -> course_id`` index so an option is found
+without scanning the cached keys. Local entries expire after
+``ANSWER_KEY_CACHE_TTL`` seconds so edits made in another worker are picked
+up. Setting ``ANSWER_KEY_CACHE_ALIAS`` to a shared Django cache (e.g. Redis)
+also shares loaded keys across processes. Shared entries expire after the
+same TTL and their keys carry the catalog version. A key left stale by a
+write that sent no signals therefore lives one TTL at most, and a
+catalog-wide bump (``seed_db``) drops them all at once.
+
+``accounts.signals`` invalidates keys whenever a Course, Question or Option
+row is saved or deleted.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from accounts.catalog import catalog_version
+from accounts.models import Course, Option, Question
+
+_lock = threading.Lock()
+_local = OrderedDict()
+# OptionID -> CourseID for every option of a key in _local.
+_option_courses = {}
+
+
+class AnswerKey:
+    __slots__ = ('course_id', 'subject_id', 'question_ids', 'options')
+
+    def __init__(self, course_id, subject_id, question_ids, options):
+        self.course_id = course_id
+        self.subject_id = subject_id
+        # frozenset of QuestionID
+        self.question_ids = question_ids
+        # {OptionID: (QuestionID, CorrectOption)}
+        self.options = options
+
+    def __getstate__(self):
+        return (self.course_id, self.subject_id, self.question_ids, self.options)
+
+    def __setstate__(self, state):
+        self.course_id, self.subject_id, self.question_ids, self.options = state
+
+
+def _max_size():
+    return getattr(settings, 'ANSWER_KEY_CACHE_SIZE', 256)
+
+
+def _ttl():
+    return getattr(settings, 'ANSWER_KEY_CACHE_TTL', 300)
+
+
+def _shared_cache():
+    alias = getattr(settings, 'ANSWER_KEY_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _shared_key(course_id):
+    return f'answer-key:{catalog_version()}:{course_id}'
+
+
+def _forget(course_id):
+    # Caller holds _lock.
+    entry = _local.pop(course_id, None)
+    if entry is not None:
+        for option_id in entry[1].options:
+            if _option_courses.get(option_id) == course_id:
+                del _option_courses[option_id]
+
+
+def _remember(key):
+    with _lock:
+        _forget(key.course_id)
+        _local[key.course_id] = (time.monotonic(), key)
+        _option_courses.update(dict.fromkeys(key.options, key.course_id))
+        while len(_local) > _max_size():
+            _forget(next(iter(_local)))
+
+
+def load_answer_key(course_id):
+    """Build the answer key for ``course_id`` from the database (None if the course is missing)."""
+    subject_id = Course.objects.filter(pk=course_id).values_list('SubjectID_id', flat=True).first()
+    if subject_id is None:
+        return None
+
+    question_ids = frozenset(Question.objects.filter(CourseID_id=course_id).values_list('QuestionID', flat=True))
+    options = {
+        option_id: (question_id, bool(correct))
+        for option_id, question_id, correct in Option.objects.filter(QuestionID__CourseID_id=course_id).values_list(
+            'OptionID', 'QuestionID_id', 'CorrectOption'
+        )
+    }
+    return AnswerKey(course_id, subject_id, question_ids, options)
+
+
+def get_answer_key(course_id):
+    """Return the (possibly cached) answer key for ``course_id``, or None if the course does not exist."""
+    with _lock:
+        entry = _local.get(course_id)
+        if entry is not None and time.monotonic() - entry[0] < _ttl():
+            _local.move_to_end(course_id)
+            return entry[1]
+
+    shared = _shared_cache()
+    shared_key = _shared_key(course_id) if shared is not None else None
+    key = shared.get(shared_key) if shared is not None else None
+    if key is None:
+        key = load_answer_key(course_id)
+        if key is None:
+            return None
+        if shared is not None:
+            shared.set(shared_key, key, timeout=_ttl())
+
+    _remember(key)
+    return key
+
+
+def find_option(option_id):
+    """Return ``(question_id, correct)`` for an option, or None if it does not exist."""
+    with _lock:
+        course_id = _option_courses.get(option_id)
+        entry = _local.get(course_id) if course_id is not None else None
+    if entry is not None and time.monotonic() - entry[0] < _ttl():
+        return entry[1].options.get(option_id)
+
+    course_id = Option.objects.filter(pk=option_id).values_list('QuestionID__CourseID_id', flat=True).first()
+    if course_id is None:
+        return None
+    key = get_answer_key(course_id)
+    return key.options.get(option_id) if key is not None else None
+
+
+def invalidate_course(course_id):
+    with _lock:
+        _forget(course_id)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_key(course_id))
+
+
+def invalidate_option(option_id):
+    """Drop the locally cached key that contains ``option_id``."""
+    with _lock:
+        course_id = _option_courses.get(option_id)
+    if course_id is not None:
+        invalidate_course(course_id)
+
+
+def clear():
+    with _lock:
+        _local.clear()
+        _option_courses.clear()
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def sync_achievement_definitions(sender, using, **kwargs):
+    from accounts.achievement_engine import sync_definitions
+
+    sync_definitions()
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from accounts import events, signals  # noqa: F401
+
+        post_migrate.connect(sync_achievement_definitions, sender=self)
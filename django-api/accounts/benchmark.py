@@ -0,0 +1,301 @@
+"""
+Endpoint benchmarks (``manage.py benchmark_endpoints``).
+
+Every named route in ``accounts/urls.py`` has a ``Scenario`` below describing
+one representative request. ``run_scenario`` sends it repeatedly through the
+test client, as an authenticated heavy user where a route needs one, and
+measures:
+
+* latency percentiles (p50/p99) of the whole request/response cycle;
+* SQL queries per request (the maximum over the runs);
+* rows returned by those queries (where the driver reports them, i.e.
+  PostgreSQL; SQLite reports none);
+* peak Python memory allocated during one extra traced request.
+
+Per-request setup a scenario needs (a fresh reset token, an unredeemed
+license) runs before measuring starts and is not counted.
+
+``check_budgets`` compares the results with the checked-in budgets file.
+Queries and rows are the budgets that catch regressions such as an N+1
+query, because they do not depend on the machine. A route whose query count
+grows with the dataset size fails even when it stays under its budget.
+Latency budgets are generous and can be skipped on noisy hosts.
+"""
+
+import io
+import json
+import math
+import time
+import tracemalloc
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import (
+    LicenseKey,
+    Option,
+    PasswordResetToken,
+    Question,
+    User,
+    UserActivity,
+    UserCourse,
+    UserProfile,
+)
+from accounts.scoring import COMPLETED
+
+
+class Scenario:
+    def __init__(self, name, method='get', args=None, data=None, auth='user', prepare=None, fmt='json'):
+        self.name = name
+        self.method = method
+        self.args = args or (lambda ctx: [])
+        self.data = data or (lambda ctx, i: None)
+        self.auth = auth
+        self.prepare = prepare
+        self.fmt = fmt
+
+
+class BenchmarkContext:
+    """Ids, users and tokens the scenarios refer to, picked from the generated dataset."""
+
+    def __init__(self, catalog, password):
+        # A dedicated user whose own data does not change as the dataset
+        # grows, so per-size results are comparable: every course completed
+        # (certificates are available) and a long activity history.
+        self.user = User.objects.create_user('bench_user', 'bench_user@load.test', password)
+        self.password = password
+        UserCourse.objects.bulk_create(
+            UserCourse(CourseID_id=course_id, UserID=self.user, CourseScore=questions, CourseFlag=COMPLETED)
+            for course_id, _, _, questions in catalog.courses
+        )
+        UserProfile.objects.filter(user=self.user).update(score=sum(c[3] for c in catalog.courses))
+        now = timezone.now()
+        UserActivity.objects.bulk_create(
+            UserActivity(user=self.user, activity_type='LOGIN', timestamp=now - timedelta(hours=i)) for i in range(500)
+        )
+        self.admin, _ = User.objects.get_or_create(
+            user_name='bench_admin', defaults={'email': 'bench_admin@load.test', 'is_staff': True}
+        )
+        if not hasattr(self.admin, 'profile'):
+            UserProfile.objects.create(user=self.admin)
+        self.tokens = {
+            'user': str(RefreshToken.for_user(self.user).access_token),
+            'admin': str(RefreshToken.for_user(self.admin).access_token),
+        }
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+        self.subject_id = catalog.subject_ids[0]
+        self.course_id = catalog.course_ids[0]
+        questions = list(Question.objects.filter(CourseID_id=self.course_id).order_by('QuestionID'))
+        self.question_id = questions[0].QuestionID
+        first_options = {}
+        for option in Option.objects.filter(QuestionID__in=questions).order_by('OptionID'):
+            first_options.setdefault(option.QuestionID_id, option.OptionID)
+        self.option_id = first_options[self.question_id]
+        self.answers = [{'question_id': q, 'option_id': o} for q, o in first_options.items()]
+        self.digest = self._upload_picture()
+
+    def _upload_picture(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), 'teal').save(buffer, 'JPEG')
+        upload = SimpleUploadedFile('bench.jpg', buffer.getvalue(), 'image/jpeg')
+        self.client('user').put(reverse('me_profile_pic'), {'file': upload}, format='multipart')
+        return UserProfile.objects.get(user=self.user).profile_pic_hash
+
+    def client(self, auth):
+        client = APIClient()
+        if auth:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens[auth]}')
+        return client
+
+
+def _new_reset_token(ctx, i):
+    token = f'bench-{time.monotonic_ns()}-{i}'
+    PasswordResetToken.objects.create(user=ctx.user, token=token, expires_at=timezone.now() + timedelta(hours=1))
+    ctx.reset_token = token
+
+
+def _pending_license(ctx, i):
+    User.objects.filter(pk=ctx.user.pk).update(License=None)
+    ctx.license_code = f'BENCH{time.monotonic_ns()}{i}'
+    LicenseKey.objects.create(code=ctx.license_code, email=ctx.user.email, issued_to=ctx.user)
+
+
+def _no_license(ctx, i):
+    User.objects.filter(pk=ctx.user.pk).update(License=None)
+
+
+SCENARIOS = [
+    Scenario('register', 'post', auth=None, data=lambda ctx, i: {
+        'user_name': f'bench_reg_{time.monotonic_ns()}_{i}',
+        'email': f'bench_reg_{time.monotonic_ns()}_{i}@load.test',
+        'password': 'benchpass123',
+    }),
+    Scenario('login', 'post', auth=None, data=lambda ctx, i: {'user_name': ctx.user.user_name, 'password': ctx.password}),
+    Scenario('availability', auth=None, data=lambda ctx, i: {'user_name': ctx.user.user_name, 'email': 'nobody@load.test'}),
+    Scenario('me'),
+    Scenario('me_change_password', 'post', data=lambda ctx, i: {
+        'current_password': ctx.password, 'new_password': ctx.password,
+    }),
+    Scenario('rank'),
+    Scenario('set_bookmarked_subject', 'post', data=lambda ctx, i: {'subject_id': ctx.subject_id}),
+    Scenario('remove_bookmarked_subject', 'delete', args=lambda ctx: [ctx.subject_id]),
+    Scenario('me_profile_pic', data=lambda ctx, i: {'size': 64}),
+    Scenario('profile_picture', auth=None, args=lambda ctx: [ctx.digest], data=lambda ctx, i: {'size': 64}),
+    Scenario('achievements'),
+    Scenario('activity_list', data=lambda ctx, i: {'limit': 50}),
+    Scenario('analytics_daily_active_users', auth='admin'),
+    Scenario('analytics_course_submissions', auth='admin'),
+    Scenario('token_refresh', 'post', auth=None, data=lambda ctx, i: {'refresh': ctx.refresh}),
+    Scenario('subjects_list', auth=None),
+    Scenario('courses_by_subject', auth=None, args=lambda ctx: [ctx.subject_id]),
+    Scenario('course_detail', auth=None, args=lambda ctx: [ctx.course_id]),
+    Scenario('course_content', auth=None, args=lambda ctx: [ctx.course_id]),
+    Scenario('questions_by_course', auth=None, args=lambda ctx: [ctx.course_id]),
+    Scenario('question_detail', auth=None, args=lambda ctx: [ctx.question_id]),
+    Scenario('course_quiz', auth=None, args=lambda ctx: [ctx.course_id]),
+    Scenario('verify_option', auth=None, args=lambda ctx: [ctx.option_id]),
+    Scenario('submit_course_answers', 'post', args=lambda ctx: [ctx.course_id], data=lambda ctx, i: {'answers': ctx.answers}),
+    Scenario('complete_course', 'post', args=lambda ctx: [ctx.course_id], data=lambda ctx, i: {'score': 5}),
+    Scenario('completed_courses'),
+    Scenario('completed_courses_scores'),
+    Scenario('send_test_email', 'post', auth=None, data=lambda ctx, i: {'to': 'bench@load.test'}),
+    Scenario('password_reset', 'post', auth=None, data=lambda ctx, i: {'email': ctx.user.email}),
+    Scenario('password_reset_confirm', 'post', auth=None, prepare=_new_reset_token, data=lambda ctx, i: {
+        'token': ctx.reset_token, 'email': ctx.user.email, 'new_password': ctx.password,
+    }),
+    Scenario('license_status'),
+    Scenario('request_license', 'post', prepare=_no_license),
+    Scenario('redeem_license', 'post', prepare=_pending_license, data=lambda ctx, i: {'code': ctx.license_code}),
+    Scenario('certificate_status', data=lambda ctx, i: {'subject_id': ctx.subject_id}),
+    Scenario('certificate_download', 'post', data=lambda ctx, i: {'subject_id': ctx.subject_id}),
+]
+
+
+def route_names():
+    from accounts.urls import urlpatterns
+
+    return [pattern.name for pattern in urlpatterns if pattern.name]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class _RowCounter:
+    """``execute_wrapper`` adding up ``cursor.rowcount`` of the statements run."""
+
+    def __init__(self):
+        self.rows = 0
+        self.reported = False
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        rowcount = getattr(context['cursor'], 'rowcount', -1)
+        if rowcount is not None and rowcount >= 0 and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.rows += rowcount
+            self.reported = True
+        return result
+
+
+def _send(ctx, scenario, i):
+    if scenario.prepare:
+        scenario.prepare(ctx, i)
+    client = ctx.client(scenario.auth)
+    url = reverse(scenario.name, args=scenario.args(ctx))
+    data = scenario.data(ctx, i)
+    if scenario.method == 'get':
+        return lambda: client.get(url, data)
+    return lambda: getattr(client, scenario.method)(url, data, format=scenario.fmt)
+
+
+def warm_up(ctx, scenario):
+    """Send ``scenario`` once, unmeasured, to warm caches and the connection."""
+    _send(ctx, scenario, -1)()
+
+
+def run_scenario(ctx, scenario, repeat):
+    """Measure ``scenario``; returns a dict of the metrics described in the module docstring."""
+    warm_up(ctx, scenario)
+
+    latencies = []
+    queries = 0
+    rows = None
+    statuses = set()
+    for i in range(repeat):
+        request = _send(ctx, scenario, i)
+        counter = _RowCounter()
+        with CaptureQueriesContext(connection) as captured, connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - started) * 1000)
+        statuses.add(response.status_code)
+        queries = max(queries, len(captured))
+        if counter.reported:
+            rows = max(rows or 0, counter.rows)
+
+    request = _send(ctx, scenario, repeat)
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return OrderedDict(
+        p50_ms=round(percentile(latencies, 50), 3),
+        p99_ms=round(percentile(latencies, 99), 3),
+        queries=queries,
+        rows=rows,
+        peak_kib=round(peak / 1024, 1),
+        statuses=sorted(statuses),
+    )
+
+
+def load_budgets(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def check_budgets(results, budgets, check_latency=True):
+    """
+    Return a list of failure messages for ``results`` (``{size: {route: metrics}}``).
+
+    A route's budget is ``budgets['routes'][route]`` on top of ``budgets['default']``.
+    """
+    failures = []
+    defaults = budgets.get('default', {})
+    limits = [('queries', 'max_queries'), ('rows', 'max_rows'), ('peak_kib', 'max_peak_kib')]
+    if check_latency:
+        limits.append(('p99_ms', 'max_p99_ms'))
+
+    sizes = sorted(results)
+    for size in sizes:
+        for route, metrics in results[size].items():
+            budget = {**defaults, **budgets.get('routes', {}).get(route, {})}
+            if any(code >= 500 for code in metrics['statuses']):
+                failures.append(f'{route} @ {size} users: server error {metrics["statuses"]}')
+            for metric, key in limits:
+                value = metrics.get(metric)
+                if key in budget and value is not None and value > budget[key]:
+                    failures.append(f'{route} @ {size} users: {metric} {value} > budget {budget[key]}')
+
+    if len(sizes) > 1:
+        smallest, largest = results[sizes[0]], results[sizes[-1]]
+        for route, metrics in largest.items():
+            if route in smallest and metrics['queries'] > smallest[route]['queries']:
+                failures.append(
+                    f'{route}: queries grow with dataset size '
+                    f'({smallest[route]["queries"]} @ {sizes[0]} -> {metrics["queries"]} @ {sizes[-1]} users)'
+                )
+    return failures
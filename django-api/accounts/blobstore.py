@@ -0,0 +1,101 @@
+"""
+Content-addressed file storage.
+
+Blobs are written once under ``<root>/<digest[:2]>/<digest><suffix>`` and
+never modified, so a digest is a permanent, cache-friendly name for its
+bytes. Writes go to a temporary file in the destination directory that is
+renamed into place, so a reader never sees a partial file and concurrent
+writers of the same digest stay safe. Blobs are made world-readable
+(``FILE_MODE``) before the rename, since the temporary files start out 0600
+and a fronting nginx serving them directly runs as another user.
+
+``lock(digest)`` serialises callers that must check something and then
+write or delete a digest's files as one step.
+"""
+
+import errno
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+COPY_CHUNK = 256 * 1024
+FILE_MODE = 0o644
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, digest, suffix=''):
+        return self.root / digest[:2] / f'{digest}{suffix}'
+
+    def exists(self, digest, suffix=''):
+        return self.path(digest, suffix).exists()
+
+    def size(self, digest, suffix=''):
+        return self.path(digest, suffix).stat().st_size
+
+    def open(self, digest, suffix=''):
+        return self.path(digest, suffix).open('rb')
+
+    def write(self, digest, suffix, chunks):
+        """Store ``chunks`` (an iterable of bytes) as ``digest + suffix``; returns the final path."""
+        target = self.path(digest, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in chunks:
+                    tmp.write(chunk)
+            os.chmod(tmp_name, FILE_MODE)
+            os.replace(tmp_name, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+        return target
+
+    def write_file(self, digest, suffix, source_path):
+        """Move an already-written file at ``source_path`` into the store."""
+        target = self.path(digest, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.chmod(source_path, FILE_MODE)
+            os.replace(source_path, target)
+            return target
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+        # Another filesystem: copy next to the target and rename that instead.
+        with open(source_path, 'rb') as source:
+            self.write(digest, suffix, iter(lambda: source.read(COPY_CHUNK), b''))
+        os.unlink(source_path)
+        return target
+
+    @contextmanager
+    def lock(self, digest):
+        """
+        Hold an exclusive lock on ``digest`` across processes.
+
+        The lock is an ``flock`` on one file per shard directory, so it is
+        shared with the 1/256 of digests in the same shard and never needs
+        cleaning up.
+        """
+        path = self.root / digest[:2] / '.lock'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def delete(self, digest, suffix=''):
+        try:
+            self.path(digest, suffix).unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,138 @@
+"""
+Read-through cache for the catalog endpoints (subjects and courses).
+
+Catalog data only changes when a Subject or Course is edited, so every
+response is rendered once per *catalog version* and then served from the
+Django cache named by ``CATALOG_CACHE_ALIAS`` with a strong ETag. The
+version is a counter in the same cache, bumped by ``accounts.signals`` on
+every Subject/Course save or delete; bumping it orphans all previously
+rendered bodies at once, and they age out after ``CATALOG_CACHE_TIMEOUT``.
+
+The cache must be shared by all worker processes (the default ``CACHES``
+is), or a bump only reaches the process that saved. Writes that skip model
+signals must call ``bump_catalog_version`` themselves: ``seed_db`` and the
+load-data generator do.
+
+Hot entries are also kept in a process-local LRU (``CATALOG_LOCAL_SIZE``
+entries) for ``CATALOG_LOCAL_TTL`` seconds, so repeat hits touch neither the
+shared cache nor, with the database cache backend, Postgres. The version is
+one of those entries: a bump made in another worker is seen here within
+``CATALOG_LOCAL_TTL`` seconds, and immediately in the worker that made it.
+``accounts.quiz`` keeps its rendered quizzes in the same layer.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from accounts.http_cache import json_response, make_etag, render_json
+
+VERSION_KEY = 'catalog:version'
+
+
+_lock = threading.Lock()
+# key -> (expires_at, value), least recently used first.
+_local = OrderedDict()
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def local_get(key):
+    """Return the process-local entry for ``key``, or None if it is missing or expired."""
+    with _lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _local[key]
+            return None
+        _local.move_to_end(key)
+        return entry[1]
+
+
+def local_set(key, value):
+    ttl = getattr(settings, 'CATALOG_LOCAL_TTL', 5)
+    if ttl <= 0:
+        return
+    with _lock:
+        _local[key] = (time.monotonic() + ttl, value)
+        _local.move_to_end(key)
+        while len(_local) > getattr(settings, 'CATALOG_LOCAL_SIZE', 512):
+            _local.popitem(last=False)
+
+
+def local_delete(key):
+    with _lock:
+        _local.pop(key, None)
+
+
+def clear_local():
+    with _lock:
+        _local.clear()
+
+
+def _fresh_version():
+    # Never reuse a version number whose rendered bodies may still be cached.
+    return int(time.time() * 1000)
+
+
+def catalog_version():
+    version = local_get(VERSION_KEY)
+    if version is not None:
+        return version
+
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _fresh_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    local_set(VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _fresh_version(), timeout=None)
+    local_delete(VERSION_KEY)
+
+
+def cached_render(name, render):
+    """
+    Return ``(body, etag)`` for catalog entry ``name`` at the current version.
+
+    ``render`` builds the JSON-serializable data on a miss; returning None
+    means "not found" and is not cached.
+    """
+    key = f'catalog:{catalog_version()}:{name}'
+    cached = local_get(key)
+    if cached is not None:
+        return cached
+
+    cache = _cache()
+    cached = cache.get(key)
+    if cached is None:
+        data = render()
+        if data is None:
+            return None
+        body = render_json(data)
+        cached = (body, make_etag(body))
+        cache.set(key, cached, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600))
+    local_set(key, cached)
+    return cached
+
+
+def catalog_response(request, name, render):
+    """Serve catalog entry ``name`` (304 on a matching If-None-Match); None if ``render`` found nothing."""
+    cached = cached_render(name, render)
+    if cached is None:
+        return None
+    body, etag = cached
+    return json_response(request, body, etag, cache_control=getattr(settings, 'CATALOG_CACHE_CONTROL', 'no-cache'))
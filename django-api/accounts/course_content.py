@@ -0,0 +1,220 @@
+"""
+Lesson bodies (``Course.Content``) served from pre-compressed files.
+
+``Course.Content`` can be large, so list and detail endpoints never load it.
+The content endpoint looks up only ``Course.ContentHash`` and streams a file
+from a content-addressed store under ``COURSE_CONTENT_ROOT``. Each content
+version is materialized once, on first request, into:
+
+- ``<hash>.txt``            the UTF-8 body, used for ``Range`` requests,
+- ``<hash>.txt.gz`` / ``.br`` pre-compressed variants (br needs ``brotli``),
+- ``<hash>.sections.json``  byte offsets of paragraph-aligned sections of
+  roughly ``COURSE_CONTENT_SECTION_BYTES`` each, for ``?section=N``.
+
+Responses are streamed from disk in blocks, so a worker never holds more
+than one copy of the text, and only while materializing.
+"""
+
+import gzip
+import hashlib
+import json
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+
+from accounts.blobstore import BlobStore
+from accounts.http_cache import etag_matches
+from accounts.models import Course
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+IDENTITY = '.txt'
+GZIP = '.txt.gz'
+BROTLI = '.txt.br'
+SECTIONS = '.sections.json'
+
+CONTENT_TYPE = 'text/plain; charset=utf-8'
+BLOCK_SIZE = 64 * 1024
+PARAGRAPH_BREAK = re.compile(rb'\n[ \t\r]*\n')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def content_store():
+    return BlobStore(settings.COURSE_CONTENT_ROOT)
+
+
+def section_bounds(data, target_size):
+    """Split ``data`` into ``[start, end)`` byte ranges that end on paragraph breaks."""
+    bounds = []
+    start = 0
+    for match in PARAGRAPH_BREAK.finditer(data):
+        if match.end() - start >= target_size:
+            bounds.append([start, match.end()])
+            start = match.end()
+    if start < len(data) or not bounds:
+        bounds.append([start, len(data)])
+    return bounds
+
+
+def materialize(course_id):
+    """
+    Make sure the stored variants for ``course_id`` exist; return the content hash.
+
+    Returns None when the course does not exist. ``Course.save`` keeps
+    ``ContentHash`` and ``ContentSize`` in step with ``Content``. A missing
+    hash, a hash with no stored file, or a stored file whose size differs from
+    ``ContentSize`` is recomputed here from ``Content``. Detecting any other
+    stale hash would mean reading ``Content`` on every request, so writes
+    that bypass ``save`` (raw SQL, ``bulk_update``) must clear
+    ``ContentHash`` when they change ``Content``.
+    """
+    row = Course.objects.filter(pk=course_id).values_list('ContentHash', 'ContentSize').first()
+    if row is None:
+        return None
+    row, stored_size = row
+
+    store = content_store()
+    if row and store.exists(row, IDENTITY) and store.size(row, IDENTITY) == stored_size:
+        return row
+
+    text = Course.objects.filter(pk=course_id).values_list('Content', flat=True).first()
+    if text is None:
+        return None
+    data = text.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+
+    store.write(digest, GZIP, [gzip.compress(data, compresslevel=9)])
+    if brotli is not None:
+        store.write(digest, BROTLI, [brotli.compress(data)])
+    bounds = section_bounds(data, getattr(settings, 'COURSE_CONTENT_SECTION_BYTES', 16 * 1024))
+    store.write(digest, SECTIONS, [json.dumps(bounds).encode('utf-8')])
+    # Written last: its presence marks the whole set as complete.
+    store.write(digest, IDENTITY, [data])
+
+    if digest != row or len(data) != stored_size:
+        Course.objects.filter(pk=course_id).update(ContentHash=digest, ContentSize=len(data))
+    return digest
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _stream_slice(handle, start, length):
+    try:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = handle.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        handle.close()
+
+
+def _slice_response(store, digest, start, end, status=200):
+    response = StreamingHttpResponse(
+        _stream_slice(store.open(digest, IDENTITY), start, end - start),
+        content_type=CONTENT_TYPE,
+        status=status,
+    )
+    response['Content-Length'] = str(end - start)
+    return response
+
+
+def _parse_range(header, size):
+    """
+    Return ``(start, end)`` for a single ``bytes=`` range, None to ignore it, or False if unsatisfiable.
+
+    An invalid range (malformed, or last before first) is ignored and the full
+    body is served, as RFC 9110 section 14.2 requires.
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    return start, min(int(last) + 1, size) if last else size
+
+
+def content_response(request, digest, section=None):
+    """Build the streaming response for the stored content ``digest``."""
+    store = content_store()
+    size = store.size(digest, IDENTITY)
+
+    if section is not None:
+        with store.open(digest, SECTIONS) as handle:
+            bounds = json.load(handle)
+        if not 0 <= section < len(bounds):
+            return None
+        start, end = bounds[section]
+        etag = f'"{digest}-s{section}"'
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = _slice_response(store, digest, start, end)
+        response['X-Content-Sections'] = str(len(bounds))
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            response = _slice_response(store, digest, start, end, status=206)
+            response['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+            response['ETag'] = f'"{digest}"'
+            return response
+
+    accepted = _accepted_encodings(request)
+    if brotli is not None and 'br' in accepted and store.exists(digest, BROTLI):
+        suffix, encoding, etag = BROTLI, 'br', f'"{digest}-br"'
+    elif 'gzip' in accepted:
+        suffix, encoding, etag = GZIP, 'gzip', f'"{digest}-gz"'
+    else:
+        suffix, encoding, etag = IDENTITY, None, f'"{digest}"'
+
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(store.open(digest, suffix), content_type=CONTENT_TYPE)
+        # The on-disk blob name is meaningless to clients.
+        response.headers.pop('Content-Disposition', None)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        else:
+            response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'no-cache'
+    return response
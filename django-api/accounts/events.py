@@ -0,0 +1,196 @@
+"""
+Achievement events.
+
+Request handlers announce what happened by sending ``login_recorded`` or
+``course_completed``; they never touch ``UserAchievement`` themselves. The
+receivers below hand each event to the backend selected by
+``ACHIEVEMENT_EVENTS_BACKEND``:
+
+``thread`` (default)
+    After the request's transaction commits, the event is put on an
+    in-process queue. ``ACHIEVEMENT_EVENTS_WORKERS`` daemon threads drain it in
+    batches of up to ``ACHIEVEMENT_EVENTS_BATCH_SIZE`` events (waiting at most
+    ``ACHIEVEMENT_EVENTS_MAX_WAIT`` seconds to fill one), collapse duplicates
+    per user and refresh the whole batch with one
+    ``achievement_engine.refresh_achievements`` call. Events still queued when
+    the process exits are lost; progress catches up on the user's next event.
+
+``outbox``
+    The event is stored as an ``AchievementEvent`` row in the request's own
+    transaction, and ``manage.py process_achievement_events`` consumes the
+    table in batches. Nothing is lost across restarts.
+
+``sync``
+    The refresh runs after commit in the request thread (tests, debugging).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal, receiver
+
+from accounts.achievement_engine import LOGIN, SCORE, course_trigger, refresh_achievements
+from accounts.models import AchievementEvent
+
+logger = logging.getLogger(__name__)
+
+SYNC = 'sync'
+THREAD = 'thread'
+OUTBOX = 'outbox'
+
+# Sent with ``user_id`` after a successful login updated the streak.
+login_recorded = Signal()
+# Sent with ``user_id`` and ``course_id`` after a course was completed.
+course_completed = Signal()
+
+_STOP = object()
+
+
+def _backend():
+    return getattr(settings, 'ACHIEVEMENT_EVENTS_BACKEND', THREAD)
+
+
+def _batch_size():
+    return max(1, getattr(settings, 'ACHIEVEMENT_EVENTS_BATCH_SIZE', 200))
+
+
+def group_events(events):
+    """Collapse ``(user_id, trigger)`` pairs into ``{user_id: {triggers}}``."""
+    grouped = {}
+    for user_id, trigger in events:
+        grouped.setdefault(user_id, set()).add(trigger)
+    return grouped
+
+
+class _Dispatcher:
+    def __init__(self, workers, batch_size, max_wait):
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.threads = [
+            threading.Thread(target=self._run, name=f'achievement-events-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, user_id, triggers):
+        for trigger in triggers:
+            self.queue.put((user_id, trigger))
+
+    def stop(self, timeout=5):
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def _next_batch(self):
+        """Block for one event, then gather more until the batch is full or ``max_wait`` passes."""
+        item = self.queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            try:
+                refresh_achievements(group_events(batch))
+            except Exception:
+                logger.exception('Failed to apply %d achievement event(s)', len(batch))
+            finally:
+                close_old_connections()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def _get_dispatcher():
+    """Start the worker threads on first use (and again in a forked child)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None or _dispatcher.pid != os.getpid():
+            _dispatcher = _Dispatcher(
+                workers=max(1, getattr(settings, 'ACHIEVEMENT_EVENTS_WORKERS', 1)),
+                batch_size=_batch_size(),
+                max_wait=getattr(settings, 'ACHIEVEMENT_EVENTS_MAX_WAIT', 0.5),
+            )
+        return _dispatcher
+
+
+@atexit.register
+def shutdown():
+    """Let the workers finish the events already queued."""
+    with _dispatcher_lock:
+        dispatcher = _dispatcher
+    if dispatcher is not None and dispatcher.pid == os.getpid():
+        dispatcher.stop()
+
+
+def publish(user_id, triggers):
+    """Schedule re-evaluation of the rules affected by ``triggers`` for ``user_id`` on the configured backend."""
+    triggers = list(triggers)
+    backend = _backend()
+    if backend == OUTBOX:
+        AchievementEvent.objects.bulk_create(AchievementEvent(user_id=user_id, trigger=t) for t in triggers)
+    elif backend == SYNC:
+        transaction.on_commit(lambda: refresh_achievements({user_id: set(triggers)}))
+    else:
+        transaction.on_commit(lambda: _get_dispatcher().put(user_id, triggers))
+
+
+def process_outbox(batch_size=None):
+    """
+    Apply and delete up to ``batch_size`` outbox events; returns how many were consumed.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    consumers can run side by side.
+    """
+    if batch_size is None:
+        batch_size = _batch_size()
+    with transaction.atomic():
+        events = list(
+            AchievementEvent.objects.select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', 'user_id', 'trigger')[:batch_size]
+        )
+        if not events:
+            return 0
+        refresh_achievements(group_events((user_id, trigger) for _, user_id, trigger in events))
+        AchievementEvent.objects.filter(pk__in=[pk for pk, _, _ in events]).delete()
+    return len(events)
+
+
+@receiver(login_recorded)
+def _on_login(sender, user_id, **kwargs):
+    publish(user_id, [LOGIN])
+
+
+@receiver(course_completed)
+def _on_course_completed(sender, user_id, course_id, **kwargs):
+    publish(user_id, [course_trigger(course_id), SCORE])
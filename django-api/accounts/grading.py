@@ -0,0 +1,108 @@
+"""
+Quiz grading.
+
+``grade_submission`` validates an ``answers`` payload and scores it against
+a course's answer key (see ``accounts.answer_keys``). Every check is a dict
+lookup, so with a warm key grading runs no queries at all, however long the
+quiz. It has no request/response dependencies, so bulk imports and
+background jobs can grade through the same code path as
+``submitCourseAnswers``.
+"""
+
+from accounts.models import Option
+
+
+class GradingError(Exception):
+    """A submission that cannot be graded; ``payload`` is the 400 response body."""
+
+    def __init__(self, payload):
+        super().__init__(payload.get('detail'))
+        self.payload = payload
+
+
+def normalize_answers(answers):
+    """Return ``{question_id: option_id}`` from the raw ``answers`` list."""
+    if not isinstance(answers, list):
+        raise GradingError({'detail': 'answers must be a list.'})
+
+    normalized = {}
+    invalid_items = []
+
+    for idx, item in enumerate(answers):
+        if not isinstance(item, dict):
+            invalid_items.append({'index': idx, 'detail': 'Each answer must be an object.'})
+            continue
+
+        try:
+            question_id_int = int(item.get('question_id'))
+            option_id_int = int(item.get('option_id'))
+        except (TypeError, ValueError):
+            invalid_items.append({'index': idx, 'detail': 'question_id and option_id must be integers.'})
+            continue
+
+        normalized[question_id_int] = option_id_int
+
+    if invalid_items:
+        raise GradingError({'detail': 'Invalid answers payload.', 'errors': invalid_items})
+
+    return normalized
+
+
+def grade_answers(answer_key, normalized_answers):
+    """Score ``normalized_answers`` against a course ``answer_key``."""
+    course_question_ids = answer_key.question_ids
+    submitted_question_ids = set(normalized_answers.keys())
+    extra_question_ids = sorted(submitted_question_ids - course_question_ids)
+    if extra_question_ids:
+        raise GradingError(
+            {'detail': 'Some submitted questions are not part of this course.', 'extra_question_ids': extra_question_ids}
+        )
+
+    missing_question_ids = sorted(course_question_ids - submitted_question_ids)
+    if missing_question_ids:
+        raise GradingError(
+            {'detail': 'You must answer all questions before submitting.', 'missing_question_ids': missing_question_ids}
+        )
+
+    correct_count = 0
+    per_question = []
+
+    for question_id in sorted(course_question_ids):
+        option_id = normalized_answers[question_id]
+        option = answer_key.options.get(option_id)
+
+        if option is None:
+            # Not an option of this course: either unknown or from another course.
+            if not Option.objects.filter(pk=option_id).exists():
+                raise GradingError({'detail': 'Option not found.', 'question_id': question_id, 'option_id': option_id})
+            option = (None, False)
+
+        option_question_id, is_correct = option
+        if option_question_id != question_id:
+            raise GradingError(
+                {
+                    'detail': 'Option does not belong to the submitted question.',
+                    'question_id': question_id,
+                    'option_id': option_id,
+                }
+            )
+
+        if is_correct:
+            correct_count += 1
+
+        per_question.append({'question_id': question_id, 'option_id': option_id, 'correct': is_correct})
+
+    return {
+        'total': len(course_question_ids),
+        'correct': correct_count,
+        'per_question': per_question,
+    }
+
+
+def grade_submission(answer_key, answers):
+    """Validate and grade ``answers`` against ``answer_key``; raises GradingError."""
+    normalized_answers = normalize_answers(answers)
+    if not answer_key.question_ids:
+        raise GradingError({'detail': 'Course has no questions.'})
+
+    return grade_answers(answer_key, normalized_answers)
@@ -0,0 +1,127 @@
+"""
+Password hashing policy.
+
+``PASSWORD_HASHER`` picks the hasher new passwords are stored with
+(``scrypt`` by default, ``argon2`` when ``argon2-cffi`` is installed, or
+``pbkdf2``); the others stay in ``PASSWORD_HASHERS`` so existing hashes keep
+verifying. The tuned hashers below keep Django's algorithm names and read
+their cost parameters from settings, so changing either the hasher or its
+parameters needs no migration: Django's ``check_password`` re-hashes a
+password with the preferred hasher on the user's next successful login.
+
+Hashing is deliberately expensive, so ``hashing_slot`` caps how many hashes a
+process computes at once (``PASSWORD_HASHING_CONCURRENCY``). Hold a slot only
+around the hash itself, not the database writes that follow; ``verify_password``
+does this for logins, including the re-hash of an outdated hash. A request that
+cannot get a slot within ``PASSWORD_HASHING_TIMEOUT`` seconds fails fast
+with 503 instead of queueing behind a login storm and tying up its worker.
+
+The limit is per process, and its default (the CPU count) suits a single
+process. ``gunicorn.conf.py`` divides the cores between its workers. Any
+other multi-process server (several ``runserver``/uWSGI/uvicorn workers)
+needs ``PASSWORD_HASHING_CONCURRENCY`` set explicitly to about cores divided
+by workers.
+``manage.py benchmark_hashers`` measures hashes/sec on the host to tune both.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    check_password,
+    make_password,
+)
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    @property
+    def maxmem(self):
+        # scrypt needs ~128 * n * r bytes and OpenSSL caps it at 32 MiB by
+        # default; leave room for verifying hashes made with larger factors.
+        return max(2 * 128 * self.work_factor * self.block_size, 256 * 1024 * 1024)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy; please try again shortly.'
+    default_code = 'hashing_busy'
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def _get_slots():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(max(1, settings.PASSWORD_HASHING_CONCURRENCY))
+        return _slots
+
+
+@contextmanager
+def hashing_slot():
+    """Hold one of the process's hashing slots; raises ``HashingBusy`` when none frees up in time."""
+    slots = _get_slots()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING_TIMEOUT):
+        raise HashingBusy()
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+def verify_password(user, raw_password):
+    """
+    Return whether ``raw_password`` matches ``user``'s stored hash.
+
+    Unlike ``user.check_password`` this never writes inside a slot: when the
+    hash needs upgrading, the new hash is computed in a second slot and saved
+    after it is released.
+    """
+    outdated = []
+    with hashing_slot():
+        valid = check_password(raw_password, user.password, setter=outdated.append)
+    if outdated:
+        with hashing_slot():
+            user.password = make_password(raw_password)
+        user.save(update_fields=['password'])
+    return valid
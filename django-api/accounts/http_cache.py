@@ -0,0 +1,41 @@
+"""
+Helpers for serving pre-rendered JSON with validators.
+
+Bodies are rendered once and cached by the caller; these helpers attach a
+strong ETag and answer ``If-None-Match`` with ``304 Not Modified`` so
+repeat clients skip the transfer as well.
+"""
+
+import hashlib
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+
+def render_json(data):
+    return JSONRenderer().render(data)
+
+
+def make_etag(body):
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def json_response(request, body, etag, cache_control='no-cache'):
+    """Return ``body`` as JSON, or a 304 when the client already has ``etag``."""
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,229 @@
+"""
+Per-request timing and SQL instrumentation.
+
+``RequestMetricsMiddleware`` (first in ``MIDDLEWARE``) times every request
+and records its duration in an in-process histogram by route, method and
+status. That costs two clock reads and a lock.
+
+A fraction ``REQUEST_METRICS_SAMPLE_RATE`` of requests is also instrumented
+in depth. Every database connection gets an ``execute_wrapper`` for the
+request, which records for each statement its SQL (without parameters), its
+duration and a fingerprint. The fingerprint is the SQL with ``IN`` lists
+collapsed, so the same query issued in a loop (an N+1) shares one
+fingerprint. Python CPU time is measured with the thread's CPU clock. For a
+sampled request the middleware:
+
+* adds a ``Server-Timing`` header (``total``, ``db``, ``cpu``), which
+  browsers show in their network panel (``REQUEST_METRICS_SERVER_TIMING``);
+* logs one JSON line to the ``accounts.requests`` logger with the counts,
+  times, the ``REQUEST_METRICS_SLOW_QUERIES`` slowest statements and every
+  fingerprint seen at least ``REQUEST_METRICS_DUPLICATE_THRESHOLD`` times;
+* records query count, DB time and CPU time in the histograms.
+
+``metrics`` serves the histograms in the Prometheus text format at
+``/metrics``. It needs ``Authorization: Bearer <REQUEST_METRICS_TOKEN>``, and
+without a token it is only served when ``DEBUG`` is on. The registry lives
+in each process: behind a multi-process server every worker reports its own
+series, labelled with its ``pid``.
+"""
+
+import bisect
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger('accounts.requests')
+
+IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SQL_LOG_CHARS = 500
+
+
+def fingerprint(sql):
+    """``sql`` with ``IN (%s, %s, ...)`` collapsed, so batched and looped queries group together."""
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            # Per-bucket counts (plus +Inf), then the sum.
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self, pid):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total) in sorted(self.series.items()):
+            labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            labels = f'{labels},pid="{pid}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.duration = Histogram(
+            'api_request_duration_seconds', 'Request wall time.', DURATION_BUCKETS, ('route', 'method', 'status')
+        )
+        self.queries = Histogram('api_request_db_queries', 'SQL queries per sampled request.', QUERY_BUCKETS, ('route',))
+        self.db_time = Histogram('api_request_db_seconds', 'SQL time per sampled request.', DURATION_BUCKETS, ('route',))
+        self.cpu_time = Histogram('api_request_cpu_seconds', 'Python CPU time per sampled request.', DURATION_BUCKETS, ('route',))
+        self.duplicates = {}
+
+    def record(self, route, method, status, seconds, sample=None):
+        with self.lock:
+            self.duration.observe((route, method, str(status)), seconds)
+            if sample is not None:
+                self.queries.observe((route,), len(sample.statements))
+                self.db_time.observe((route,), sample.db_seconds)
+                self.cpu_time.observe((route,), sample.cpu_seconds)
+                if sample.duplicates:
+                    self.duplicates[route] = self.duplicates.get(route, 0) + 1
+
+    def render(self):
+        pid = os.getpid()
+        with self.lock:
+            lines = []
+            for histogram in (self.duration, self.queries, self.db_time, self.cpu_time):
+                lines += histogram.render(pid)
+            lines += [
+                '# HELP api_request_duplicate_queries_total Sampled requests that repeated a query fingerprint.',
+                '# TYPE api_request_duplicate_queries_total counter',
+            ]
+            for route, count in sorted(self.duplicates.items()):
+                lines.append(f'api_request_duplicate_queries_total{{route="{_escape(route)}",pid="{pid}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class _Sample:
+    """SQL statements and CPU time of one sampled request."""
+
+    def __init__(self):
+        self.statements = []
+        self.cpu_started = time.thread_time()
+        self.cpu_seconds = 0.0
+        self.db_seconds = 0.0
+        self.duplicates = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((sql, time.perf_counter() - started))
+
+    def finish(self, duplicate_threshold):
+        self.cpu_seconds = time.thread_time() - self.cpu_started
+        self.db_seconds = sum(seconds for _, seconds in self.statements)
+        counts = {}
+        for sql, _ in self.statements:
+            key = fingerprint(sql)
+            counts[key] = counts.get(key, 0) + 1
+        self.duplicates = {key: n for key, n in counts.items() if n >= duplicate_threshold}
+
+    def slowest(self, n):
+        return sorted(self.statements, key=lambda s: s[1], reverse=True)[:n]
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    # The view name, not the path, keeps the label set bounded.
+    return match.view_name if match else 'unmatched'
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        sample = _Sample() if rate > 0 and random.random() < rate else None
+        started = time.perf_counter()
+        if sample is None:
+            response = self.get_response(request)
+        else:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                response = self.get_response(request)
+        seconds = time.perf_counter() - started
+        route = _route(request)
+
+        if sample is not None:
+            sample.finish(settings.REQUEST_METRICS_DUPLICATE_THRESHOLD)
+            if settings.REQUEST_METRICS_SERVER_TIMING:
+                response['Server-Timing'] = (
+                    f'total;dur={seconds * 1000:.1f}, '
+                    f'db;dur={sample.db_seconds * 1000:.1f};desc="{len(sample.statements)} queries", '
+                    f'cpu;dur={sample.cpu_seconds * 1000:.1f}'
+                )
+            self._log(request, response, route, seconds, sample)
+        registry.record(route, request.method, response.status_code, seconds, sample)
+        return response
+
+    def _log(self, request, response, route, seconds, sample):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        logger.info(json.dumps({
+            'route': route,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(seconds * 1000, 2),
+            'cpu_ms': round(sample.cpu_seconds * 1000, 2),
+            'db_ms': round(sample.db_seconds * 1000, 2),
+            'queries': len(sample.statements),
+            'slowest': [
+                {'sql': sql[:SQL_LOG_CHARS], 'ms': round(s * 1000, 2)}
+                for sql, s in sample.slowest(settings.REQUEST_METRICS_SLOW_QUERIES)
+            ],
+            'duplicates': [
+                {'sql': sql[:SQL_LOG_CHARS], 'count': n}
+                for sql, n in sorted(sample.duplicates.items(), key=lambda d: d[1], reverse=True)
+            ],
+        }))
+
+
+def metrics(request):
+    """The request histograms in the Prometheus text exposition format."""
+    token = settings.REQUEST_METRICS_TOKEN
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            raise Http404
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,48 @@
+"""
+Leaderboard queries.
+
+The leaderboard is ordered by ``score`` (desc), then the stored ``rank`` and
+finally ``user_name`` so ties are stable. Both lookups below are bounded: the
+top-N read walks the ``(score DESC, rank)`` profile index and stops after N
+rows, and a caller's position is a single COUNT of the profiles ordered ahead
+of them instead of a scan over every user in Python.
+"""
+
+from django.db.models import Q
+
+from accounts.models import UserProfile
+
+LEADERBOARD_ORDERING = ('-score', 'rank', 'user__user_name')
+
+
+def leaderboard_queryset():
+    return (
+        UserProfile.objects.select_related('user')
+        .only('score', 'rank', 'user__user_name')
+        .order_by(*LEADERBOARD_ORDERING)
+    )
+
+
+def top_entries(limit=10):
+    """Return the first ``limit`` profiles in leaderboard order."""
+    return list(leaderboard_queryset()[:limit])
+
+
+def position_of(profile):
+    """Return the 1-based leaderboard position of ``profile``."""
+    user_name = profile.user.user_name
+    ahead = UserProfile.objects.filter(
+        Q(score__gt=profile.score)
+        | Q(score=profile.score, rank__lt=profile.rank)
+        | Q(score=profile.score, rank=profile.rank, user__user_name__lt=user_name)
+    ).count()
+    return ahead + 1
+
+
+def serialize_entry(profile, position):
+    return {
+        'user_name': profile.user.user_name,
+        'rank': profile.rank,
+        'score': profile.score,
+        'position': position,
+    }
@@ -0,0 +1,391 @@
+"""
+Synthetic data for load testing (``manage.py generate_load_data``).
+
+A catalogue of subjects, courses, questions and options is created first,
+then users are generated in chunks of consecutive indices. Every user's rows
+come from an RNG seeded with ``(seed, user index)``, so a chunk produces the
+same rows whichever worker process runs it, and the same ``--seed`` and
+``--as-of`` always give the same data however many workers are used.
+
+Distributions are skewed the way real traffic is:
+
+* course popularity follows a Zipf law, so a few courses collect most
+  completions (and most ``UserCourse`` rows per course id);
+* completions, bookmarks, login streaks and activity volume per user are
+  Pareto-distributed: most users did a little, a long tail did a lot;
+* a user who completes every course of a subject gets its certificate.
+
+On PostgreSQL each table of a chunk is written with ``COPY ... FROM STDIN``
+from a file-like wrapper around a row generator, so neither the rows nor the
+COPY text of a table is ever held in full; other databases get
+``bulk_create`` in batches. Generated users share one password hash, since
+hashing millions of passwords would dominate the run.
+"""
+
+import hashlib
+import json
+import math
+import random
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from accounts.catalog import bump_catalog_version
+from accounts.models import (
+    Course,
+    Option,
+    Question,
+    Subject,
+    SubjectBookmark,
+    User,
+    UserActivity,
+    UserCertificate,
+    UserCourse,
+    UserProfile,
+)
+from accounts.scoring import COMPLETED
+
+COPY_BUFFER = 64 * 1024
+BULK_BATCH = 5000
+# Reserve part of the 64-bit seed space per user so user RNG streams never overlap.
+USER_SEED_STRIDE = 1 << 40
+USER_ID_NAMESPACE = uuid.UUID("6f1c2a4e-2b9d-4d0e-9a57-3c1f0e8b7d21")
+
+
+class Catalog:
+    """The generated courses, picklable so it can be handed to worker processes."""
+
+    def __init__(self, subjects, courses):
+        # subjects: [(subject_id, name)]; courses: [(course_id, subject_id, title, question_count)]
+        self.subjects = subjects
+        self.courses = courses
+        self.course_ids = [c[0] for c in courses]
+        self.by_id = {c[0]: c for c in courses}
+        self.subject_courses = {}
+        for course_id, subject_id, _, _ in courses:
+            self.subject_courses.setdefault(subject_id, set()).add(course_id)
+        self.subject_names = dict(subjects)
+        self.subject_ids = [s[0] for s in subjects]
+        self.course_weights = _zipf_cum_weights(len(self.course_ids), 1.1)
+        self.subject_weights = _zipf_cum_weights(len(self.subject_ids), 1.0)
+
+
+def _zipf_cum_weights(n, s):
+    total = 0.0
+    cum = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank**s
+        cum.append(total)
+    return cum
+
+
+def _heavy_tail(rng, alpha, cap):
+    """0, 1, 2, ... with a Pareto tail; about ``1 - 2**-alpha`` of draws are 0."""
+    return min(cap, int(rng.paretovariate(alpha)) - 1)
+
+
+def _weighted_sample(rng, population, cum_weights, k):
+    """``k`` distinct items drawn by weight, falling back to popularity order for the rarest."""
+    picked = {}
+    attempts = 0
+    while len(picked) < k and attempts < 4 * k:
+        item = rng.choices(population, cum_weights=cum_weights)[0]
+        picked.setdefault(item, None)
+        attempts += 1
+    for item in population:
+        if len(picked) >= k:
+            break
+        picked.setdefault(item, None)
+    return list(picked)
+
+
+def build_catalog(seed, subjects, courses_per_subject, questions_per_course, options_per_question):
+    """Create the catalogue rows and return its ``Catalog``."""
+    rng = random.Random(seed)
+    subject_rows = Subject.objects.bulk_create(
+        [
+            Subject(SubjectName=f"Load Subject {i + 1}", SubjectDescription=f"Generated subject {i + 1} (seed {seed}).")
+            for i in range(subjects)
+        ]
+    )
+    course_rows = []
+    for subject in subject_rows:
+        for j in range(courses_per_subject):
+            content = f"Generated lesson {j + 1} of {subject.SubjectName}."
+            course_rows.append(
+                Course(
+                    SubjectID=subject,
+                    CourseTitle=f"{subject.SubjectName} - Course {j + 1}",
+                    CourseDescription="Generated course.",
+                    CourseDifficulty=min(5, 1 + j * 5 // max(1, courses_per_subject)),
+                    Content=content,
+                    ContentHash=hashlib.sha256(content.encode()).hexdigest(),
+                    ContentSize=len(content.encode()),
+                )
+            )
+    course_rows = Course.objects.bulk_create(course_rows, batch_size=BULK_BATCH)
+
+    question_rows = Question.objects.bulk_create(
+        [
+            Question(CourseID=course, QuestionDescription=f"Question {q + 1} of {course.CourseTitle}?")
+            for course in course_rows
+            for q in range(questions_per_course)
+        ],
+        batch_size=BULK_BATCH,
+    )
+    option_rows = []
+    for question in question_rows:
+        correct = rng.randrange(options_per_question)
+        option_rows.extend(
+            Option(QuestionID=question, OptionText=f"Option {o + 1}", CorrectOption=o == correct)
+            for o in range(options_per_question)
+        )
+    Option.objects.bulk_create(option_rows, batch_size=BULK_BATCH)
+    # bulk_create sends no signals, so cached catalog responses are dropped here.
+    bump_catalog_version()
+
+    return Catalog(
+        [(s.SubjectID, s.SubjectName) for s in subject_rows],
+        [(c.CourseID, c.SubjectID_id, c.CourseTitle, questions_per_course) for c in course_rows],
+    )
+
+
+class UserPlan:
+    """Everything generated for one user; the table generators below only read it."""
+
+    __slots__ = (
+        "index",
+        "user_id",
+        "user_name",
+        "joined",
+        "completions",
+        "bookmarks",
+        "streak",
+        "last_login",
+        "logins",
+        "certificates",
+    )
+
+
+def plan_user(seed, index, catalog, as_of, prefix, max_activity):
+    rng = random.Random(seed * USER_SEED_STRIDE + index)
+    plan = UserPlan()
+    plan.index = index
+    plan.user_name = f"{prefix}{index}"
+    plan.user_id = uuid.uuid5(USER_ID_NAMESPACE, f"{seed}:{plan.user_name}")
+    joined_days = min(730, int(rng.expovariate(1 / 180)))
+    plan.joined = _at(as_of - timedelta(days=joined_days), rng)
+    span = max(1, joined_days)
+
+    completed = _weighted_sample(
+        rng, catalog.course_ids, catalog.course_weights, _heavy_tail(rng, 1.3, len(catalog.course_ids))
+    )
+    plan.completions = []
+    for course_id in completed:
+        questions = catalog.by_id[course_id][3]
+        score = rng.randint(math.ceil(questions / 2), questions) if questions else 0
+        plan.completions.append((course_id, score, _at(as_of - timedelta(days=rng.randrange(span)), rng)))
+
+    bookmarked = _weighted_sample(
+        rng, catalog.subject_ids, catalog.subject_weights, _heavy_tail(rng, 1.5, len(catalog.subject_ids))
+    )
+    plan.bookmarks = [(subject_id, _at(as_of - timedelta(days=rng.randrange(span)), rng)) for subject_id in bookmarked]
+    plan.bookmarks.sort(key=lambda b: b[1])
+
+    plan.streak = _heavy_tail(rng, 1.2, 365) + 1
+    plan.last_login = as_of - timedelta(days=min(span, int(rng.expovariate(1 / 7))))
+    logins = _heavy_tail(rng, 0.9, max_activity)
+    plan.logins = sorted(_at(as_of - timedelta(days=rng.randrange(span)), rng) for _ in range(logins))
+
+    done = {c[0] for c in plan.completions}
+    plan.certificates = [
+        subject_id for subject_id, course_ids in catalog.subject_courses.items() if course_ids and course_ids <= done
+    ]
+    return plan
+
+
+def _at(day, rng):
+    return datetime.combine(day, time(rng.randrange(24), rng.randrange(60), rng.randrange(60)), dt_timezone.utc)
+
+
+# Row generators: (model, [attnames], rows(plans, catalog, context)).
+
+def _users(plans, catalog, ctx):
+    for p in plans:
+        yield (p.user_id, ctx["password"], None, False, p.user_name, f"{p.user_name}@load.test", None, True, False)
+
+
+def _profiles(plans, catalog, ctx):
+    for p in plans:
+        score = sum(c[1] for c in p.completions)
+        bookmark = p.bookmarks[-1] if p.bookmarks else (None, None)
+        yield (p.user_id, score, 99999, p.streak, p.last_login, None, None, bookmark[0], bookmark[1])
+
+
+def _user_courses(plans, catalog, ctx):
+    for p in plans:
+        for course_id, score, _ in p.completions:
+            yield (course_id, p.user_id, score, COMPLETED)
+
+
+def _bookmarks(plans, catalog, ctx):
+    for p in plans:
+        for subject_id, at in p.bookmarks:
+            yield (p.user_id, subject_id, at)
+
+
+def _activity(plans, catalog, ctx):
+    for p in plans:
+        yield (p.user_id, "REGISTRATION", p.joined, {})
+        for at in p.logins:
+            yield (p.user_id, "LOGIN", at, {})
+        for course_id, score, at in p.completions:
+            total = catalog.by_id[course_id][3]
+            yield (p.user_id, "COURSE_SUBMISSION", at, {"course_id": course_id, "correct": score, "total": total, "improved": False})
+        for subject_id, at in p.bookmarks:
+            yield (p.user_id, "BOOKMARK", at, {"subject_id": subject_id})
+
+
+def _certificates(plans, catalog, ctx):
+    for p in plans:
+        completions = {c[0]: c for c in p.completions}
+        for subject_id in p.certificates:
+            courses = sorted(catalog.subject_courses[subject_id])
+            finished = max(completions[c][2] for c in courses)
+            subject_name = catalog.subject_names[subject_id]
+            scores = [
+                {"course_id": c, "course_title": catalog.by_id[c][2], "score": completions[c][1]} for c in courses
+            ]
+            yield (
+                p.user_id,
+                subject_id,
+                p.user_name,
+                p.user_name,
+                subject_name,
+                subject_name,
+                [catalog.by_id[c][2] for c in courses],
+                finished,
+                finished,
+                {"course_scores": scores},
+            )
+
+
+TABLES = [
+    (User, ["userID", "password", "last_login", "is_superuser", "user_name", "email", "License", "is_active", "is_staff"], _users),
+    (
+        UserProfile,
+        [
+            "user_id",
+            "score",
+            "rank",
+            "login_streak_days",
+            "last_login_date",
+            "profile_pic_hash",
+            "profile_pic_mime",
+            "bookmarked_subject_id",
+            "bookmarked_subject_updated_at",
+        ],
+        _profiles,
+    ),
+    (UserCourse, ["CourseID_id", "UserID_id", "CourseScore", "CourseFlag"], _user_courses),
+    (SubjectBookmark, ["user_id", "subject_id", "created_at"], _bookmarks),
+    (UserActivity, ["user_id", "activity_type", "timestamp", "payload"], _activity),
+    (
+        UserCertificate,
+        [
+            "user_id",
+            "subject_id",
+            "name_en",
+            "name_cn",
+            "subject_en",
+            "subject_cn",
+            "course_titles",
+            "completed_at",
+            "first_downloaded_at",
+            "metadata",
+        ],
+        _certificates,
+    ),
+]
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class _CopyStream:
+    """File-like ``read()`` over COPY text lines produced on demand from ``rows``."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pending = b""
+        self.count = 0
+
+    def read(self, size=-1):
+        size = COPY_BUFFER if size is None or size < 0 else size
+        parts = [self.pending]
+        length = len(self.pending)
+        while length < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            line = ("\t".join(_copy_value(v) for v in row) + "\n").encode()
+            parts.append(line)
+            length += len(line)
+            self.count += 1
+        data = b"".join(parts)
+        self.pending = data[size:]
+        return data[:size]
+
+
+def _copy_rows(cursor, model, attnames, rows):
+    columns = ", ".join(connection.ops.quote_name(model._meta.get_field(name).column) for name in attnames)
+    stream = _CopyStream(rows)
+    cursor.copy_expert(
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN", stream, size=COPY_BUFFER
+    )
+    return stream.count
+
+
+def _bulk_rows(model, attnames, rows):
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(model(**dict(zip(attnames, row))))
+        if len(batch) >= BULK_BATCH:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def generate_chunk(start, stop, seed, catalog, as_of, prefix, password, max_activity):
+    """Write users ``[start, stop)`` and all their rows in one transaction; returns ``{table: rows}``."""
+    plans = [plan_user(seed, index, catalog, as_of, prefix, max_activity) for index in range(start, stop)]
+    ctx = {"password": password}
+    counts = {}
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model, attnames, rows in TABLES:
+                    counts[model._meta.db_table] = _copy_rows(cursor, model, attnames, rows(plans, catalog, ctx))
+        else:
+            for model, attnames, rows in TABLES:
+                counts[model._meta.db_table] = _bulk_rows(model, attnames, rows(plans, catalog, ctx))
+    return counts
@@ -0,0 +1,94 @@
+import gzip
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.activity import DEFAULT_PARTITION, TABLE, add_months, is_partitioned, month_start, monthly_partitions
+
+
+def _export(query, target, params=None):
+    """Write the rows of ``query`` (a SELECT, or a DELETE ... RETURNING) to ``target`` as CSV, atomically."""
+    tmp = target.with_name(f".{target.name}.tmp")
+    with gzip.open(tmp, "wb") as fh, connection.cursor() as cursor:
+        sql = cursor.mogrify(query, params).decode() if params else query
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", fh)
+    with open(tmp, "rb") as fh:
+        os.fsync(fh.fileno())
+    os.replace(tmp, target)
+
+
+class Command(BaseCommand):
+    help = (
+        "Export monthly user activity partitions older than the retention window to .csv.gz files and drop them; "
+        "expired rows in the default partition are exported and deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=12,
+            help="Months to keep in the database, counting the current one (default: 12).",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default=settings.ACTIVITY_ARCHIVE_DIR,
+            help="Where the compressed CSV exports are written (default: ACTIVITY_ARCHIVE_DIR).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the partitions that would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned(connection):
+            raise CommandError("The user activity table is not partitioned (PostgreSQL only; see migration 0023).")
+        if options["retain_months"] < 1:
+            raise CommandError("--retain-months must be at least 1.")
+
+        cutoff = add_months(month_start(timezone.now()), 1 - options["retain_months"])
+        expired = [(month, name) for month, name in monthly_partitions(connection) if month < cutoff]
+        cutoff_at = f"{cutoff.isoformat()} 00:00:00+00"
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {DEFAULT_PARTITION} WHERE "timestamp" < %s', [cutoff_at])
+            stray_rows = cursor.fetchone()[0]
+        if not expired and not stray_rows:
+            self.stdout.write(self.style.SUCCESS(f"Nothing older than {cutoff:%Y-%m} to archive."))
+            return
+
+        output_dir = Path(options["output_dir"])
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for month, name in expired:
+            target = output_dir / f"{name}.csv.gz"
+            if options["dry_run"]:
+                self.stdout.write(f"Would archive {name} to {target}")
+                continue
+
+            _export(f"SELECT * FROM {name}", target)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+                cursor.execute(f"DROP TABLE {name}")
+            self.stdout.write(f"Archived {name} ({month:%Y-%m}) to {target}")
+
+        if stray_rows:
+            # Rows from months that never had a partition of their own (e.g. written
+            # before create_activity_partitions ran) sit in the default partition.
+            # It holds few rows, so they are exported and deleted in one transaction.
+            target = output_dir / f"{DEFAULT_PARTITION}_before{cutoff:%Y%m}_{timezone.now():%Y%m%d%H%M%S}.csv.gz"
+            if options["dry_run"]:
+                self.stdout.write(f"Would move {stray_rows} row(s) from {DEFAULT_PARTITION} to {target}")
+            else:
+                with transaction.atomic():
+                    _export(
+                        f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" < %s RETURNING *', target, [cutoff_at]
+                    )
+                self.stdout.write(f"Moved {stray_rows} row(s) older than {cutoff:%Y-%m} from {DEFAULT_PARTITION} to {target}")
+
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Archived {len(expired)} partition(s)."))
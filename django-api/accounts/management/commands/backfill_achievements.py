@@ -0,0 +1,124 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+
+from accounts.achievement_engine import backfill_users, get_rule_index
+from accounts.models import UserProfile
+
+
+def _backfill_range(start, stop):
+    """Backfill the users whose profile id is in ``[start, stop)``; runs in a worker process."""
+    user_ids = list(UserProfile.objects.filter(id__gte=start, id__lt=stop).values_list("user_id", flat=True))
+    return start, len(user_ids), backfill_users(user_ids)
+
+
+class Checkpoint:
+    """Profile-id ranges already backfilled, persisted as JSON so an interrupted run can resume."""
+
+    def __init__(self, path, batch_size, reset=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.done = set()
+        if path and not reset and os.path.exists(path):
+            with open(path) as fh:
+                state = json.load(fh)
+            if state.get("batch_size") != batch_size:
+                raise CommandError(
+                    f"Checkpoint {path} was written with --batch-size {state.get('batch_size')}; "
+                    "use the same batch size or pass --reset."
+                )
+            self.done = set(state.get("done", []))
+
+    def mark(self, start):
+        self.done.add(start)
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump({"batch_size": self.batch_size, "done": sorted(self.done)}, fh)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class Command(BaseCommand):
+    help = "Compute achievement progress for every user and upsert the UserAchievement rows that changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Profiles per chunk, by id range (default: 2000).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes; each takes whole id-range chunks (default: 1).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="",
+            help="JSON file recording finished chunks; a re-run with the same file skips them.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Ignore an existing checkpoint and start over.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size: int = options["batch_size"]
+        workers: int = options["workers"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        if not get_rule_index().rules:
+            self.stdout.write(self.style.WARNING("No achievement rules defined; nothing to backfill."))
+            return
+
+        bounds = UserProfile.objects.aggregate(lo=Min("id"), hi=Max("id"))
+        if bounds["lo"] is None:
+            self.stdout.write(self.style.SUCCESS("No users to backfill."))
+            return
+
+        checkpoint = Checkpoint(options["checkpoint"], batch_size, reset=options["reset"])
+        chunks = [
+            (start, start + batch_size)
+            for start in range(bounds["lo"], bounds["hi"] + 1, batch_size)
+            if start not in checkpoint.done
+        ]
+        if checkpoint.done:
+            self.stdout.write(f"Resuming: {len(checkpoint.done)} chunk(s) already done, {len(chunks)} left.")
+
+        users = written = 0
+        if workers > 1:
+            # Children are forked and must not share the parent's database connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+            with pool:
+                futures = [pool.submit(_backfill_range, start, stop) for start, stop in chunks]
+                for future in as_completed(futures):
+                    start, chunk_users, chunk_written = future.result()
+                    checkpoint.mark(start)
+                    users += chunk_users
+                    written += chunk_written
+                    self.stdout.write(f"Chunk {start}: {chunk_users} user(s), {chunk_written} row(s) written")
+        else:
+            for start, stop in chunks:
+                _, chunk_users, chunk_written = _backfill_range(start, stop)
+                checkpoint.mark(start)
+                users += chunk_users
+                written += chunk_written
+                self.stdout.write(f"Chunk {start}: {chunk_users} user(s), {chunk_written} row(s) written")
+
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {users} user(s); {written} achievement row(s) written."))
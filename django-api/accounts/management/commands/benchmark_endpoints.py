@@ -0,0 +1,156 @@
+import json
+import os
+import platform
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from accounts.benchmark import (
+    SCENARIOS,
+    BenchmarkContext,
+    check_budgets,
+    load_budgets,
+    route_names,
+    run_scenario,
+    warm_up,
+)
+from accounts.load_data import build_catalog, generate_chunk
+
+PASSWORD = "loadtest123"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every accounts route against generated datasets of increasing size in a throwaway "
+        "test database, and compare latency, query counts, rows and memory with the checked-in budgets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="200,2000",
+            help="Comma-separated user counts; the dataset grows to each in turn (default: 200,2000).",
+        )
+        parser.add_argument("--repeat", type=int, default=20, help="Measured requests per route and size (default: 20).")
+        parser.add_argument("--seed", type=int, default=42, help="Dataset seed (default: 42).")
+        parser.add_argument(
+            "--budgets",
+            default=os.path.join(settings.BASE_DIR, "benchmarks", "budgets.json"),
+            help="Budgets file (default: benchmarks/budgets.json).",
+        )
+        parser.add_argument("--output", default="", help="Write the results and failures as JSON to this file.")
+        parser.add_argument(
+            "--routes",
+            default="",
+            help="Comma-separated route names to run (default: all).",
+        )
+        parser.add_argument(
+            "--no-latency",
+            action="store_true",
+            help="Do not fail on latency budgets (for shared or noisy machines); queries, rows and memory still count.",
+        )
+        parser.add_argument(
+            "--no-fail",
+            action="store_true",
+            help="Report budget failures without a non-zero exit status.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(s) for s in options["sizes"].split(",") if s.strip()})
+        except ValueError as exc:
+            raise CommandError(f"Invalid --sizes: {exc}") from exc
+        if not sizes or sizes[0] <= 0:
+            raise CommandError("--sizes needs at least one positive user count.")
+        repeat: int = max(1, options["repeat"])
+        budgets = load_budgets(options["budgets"])
+
+        scenarios = {scenario.name: scenario for scenario in SCENARIOS}
+        missing = [name for name in route_names() if name not in scenarios]
+        if missing:
+            raise CommandError(f"No benchmark scenario for route(s): {', '.join(missing)}. Add them to accounts/benchmark.py.")
+        selected = [s for s in options["routes"].split(",") if s] or route_names()
+        unknown = [name for name in selected if name not in scenarios]
+        if unknown:
+            raise CommandError(f"Unknown route(s): {', '.join(unknown)}")
+
+        results = {}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with tempfile.TemporaryDirectory() as pic_root, override_settings(
+                PROFILE_PIC_ROOT=pic_root,
+                PROFILE_PIC_WORKERS=0,
+                ACTIVITY_LOG_BUFFERED=False,
+                REQUEST_METRICS_SAMPLE_RATE=0,
+            ):
+                results = self._run(sizes, repeat, options["seed"], [scenarios[name] for name in selected])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        failures = check_budgets(results, budgets, check_latency=not options["no_latency"])
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(
+                    {
+                        "generated_at": timezone.now().isoformat(),
+                        "database": connection.vendor,
+                        "python": platform.python_version(),
+                        "repeat": repeat,
+                        "results": {str(size): routes for size, routes in results.items()},
+                        "failures": failures,
+                    },
+                    fh,
+                    indent=2,
+                )
+            self.stdout.write(f"Results written to {options['output']}")
+
+        for failure in failures:
+            self.stdout.write(self.style.ERROR(failure))
+        if failures and not options["no_fail"]:
+            raise CommandError(f"{len(failures)} budget failure(s).")
+        if not failures:
+            self.stdout.write(self.style.SUCCESS("All routes within budget."))
+
+    def _run(self, sizes, repeat, seed, scenarios):
+        catalog = build_catalog(seed, 5, 6, 8, 4)
+        as_of = date.today()
+        password = make_password(PASSWORD)
+        results = {}
+        generated = 0
+        ctx = None
+        for size in sizes:
+            generate_chunk(generated, size, seed, catalog, as_of, "load_", password, 50)
+            generated = size
+            call_command("recalculate_ranks", stdout=StringIO())
+            call_command("refresh_activity_rollups", stdout=StringIO())
+            if ctx is None:
+                ctx = BenchmarkContext(catalog, PASSWORD)
+                # One unmeasured pass so state some routes create for others
+                # (a certificate, a bookmark) exists before the first size too.
+                for scenario in scenarios:
+                    warm_up(ctx, scenario)
+
+            self.stdout.write(f"\n{size} users")
+            self.stdout.write(f"  {'route':<32} {'p50 ms':>9} {'p99 ms':>9} {'queries':>8} {'rows':>8} {'peak KiB':>9}  status")
+            routes = {}
+            for scenario in scenarios:
+                metrics = run_scenario(ctx, scenario, repeat)
+                routes[scenario.name] = metrics
+                rows = "-" if metrics["rows"] is None else metrics["rows"]
+                self.stdout.write(
+                    f"  {scenario.name:<32} {metrics['p50_ms']:>9.2f} {metrics['p99_ms']:>9.2f} {metrics['queries']:>8} "
+                    f"{rows:>8} {metrics['peak_kib']:>9.1f}  {','.join(map(str, metrics['statuses']))}"
+                )
+            results[size] = routes
+        return results
+
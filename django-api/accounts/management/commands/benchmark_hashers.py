@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _hash_for(hasher, seconds):
+    """Hash repeatedly for ``seconds``; returns how many hashes were computed."""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    salt = hasher.salt()
+    while time.perf_counter() < deadline:
+        hasher.encode("benchmark-password", salt)
+        count += 1
+    return count
+
+
+class Command(BaseCommand):
+    help = "Report password hashes/sec per configured hasher on this host, single-threaded and concurrently."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=2.0,
+            help="How long to hash per measurement (default: 2).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.PASSWORD_HASHING_CONCURRENCY,
+            help="Concurrent hashing threads for the second measurement (default: PASSWORD_HASHING_CONCURRENCY).",
+        )
+        parser.add_argument(
+            "--hasher",
+            action="append",
+            default=[],
+            help="Only benchmark this algorithm (e.g. scrypt, argon2, pbkdf2_sha256); may be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        seconds: float = options["seconds"]
+        threads: int = max(1, options["threads"])
+        wanted = set(options["hasher"])
+
+        hashers = [h for h in get_hashers() if not wanted or h.algorithm in wanted]
+        if not hashers:
+            raise CommandError("No configured hasher matches --hasher.")
+
+        self.stdout.write(f"{'hasher':<16} {'params':<40} {'1 thread':>12} {f'{threads} threads':>12}")
+        for hasher in hashers:
+            try:
+                hasher.encode("warm-up", hasher.salt())
+            except ValueError as exc:
+                self.stdout.write(self.style.WARNING(f"{hasher.algorithm:<16} skipped: {exc}"))
+                continue
+
+            params = ", ".join(
+                f"{name}={getattr(hasher, name)}"
+                for name in ("iterations", "work_factor", "block_size", "time_cost", "memory_cost", "parallelism")
+                if hasattr(hasher, name)
+            )
+            single = _hash_for(hasher, seconds) / seconds
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                counts = list(pool.map(_hash_for, [hasher] * threads, [seconds] * threads))
+            concurrent = sum(counts) / seconds
+            self.stdout.write(f"{hasher.algorithm:<16} {params:<40} {single:>10.1f}/s {concurrent:>10.1f}/s")
+
+        preferred = get_hashers()[0].algorithm
+        self.stdout.write(self.style.SUCCESS(f"New passwords are hashed with {preferred} (PASSWORD_HASHER)."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.scoring import drifted_profiles, expected_score_expression
+
+
+class Command(BaseCommand):
+    help = "Detect (and optionally repair) profiles whose score drifted from their completed courses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite drifted scores from the completed course totals.",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=20,
+            help="How many drifted profiles to list (default: 20).",
+        )
+        parser.add_argument(
+            "--fail-on-drift",
+            action="store_true",
+            help="Exit with an error when drift is found and --repair is not given (useful in cron/CI).",
+        )
+
+    def handle(self, *args, **options):
+        repair: bool = options["repair"]
+        show: int = options["show"]
+
+        drifted = drifted_profiles().select_related("user").order_by("id")
+        count = drifted.count()
+        if not count:
+            self.stdout.write(self.style.SUCCESS("All profile scores are consistent."))
+            return
+
+        for profile in drifted.only("score", "user__user_name")[:show]:
+            self.stdout.write(
+                f"{profile.user.user_name}: stored={profile.score} expected={profile.expected_score}"
+            )
+        if count > show:
+            self.stdout.write(f"... and {count - show} more")
+
+        if repair:
+            with transaction.atomic():
+                repaired = drifted_profiles().update(score=expected_score_expression())
+            self.stdout.write(self.style.SUCCESS(f"Repaired score for {repaired} user(s)."))
+            return
+
+        message = f"{count} profile score(s) drifted; re-run with --repair to fix."
+        if options["fail_on_drift"]:
+            raise CommandError(message)
+        self.stdout.write(self.style.WARNING(message))
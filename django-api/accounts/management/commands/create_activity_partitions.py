@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from accounts.activity import add_months, create_month_partition, is_partitioned, month_start, partition_name
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly partitions of the user activity table (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Make sure partitions exist from the current month through this many months ahead (default: 3).",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned(connection):
+            raise CommandError("The user activity table is not partitioned (PostgreSQL only; see migration 0023).")
+
+        current = month_start(timezone.now())
+        created = 0
+        for offset in range(options["months_ahead"] + 1):
+            month = add_months(current, offset)
+            if create_month_partition(connection, month):
+                created += 1
+                self.stdout.write(f"Created {partition_name(month)}")
+
+        self.stdout.write(self.style.SUCCESS(f"{created} partition(s) created."))
@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts.load_data import build_catalog, generate_chunk
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = "Generate a large, deterministic synthetic dataset (users, progress, bookmarks, activity, certificates) for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000, help="Users to generate (default: 10000).")
+        parser.add_argument("--subjects", type=int, default=10, help="Subjects to generate (default: 10).")
+        parser.add_argument("--courses-per-subject", type=int, default=8, help="Courses per subject (default: 8).")
+        parser.add_argument("--questions-per-course", type=int, default=10, help="Questions per course (default: 10).")
+        parser.add_argument("--options-per-question", type=int, default=4, help="Options per question (default: 4).")
+        parser.add_argument(
+            "--max-activity",
+            type=int,
+            default=200,
+            help="Cap on generated logins per user; the per-user count is heavy-tailed (default: 200).",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed gives the same data (default: 42).")
+        parser.add_argument(
+            "--as-of",
+            default="",
+            help="Date (YYYY-MM-DD) the generated history ends on; fix it to reproduce a dataset exactly (default: today).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="load_",
+            help="User name prefix; user i is <prefix><i> with email <prefix><i>@load.test (default: load_).",
+        )
+        parser.add_argument(
+            "--password",
+            default="loadtest123",
+            help="Password shared by every generated user (default: loadtest123).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Users per chunk and transaction (default: 10000).")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes generating chunks in parallel (default: CPU count).",
+        )
+        parser.add_argument(
+            "--skip-ranks",
+            action="store_true",
+            help="Do not run recalculate_ranks afterwards.",
+        )
+
+    def handle(self, *args, **options):
+        users: int = options["users"]
+        chunk_size: int = options["chunk_size"]
+        workers: int = max(1, options["workers"])
+        seed: int = options["seed"]
+        prefix: str = options["prefix"]
+        if users < 0 or chunk_size <= 0:
+            raise CommandError("--users must be >= 0 and --chunk-size positive.")
+        if min(options["subjects"], options["courses_per_subject"], options["options_per_question"]) <= 0:
+            raise CommandError("--subjects, --courses-per-subject and --options-per-question must be positive.")
+        try:
+            as_of = date.fromisoformat(options["as_of"]) if options["as_of"] else date.today()
+        except ValueError as exc:
+            raise CommandError(f"Invalid --as-of: {exc}") from exc
+        if workers > 1 and connections["default"].vendor == "sqlite":
+            self.stdout.write(self.style.WARNING("SQLite allows one writer at a time; using a single worker."))
+            workers = 1
+        if User.objects.filter(user_name__startswith=prefix).exists():
+            raise CommandError(f"Users named {prefix}* already exist; use another --prefix.")
+
+        started = time.monotonic()
+        catalog = build_catalog(
+            seed,
+            options["subjects"],
+            options["courses_per_subject"],
+            options["questions_per_course"],
+            options["options_per_question"],
+        )
+        self.stdout.write(
+            f"Catalog: {len(catalog.subjects)} subject(s), {len(catalog.courses)} course(s) in {time.monotonic() - started:.1f}s"
+        )
+
+        password = make_password(options["password"])
+        args = (seed, catalog, as_of, prefix, password, options["max_activity"])
+        chunks = [(start, min(start + chunk_size, users)) for start in range(0, users, chunk_size)]
+        totals = {}
+        done = 0
+
+        def record(start, stop, counts):
+            nonlocal done
+            done += stop - start
+            for table, count in counts.items():
+                totals[table] = totals.get(table, 0) + count
+            rate = done / max(time.monotonic() - started, 1e-9)
+            self.stdout.write(f"Users {start}-{stop - 1}: {sum(counts.values())} row(s); {done}/{users} users, {rate:.0f} users/s")
+
+        if workers > 1 and len(chunks) > 1:
+            # Children are forked and must not share the parent's database connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+            with pool:
+                futures = {pool.submit(generate_chunk, start, stop, *args): (start, stop) for start, stop in chunks}
+                for future in as_completed(futures):
+                    record(*futures[future], future.result())
+        else:
+            for start, stop in chunks:
+                record(start, stop, generate_chunk(start, stop, *args))
+
+        for table, count in sorted(totals.items()):
+            self.stdout.write(f"  {table:<32} {count:>12}")
+        if not options["skip_ranks"]:
+            call_command("recalculate_ranks", stdout=self.stdout)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated {sum(totals.values())} row(s) for {users} user(s) in {elapsed:.1f}s.")
+        )
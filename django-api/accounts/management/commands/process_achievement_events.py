@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.events import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Apply queued achievement events from the outbox (ACHIEVEMENT_EVENTS_BACKEND=outbox)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Events claimed per transaction (default: 500).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new events instead of exiting once the outbox is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep between polls when the outbox is empty with --loop (default: 1).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size: int = options["batch_size"]
+        total = 0
+        while True:
+            processed = process_outbox(batch_size)
+            total += processed
+            if processed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} achievement event(s)."))
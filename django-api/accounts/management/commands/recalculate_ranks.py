@@ -1,23 +1,59 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import DenseRank, Rank, RowNumber
 
-from accounts.models import User
+from accounts.models import UserProfile
+
+TIE_MODES = {
+    # 1, 2, 3, 4 - ties broken by the previous rank, then user_name.
+    "ordinal": RowNumber,
+    # 1, 2, 2, 3 - equal scores share a rank, no gaps.
+    "dense": DenseRank,
+    # 1, 2, 2, 4 - equal scores share a rank, gaps after ties.
+    "competition": Rank,
+}
 
 
 class Command(BaseCommand):
     help = "Assign leaderboard ranks based on profile scores (descending)."
 
-    def handle(self, *args, **options):
-        users = (
-            User.objects.select_related("profile")
-            .order_by("-profile__score", "profile__rank", "user_name")
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tie-mode",
+            choices=sorted(TIE_MODES),
+            default="ordinal",
+            help="How equal scores are ranked (default: ordinal).",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk UPDATE (default: 5000).",
+        )
+
+    def handle(self, *args, **options):
+        tie_mode: str = options["tie_mode"]
+        batch_size: int = max(1, options["batch_size"])
+
+        order_by = [F("score").desc()]
+        if tie_mode == "ordinal":
+            order_by += [F("rank").asc(), F("user__user_name").asc()]
+
+        # Runs every minute; only profiles whose rank moved are fetched and written.
+        ranked = UserProfile.objects.annotate(
+            new_rank=Window(expression=TIE_MODES[tie_mode](), order_by=order_by)
+        ).exclude(rank=F("new_rank"))
 
         updated = 0
-        for idx, user in enumerate(users, start=1):
-            profile = user.profile
-            if profile.rank != idx:
-                profile.rank = idx
-                profile.save(update_fields=["rank"])
-                updated += 1
+        batch = []
+        with transaction.atomic():
+            for pk, new_rank in ranked.values_list("id", "new_rank").iterator(chunk_size=batch_size):
+                batch.append(UserProfile(id=pk, rank=new_rank))
+                if len(batch) >= batch_size:
+                    updated += UserProfile.objects.bulk_update(batch, ["rank"])
+                    batch = []
+            if batch:
+                updated += UserProfile.objects.bulk_update(batch, ["rank"])
 
         self.stdout.write(self.style.SUCCESS(f"Updated rank for {updated} user(s)."))
@@ -1,30 +1,60 @@
 from django.core.management.base import BaseCommand
-from django.db.models import IntegerField, Sum
-from django.db.models.functions import Cast
+from django.db import transaction
+from django.db.models import Max, Min
 
-from accounts.models import UserCourse, User
+from accounts.models import UserProfile
+from accounts.scoring import drifted_profiles, expected_score_expression
 
 
 class Command(BaseCommand):
     help = "Recalculate each user's profile.score from their completed courses."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Profiles per UPDATE statement, by id range (default: 10000; 0 updates the whole table at once).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the profiles whose score would change.",
+        )
+        parser.add_argument(
+            "--progress",
+            action="store_true",
+            help="Report progress after every batch.",
+        )
+
     def handle(self, *args, **options):
-        users = User.objects.select_related("profile")
+        batch_size: int = options["batch_size"]
+        dry_run: bool = options["dry_run"]
+        progress: bool = options["progress"]
+
+        bounds = UserProfile.objects.aggregate(lo=Min("id"), hi=Max("id"))
+        if bounds["lo"] is None:
+            self.stdout.write(self.style.SUCCESS("No profiles to update."))
+            return
+
+        lo, hi = bounds["lo"], bounds["hi"]
+        step = batch_size if batch_size > 0 else hi - lo + 1
+        expected = expected_score_expression()
         updated = 0
 
-        for user in users:
-            total = (
-                UserCourse.objects.filter(UserID=user, CourseFlag="completed")
-                .annotate(score_int=Cast("CourseScore", IntegerField()))
-                .aggregate(total_score=Sum("score_int"))
-                .get("total_score")
-            )
-
-            total_score = total or 0
-
-            if user.profile.score != total_score:
-                user.profile.score = total_score
-                user.profile.save(update_fields=["score"])
-                updated += 1
-
-        self.stdout.write(self.style.SUCCESS(f"Updated scores for {updated} user(s)."))
+        for start in range(lo, hi + 1, step):
+            stale = drifted_profiles(UserProfile.objects.filter(id__gte=start, id__lt=start + step))
+            if dry_run:
+                updated += stale.count()
+            else:
+                with transaction.atomic():
+                    updated += stale.update(score=expected)
+
+            if progress:
+                done = min(start + step, hi + 1) - lo
+                self.stdout.write(f"Processed id range {done}/{hi - lo + 1} ({updated} changed so far)")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"Dry run: {updated} user(s) would have their score updated."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Updated scores for {updated} user(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from accounts.analytics import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Refresh the daily activity and course submission rollups from the activity log."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            default="",
+            help="Recompute from this date (YYYY-MM-DD) instead of resuming at the last rolled-up day.",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be a date (YYYY-MM-DD).")
+
+        days = refresh_rollups(since)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed rollups for {days} day(s)."))
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-from io import StringIO
+import time
 from pathlib import Path
 
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db import connection, transaction
 
+from accounts.catalog import bump_catalog_version
 from accounts.models import Course, Option, Question, Subject
+from accounts.seeding import is_incomplete, load, mark_complete, mark_incomplete, plan_sql_file
 
 
 class Command(BaseCommand):
@@ -23,12 +26,21 @@ class Command(BaseCommand):
             default="/sqls",
             help="Directory containing seed SQL files (default: /sqls).",
         )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=4,
+            help="Tables loaded and indexed concurrently, each over its own connection (default: 4).",
+        )
 
     def handle(self, *args, **options):
         force: bool = options["force"]
+        jobs: int = max(1, options["jobs"])
         sql_dir = Path(options["sql_dir"]).resolve()
 
-        if not force and (Subject.objects.exists() or Course.objects.exists() or Question.objects.exists() or Option.objects.exists()):
+        if is_incomplete():
+            self.stdout.write(self.style.WARNING("A previous seed did not finish; seeding again."))
+        elif not force and (Subject.objects.exists() or Course.objects.exists() or Question.objects.exists() or Option.objects.exists()):
             self.stdout.write(self.style.WARNING("Seed data appears to exist; skipping (use --force to re-run)."))
             return
 
@@ -54,69 +66,35 @@ class Command(BaseCommand):
 
         self.stdout.write(f"Seeding from: {', '.join([p.name for p in sql_files])}")
 
-        with transaction.atomic():
-            with connection.cursor() as cursor:
-                if using_db_seed:
-                    self.stdout.write("Resetting public schema before applying db_seed.sql")
-                    cursor.execute("DROP SCHEMA IF EXISTS public CASCADE;")
-                    cursor.execute("CREATE SCHEMA public AUTHORIZATION CURRENT_USER;")
-                    cursor.execute("GRANT ALL ON SCHEMA public TO CURRENT_USER;")
-                    cursor.execute("GRANT ALL ON SCHEMA public TO public;")
-                    cursor.execute("COMMENT ON SCHEMA public IS 'standard public schema';")
-
-                for sql_path in sql_files:
-                    self._execute_sql_file(cursor, sql_path)
-
-        self.stdout.write(self.style.SUCCESS("Database seed completed."))
-
-    def _execute_sql_file(self, cursor, sql_path: Path) -> None:
-        copy_sql: str | None = None
-        copy_buffer: list[str] = []
-        statement_buffer: list[str] = []
-
-        with sql_path.open(encoding="utf-8") as sql_file:
-            for raw_line in sql_file:
-                line = raw_line.rstrip("\n")
-
-                if copy_sql is not None:
-                    if line == r"\.":
-                        data_stream = StringIO("".join(copy_buffer))
-                        cursor.copy_expert(copy_sql, data_stream)
-                        copy_sql = None
-                        copy_buffer = []
-                    else:
-                        copy_buffer.append(raw_line)
-                    continue
-
-                statement_buffer.append(raw_line)
-                stripped = line.strip()
-
-                if not stripped or stripped.startswith("--"):
-                    continue
-
-                if ";" not in line:
-                    continue
-
-                statement = "".join(statement_buffer).strip()
-                statement_buffer = []
-
-                if not statement:
-                    continue
-
-                clean_lines = [ln for ln in statement.splitlines() if not ln.strip().startswith("--")]
-                clean_statement = "\n".join(clean_lines).strip()
-
-                if not clean_statement:
-                    continue
-
-                upper_stmt = clean_statement.upper()
-                if upper_stmt.startswith("COPY ") and "FROM STDIN" in upper_stmt:
-                    copy_sql = clean_statement
-                    copy_buffer = []
-                    continue
-
-                cursor.execute(clean_statement)
-
-            trailing = "\n".join([ln for ln in "".join(statement_buffer).splitlines() if not ln.strip().startswith("--")]).strip()
-            if trailing:
-                cursor.execute(trailing)
+        started = time.monotonic()
+        # The reset and the marker commit together, so an interrupted run is always detected.
+        with transaction.atomic(), connection.cursor() as cursor:
+            if using_db_seed:
+                self.stdout.write("Resetting public schema before applying db_seed.sql")
+                cursor.execute("DROP SCHEMA IF EXISTS public CASCADE;")
+                cursor.execute("CREATE SCHEMA public AUTHORIZATION CURRENT_USER;")
+                cursor.execute("GRANT ALL ON SCHEMA public TO CURRENT_USER;")
+                cursor.execute("GRANT ALL ON SCHEMA public TO public;")
+                cursor.execute("COMMENT ON SCHEMA public IS 'standard public schema';")
+            mark_incomplete(cursor)
+
+        for sql_path in sql_files:
+            plan = plan_sql_file(sql_path)
+            self.stdout.write(
+                f"{sql_path.name}: {len(plan.pre_data)} schema statement(s), {len(plan.copies)} COPY block(s), "
+                f"{sum(len(s) for s in plan.post_data.values()) + len(plan.foreign_keys)} index/constraint statement(s)"
+            )
+            load(sql_path, plan, jobs=jobs, on_phase=self._report_phase, on_table=self._report_table)
+        mark_complete()
+        # The schema reset dropped the cache table, and the load sent no model signals.
+        call_command("createcachetable")
+        bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(f"Database seed completed in {time.monotonic() - started:.2f}s."))
+
+    def _report_table(self, phase: str, table: str, count: int, seconds: float) -> None:
+        unit = "rows" if phase == "data" else "statements"
+        self.stdout.write(f"  {phase:<9} {table or '-':<45} {count:>9} {unit:<10} {seconds:7.2f}s")
+
+    def _report_phase(self, phase: str, seconds: float) -> None:
+        self.stdout.write(f"{phase} done in {seconds:.2f}s")
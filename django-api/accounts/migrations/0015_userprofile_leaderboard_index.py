@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_usercertificate_subject_alter_usercertificate_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-score', 'rank'], name='accounts_profile_board_idx'),
+        ),
+    ]
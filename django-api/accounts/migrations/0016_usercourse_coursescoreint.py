@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_userprofile_leaderboard_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercourse',
+            name='CourseScoreInt',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+
+def _parse_score(raw):
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _batches(UserCourse, fields):
+    last_id = 0
+    while True:
+        rows = list(
+            UserCourse.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', *fields)[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def forwards(apps, schema_editor):
+    UserCourse = apps.get_model('accounts', 'UserCourse')
+    alias = schema_editor.connection.alias
+    for rows in _batches(UserCourse, ['CourseScore']):
+        updates = [UserCourse(id=pk, CourseScoreInt=_parse_score(raw)) for pk, raw in rows]
+        with transaction.atomic(using=alias):
+            UserCourse.objects.bulk_update(updates, ['CourseScoreInt'])
+
+
+def backwards(apps, schema_editor):
+    UserCourse = apps.get_model('accounts', 'UserCourse')
+    alias = schema_editor.connection.alias
+    for rows in _batches(UserCourse, ['CourseScoreInt']):
+        updates = [UserCourse(id=pk, CourseScore=str(value)) for pk, value in rows]
+        with transaction.atomic(using=alias):
+            UserCourse.objects.bulk_update(updates, ['CourseScore'])
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so the backfill never holds one huge transaction.
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0016_usercourse_coursescoreint'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_backfill_usercourse_coursescoreint'),
+    ]
+
+    operations = [
+        # Give the legacy column a default first so the removal can be reversed.
+        migrations.AlterField(
+            model_name='usercourse',
+            name='CourseScore',
+            field=models.CharField(default='0', max_length=255),
+        ),
+        migrations.RemoveField(
+            model_name='usercourse',
+            name='CourseScore',
+        ),
+        migrations.RenameField(
+            model_name='usercourse',
+            old_name='CourseScoreInt',
+            new_name='CourseScore',
+        ),
+        migrations.AddIndex(
+            model_name='usercourse',
+            index=models.Index(fields=['UserID', 'CourseFlag'], name='accounts_usercourse_flag_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_existing_content(apps, schema_editor):
+    Course = apps.get_model('accounts', 'Course')
+    for course in Course.objects.only('CourseID', 'Content').iterator(chunk_size=100):
+        data = course.Content.encode('utf-8')
+        Course.objects.filter(pk=course.pk).update(
+            ContentHash=hashlib.sha256(data).hexdigest(),
+            ContentSize=len(data),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_usercourse_integer_coursescore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='ContentHash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='ContentSize',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(hash_existing_content, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,142 @@
+"""
+Turn accounts_useractivity into a table range-partitioned by month on
+"timestamp" (PostgreSQL only; other backends keep the plain table).
+
+PostgreSQL requires the partition key in the primary key, so the table's
+primary key becomes (id, timestamp); ids still come from one identity
+sequence and stay unique. Partitions are created for every month that has
+rows up to two months ahead, plus a default partition for anything else.
+
+The migration is not atomic so the live table stays writable while it is
+copied: rows are copied in id batches of BATCH_SIZE, each committed on its
+own. Only the last step locks the old table against writes, copies the rows
+that arrived meanwhile, drops copies of rows whose user was deleted during
+the copy and swaps the tables. An interrupted run drops its half-built copy
+and starts over when the migration is re-run.
+"""
+
+from datetime import date
+
+from django.db import migrations, transaction
+
+TABLE = 'accounts_useractivity'
+NEW_TABLE = 'accounts_useractivity_partitioned'
+COLUMNS = 'id, activity_type, "timestamp", details, user_id'
+BATCH_SIZE = 50000
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _copy(cursor, where, params):
+    cursor.execute(
+        f'INSERT INTO {NEW_TABLE} ({COLUMNS}) OVERRIDING SYSTEM VALUE '
+        f'SELECT {COLUMNS} FROM {TABLE} WHERE {where}',
+        params,
+    )
+
+
+def partition(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT min("timestamp"), now(), COALESCE(max(id), 0) FROM {TABLE}')
+        oldest, now, copy_until = cursor.fetchone()
+    last = _add_months(date(now.year, now.month, 1), 2)
+    month = date(oldest.year, oldest.month, 1) if oldest else date(now.year, now.month, 1)
+
+    schema_editor.execute(f'DROP TABLE IF EXISTS {NEW_TABLE} CASCADE')
+    schema_editor.execute(
+        f"""
+        CREATE TABLE {NEW_TABLE} (
+            id bigint GENERATED BY DEFAULT AS IDENTITY,
+            activity_type varchar(50) NOT NULL,
+            "timestamp" timestamp with time zone NOT NULL,
+            details text NULL,
+            user_id uuid NOT NULL,
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+        """
+    )
+    schema_editor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {NEW_TABLE} DEFAULT')
+    while month <= last:
+        upper = _add_months(month, 1)
+        schema_editor.execute(
+            f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {NEW_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+    schema_editor.execute(f'CREATE INDEX {NEW_TABLE}_user_id_idx ON {NEW_TABLE} (user_id)')
+
+    # Bulk of the rows: one short transaction per batch, the old table stays writable.
+    copied = 0
+    while copied < copy_until:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            _copy(cursor, 'id > %s AND id <= %s', [copied, copied + BATCH_SIZE])
+        copied += BATCH_SIZE
+
+    # Rows written during the copy, then the swap, with writes blocked (reads still work).
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {TABLE} IN SHARE ROW EXCLUSIVE MODE')
+        _copy(cursor, 'id > %s', [copied])
+        cursor.execute(
+            f'DELETE FROM {NEW_TABLE} activity WHERE NOT EXISTS '
+            f'(SELECT 1 FROM accounts_user u WHERE u."userID" = activity.user_id)'
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{NEW_TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {NEW_TABLE}"
+        )
+        cursor.execute(f'DROP TABLE {TABLE}')
+        cursor.execute(f'ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}')
+        cursor.execute(f'ALTER INDEX {NEW_TABLE}_user_id_idx RENAME TO {TABLE}_user_id_idx')
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_user_id_fk FOREIGN KEY (user_id) '
+            f'REFERENCES accounts_user ("userID") DEFERRABLE INITIALLY DEFERRED'
+        )
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        f"""
+        CREATE TABLE {NEW_TABLE} (
+            id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            activity_type varchar(50) NOT NULL,
+            "timestamp" timestamp with time zone NOT NULL,
+            details text NULL,
+            user_id uuid NOT NULL
+        )
+        """
+    )
+    schema_editor.execute(
+        f'INSERT INTO {NEW_TABLE} ({COLUMNS}) OVERRIDING SYSTEM VALUE SELECT {COLUMNS} FROM {TABLE}'
+    )
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{NEW_TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {NEW_TABLE}"
+    )
+    schema_editor.execute(f'DROP TABLE {TABLE} CASCADE')
+    schema_editor.execute(f'ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}')
+    schema_editor.execute(f'CREATE INDEX {TABLE}_user_id_idx ON {TABLE} (user_id)')
+    schema_editor.execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_user_id_fk FOREIGN KEY (user_id) '
+        f'REFERENCES accounts_user ("userID") DEFERRABLE INITIALLY DEFERRED'
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0022_useractivity_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_partition_useractivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSubmissionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('course_id', models.IntegerField()),
+                ('submissions', models.IntegerField(default=0)),
+                ('users', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('active_users', models.IntegerField(default=0)),
+                ('logins', models.IntegerField(default=0)),
+                ('registrations', models.IntegerField(default=0)),
+                ('submissions', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='useractivity',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='useractivity',
+            name='activity_type',
+            field=models.CharField(choices=[('LOGIN', 'Login'), ('LOGOUT', 'Logout'), ('REGISTRATION', 'Registration'), ('SCORE_UPDATE', 'Score Update'), ('COURSE_SUBMISSION', 'Course Submission'), ('BOOKMARK', 'Bookmark'), ('PASSWORD_RESET', 'Password Reset')], max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['user', '-timestamp'], name='accounts_activity_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['activity_type', 'timestamp'], name='accounts_activity_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursesubmissionrollup',
+            index=models.Index(fields=['course_id', 'day'], name='accounts_course_rollup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='coursesubmissionrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'course_id'), name='unique_course_submission_rollup_day'),
+        ),
+    ]
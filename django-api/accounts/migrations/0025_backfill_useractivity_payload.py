@@ -0,0 +1,104 @@
+"""
+Move the formatted ``details`` strings into the structured ``payload`` and
+give the events that used to borrow other types their own type: course
+submissions and bookmarks were logged as SCORE_UPDATE, password resets as
+LOGIN. Unrecognised details are kept as ``{"message": ...}``.
+"""
+
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+SUBMISSION = re.compile(r'^Course (\d+) submitted: (\d+)/(\d+) \(improved=(True|False)\)$')
+BOOKMARK = re.compile(r'^Bookmarked subject set: (\d+)$')
+PASSWORD_RESET = 'Password reset (mock)'
+
+
+def _convert(activity_type, details):
+    if not details:
+        return activity_type, {}
+    match = SUBMISSION.match(details)
+    if match:
+        course_id, correct, total, improved = match.groups()
+        return 'COURSE_SUBMISSION', {
+            'course_id': int(course_id),
+            'correct': int(correct),
+            'total': int(total),
+            'improved': improved == 'True',
+        }
+    match = BOOKMARK.match(details)
+    if match:
+        return 'BOOKMARK', {'subject_id': int(match.group(1))}
+    if details == PASSWORD_RESET:
+        return 'PASSWORD_RESET', {}
+    return activity_type, {'message': details}
+
+
+def _restore(activity_type, payload):
+    if activity_type == 'COURSE_SUBMISSION':
+        return 'SCORE_UPDATE', (
+            f"Course {payload.get('course_id')} submitted: {payload.get('correct')}/{payload.get('total')} "
+            f"(improved={payload.get('improved')})"
+        )
+    if activity_type == 'BOOKMARK':
+        return 'SCORE_UPDATE', f"Bookmarked subject set: {payload.get('subject_id')}"
+    if activity_type == 'PASSWORD_RESET':
+        return 'LOGIN', PASSWORD_RESET
+    return activity_type, payload.get('message')
+
+
+def _rewrite(queryset, fields, convert):
+    """Apply ``convert`` to the rows of ``queryset`` in id batches, writing only rows it changed."""
+    last_id = 0
+    while True:
+        rows = queryset.filter(id__gt=last_id).order_by('id').only('id', 'activity_type', 'details', 'payload')
+        batch = list(rows[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        changed = []
+        for row in batch:
+            before = [getattr(row, field) for field in fields]
+            convert(row)
+            if [getattr(row, field) for field in fields] != before:
+                changed.append(row)
+        if changed:
+            queryset.model.objects.bulk_update(changed, fields)
+
+
+def forwards(apps, schema_editor):
+    UserActivity = apps.get_model('accounts', 'UserActivity')
+
+    def convert(row):
+        row.activity_type, row.payload = _convert(row.activity_type, row.details)
+
+    # Rows without details have nothing to move, and rows whose payload is
+    # already set were migrated by an earlier, interrupted run.
+    pending = UserActivity.objects.exclude(details__isnull=True).exclude(details='').filter(payload={})
+    _rewrite(pending, ['activity_type', 'payload'], convert)
+
+
+def backwards(apps, schema_editor):
+    UserActivity = apps.get_model('accounts', 'UserActivity')
+
+    def convert(row):
+        row.activity_type, row.details = _restore(row.activity_type, row.payload or {})
+
+    converted = UserActivity.objects.exclude(payload={}) | UserActivity.objects.filter(
+        activity_type__in=['COURSE_SUBMISSION', 'BOOKMARK', 'PASSWORD_RESET']
+    )
+    _rewrite(converted, ['activity_type', 'details'], convert)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0024_useractivity_payload_indexes_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0025_backfill_useractivity_payload'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='useractivity',
+            name='details',
+        ),
+    ]
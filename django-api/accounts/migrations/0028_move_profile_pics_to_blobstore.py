@@ -0,0 +1,62 @@
+"""
+Stream ``UserProfile.profile_pic`` blobs out of the database into the
+profile picture store (``PROFILE_PIC_ROOT``), a batch of profiles at a time,
+and record their content hash. Only the originals are written; thumbnails
+are generated on first request. Backwards reads the files back into the
+column.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations
+
+from accounts.blobstore import BlobStore
+
+BATCH_SIZE = 100
+ORIGINAL = '.orig'
+
+
+def forwards(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    store = BlobStore(settings.PROFILE_PIC_ROOT)
+    pending = UserProfile.objects.filter(profile_pic__isnull=False, profile_pic_hash__isnull=True)
+    last_id = 0
+    while True:
+        ids = list(pending.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        last_id = ids[-1]
+        # Only this batch's blobs are held in memory at once.
+        for profile_id, data in UserProfile.objects.filter(id__in=ids).values_list('id', 'profile_pic').iterator():
+            data = bytes(data)
+            if not data:
+                UserProfile.objects.filter(id=profile_id).update(profile_pic=None)
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            if not store.exists(digest, ORIGINAL):
+                store.write(digest, ORIGINAL, [data])
+            UserProfile.objects.filter(id=profile_id).update(profile_pic_hash=digest)
+
+
+def backwards(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    store = BlobStore(settings.PROFILE_PIC_ROOT)
+    rows = UserProfile.objects.filter(profile_pic_hash__isnull=False).values_list('id', 'profile_pic_hash')
+    for profile_id, digest in rows.iterator(chunk_size=BATCH_SIZE):
+        if not store.exists(digest, ORIGINAL):
+            continue
+        with store.open(digest, ORIGINAL) as handle:
+            UserProfile.objects.filter(id=profile_id).update(profile_pic=handle.read(), profile_pic_hash=None)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0027_userprofile_profile_pic_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
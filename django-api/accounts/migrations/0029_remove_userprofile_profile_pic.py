@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0028_move_profile_pics_to_blobstore'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='profile_pic',
+        ),
+    ]
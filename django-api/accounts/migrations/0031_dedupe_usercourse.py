@@ -0,0 +1,54 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+COMPLETED = 'completed'
+
+
+def forwards(apps, schema_editor):
+    UserCourse = apps.get_model('accounts', 'UserCourse')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+
+    duplicates = (
+        UserCourse.objects.order_by()
+        .values('CourseID_id', 'UserID_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    affected_users = set()
+    for pair in duplicates.iterator():
+        rows = list(
+            UserCourse.objects.filter(CourseID_id=pair['CourseID_id'], UserID_id=pair['UserID_id']).order_by('id')
+        )
+        completed = [row for row in rows if row.CourseFlag == COMPLETED]
+        keeper = rows[0]
+        # Keep one row per course, with the best completed score if any attempt completed.
+        keeper.CourseScore = max(row.CourseScore for row in (completed or rows))
+        keeper.CourseFlag = COMPLETED if completed else keeper.CourseFlag
+        keeper.save(update_fields=['CourseScore', 'CourseFlag'])
+        UserCourse.objects.filter(pk__in=[row.pk for row in rows[1:]]).delete()
+        affected_users.add(pair['UserID_id'])
+
+    if affected_users:
+        # Concurrent first submissions each added their score to the total.
+        totals = (
+            UserCourse.objects.filter(UserID_id=OuterRef('user_id'), CourseFlag=COMPLETED)
+            .order_by()
+            .values('UserID_id')
+            .annotate(total=Sum('CourseScore'))
+            .values('total')
+        )
+        UserProfile.objects.filter(user_id__in=affected_users).update(
+            score=Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0030_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0031_dedupe_usercourse'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='usercourse',
+            constraint=models.UniqueConstraint(fields=('CourseID', 'UserID'), name='unique_user_course'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import hashlib
 import uuid
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db import models
@@ -5,14 +6,18 @@ from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
-    def create_user(self, user_name, email, password=None, **extra_fields):
+    def create_user(self, user_name, email, password=None, password_hash=None, **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
         if not user_name:
             raise ValueError('The User name field must be set')
         email = self.normalize_email(email)
         user = self.model(user_name=user_name, email=email, **extra_fields)
-        user.set_password(password)
+        if password_hash is not None:
+            # Already hashed by the caller (see RegisterView).
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         # Create profile
         UserProfile.objects.create(user=user)
@@ -53,11 +58,16 @@ class UserProfile(models.Model):
     rank = models.IntegerField(default=99999)
     login_streak_days = models.IntegerField(default=0)
     last_login_date = models.DateField(null=True, blank=True)
-    profile_pic = models.BinaryField(null=True, blank=True)
+    profile_pic_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
     profile_pic_mime = models.CharField(max_length=100, null=True, blank=True)
     bookmarked_subject = models.ForeignKey('Subject', null=True, blank=True, on_delete=models.SET_NULL, related_name='bookmarked_users')
     bookmarked_subject_updated_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', 'rank'], name='accounts_profile_board_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.user_name}'s profile"
 
@@ -68,16 +78,58 @@ class UserActivity(models.Model):
         ('LOGOUT', 'Logout'),
         ('REGISTRATION', 'Registration'),
         ('SCORE_UPDATE', 'Score Update'),
+        ('COURSE_SUBMISSION', 'Course Submission'),
+        ('BOOKMARK', 'Bookmark'),
+        ('PASSWORD_RESET', 'Password Reset'),
     ]
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
     activity_type = models.CharField(max_length=50, choices=ACTIVITY_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True)
-    details = models.TextField(null=True, blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+    payload = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='accounts_activity_user_ts_idx'),
+            models.Index(fields=['activity_type', 'timestamp'], name='accounts_activity_type_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.user_name} - {self.activity_type} at {self.timestamp}"
 
 
+class DailyActivityRollup(models.Model):
+    """Per-day activity totals maintained by ``refresh_activity_rollups``."""
+    day = models.DateField(unique=True)
+    active_users = models.IntegerField(default=0)
+    logins = models.IntegerField(default=0)
+    registrations = models.IntegerField(default=0)
+    submissions = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Activity on {self.day}: {self.active_users} active user(s)"
+
+
+class CourseSubmissionRollup(models.Model):
+    """Per-day, per-course submission totals maintained by ``refresh_activity_rollups``."""
+    day = models.DateField()
+    course_id = models.IntegerField()
+    submissions = models.IntegerField(default=0)
+    users = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'course_id'], name='unique_course_submission_rollup_day'),
+        ]
+        indexes = [
+            models.Index(fields=['course_id', 'day'], name='accounts_course_rollup_idx'),
+        ]
+
+    def __str__(self):
+        return f"Course {self.course_id} on {self.day}: {self.submissions} submission(s)"
+
+
 class Achievement(models.Model):
     key = models.CharField(max_length=64, unique=True)
     category = models.CharField(max_length=32)
@@ -106,6 +158,16 @@ class UserAchievement(models.Model):
         return f"{self.user.user_name} - {self.achievement.key}"
 
 
+class AchievementEvent(models.Model):
+    """Outbox row for ``accounts.events``; deleted once processed."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    trigger = models.CharField(max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.trigger} event for user {self.user_id}"
+
+
 class Subject(models.Model):
     SubjectID = models.AutoField(primary_key=True)
     SubjectName = models.CharField(max_length=255)
@@ -130,6 +192,12 @@ class SubjectBookmark(models.Model):
         return f"{self.user.user_name} bookmarked {self.subject.SubjectName}"
 
 
+class CourseQuerySet(models.QuerySet):
+    def summaries(self):
+        # Content holds whole lesson bodies; list/detail paths never need it.
+        return self.defer('Content')
+
+
 class Course(models.Model):
     CourseID = models.AutoField(primary_key=True)
     SubjectID = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='courses')
@@ -137,6 +205,20 @@ class Course(models.Model):
     CourseDescription = models.TextField()
     CourseDifficulty = models.IntegerField()
     Content = models.TextField(blank=True, default="")
+    ContentHash = models.CharField(max_length=64, blank=True, default="")
+    ContentSize = models.IntegerField(default=0)
+
+    objects = CourseQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        if 'Content' not in self.get_deferred_fields():
+            data = self.Content.encode('utf-8')
+            self.ContentHash = hashlib.sha256(data).hexdigest()
+            self.ContentSize = len(data)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'Content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'ContentHash', 'ContentSize'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.CourseTitle
@@ -145,9 +227,17 @@ class Course(models.Model):
 class UserCourse(models.Model):
     CourseID = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='user_courses')
     UserID = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_courses')
-    CourseScore = models.CharField(max_length=255)
+    CourseScore = models.IntegerField(default=0)
     CourseFlag = models.CharField(max_length=255)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['CourseID', 'UserID'], name='unique_user_course'),
+        ]
+        indexes = [
+            models.Index(fields=['UserID', 'CourseFlag'], name='accounts_usercourse_flag_idx'),
+        ]
+
     def __str__(self):
         return f"{self.UserID.user_name} - {self.CourseID.CourseTitle}"
 
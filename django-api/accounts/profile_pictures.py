@@ -0,0 +1,312 @@
+"""
+Profile pictures stored outside the database.
+
+A picture lives in a content-addressed ``BlobStore`` under
+``PROFILE_PIC_ROOT``; ``UserProfile.profile_pic_hash`` (its SHA-256) is the
+only thing the profile row holds, so loading a profile never pulls image
+bytes. Each picture is kept as uploaded (``<hash>.orig``) plus square-bounded
+thumbnails for every size in ``PROFILE_PIC_THUMBNAIL_SIZES``
+(``<hash>.<size>.jpg``, or ``.png`` for images with transparency).
+
+Uploads are streamed to disk by ``PictureUploadHandler``, capped at
+``PROFILE_PIC_MAX_BYTES`` and sniffed from their magic bytes while they
+arrive; decoding and thumbnail encoding then run in a small process pool
+(``PROFILE_PIC_WORKERS``, see ``accounts/thumbnails.py``) with a
+``PROFILE_PIC_MAX_PIXELS`` limit checked before decoding, so a large photo
+costs the web worker neither its body nor its pixels in memory.
+Thumbnails missing on disk (e.g. after adding a size, or for pictures moved
+out of the database by migration 0028) are generated on first request. A
+stored picture that cannot be decoded (migration 0028 moved whatever bytes
+the old column held) is served as its original instead of a thumbnail.
+
+Because the bytes behind a hash never change, ``/profile-pics/<hash>/`` is
+served with ``Cache-Control: immutable`` and a year-long ``max-age``. Files
+are streamed with ``FileResponse``; when ``PROFILE_PIC_ACCEL_PREFIX`` is set,
+the response instead carries ``X-Accel-Redirect`` so a fronting nginx sends
+the file itself.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from accounts.blobstore import BlobStore
+from accounts.http_cache import etag_matches
+from accounts.models import UserProfile
+from accounts.thumbnails import render_thumbnails
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL = '.orig'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+THUMBNAIL_TYPES = {'.jpg': 'image/jpeg', '.png': 'image/png'}
+SNIFF_BYTES = 12
+# Room for the multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def picture_store():
+    return BlobStore(settings.PROFILE_PIC_ROOT)
+
+
+def thumbnail_sizes():
+    return tuple(settings.PROFILE_PIC_THUMBNAIL_SIZES)
+
+
+def thumbnail_suffixes(size):
+    return [f'.{size}{ext}' for ext in THUMBNAIL_TYPES]
+
+
+def sniff_mime(head):
+    """The image type given away by a file's first ``SNIFF_BYTES`` bytes, or None."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+class InvalidPicture(ValueError):
+    pass
+
+
+class PictureTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'The uploaded picture is too large.'
+    default_code = 'picture_too_large'
+
+
+class UnsupportedPicture(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = 'Upload a JPEG, PNG, GIF or WebP image.'
+    default_code = 'unsupported_picture'
+
+
+class PictureUploadHandler(FileUploadHandler):
+    """
+    Streams the ``file`` field of a multipart upload to a temporary file.
+
+    The body is hashed and size-checked as it arrives and its type is taken
+    from the first bytes, not the client's ``Content-Type``, so an oversized
+    or non-image upload is rejected after at most one chunk and never held
+    in memory. The resulting file carries ``digest`` and the sniffed
+    ``content_type``.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.PROFILE_PIC_MAX_BYTES
+        self.picture = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            raise PictureTooLarge()
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        if field_name != 'file':
+            raise SkipFile()
+        self.picture = TemporaryUploadedFile(self.file_name, 'application/octet-stream', 0, None, self.content_type_extra)
+        self.hasher = hashlib.sha256()
+        self.head = b''
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self._discard()
+            raise PictureTooLarge()
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[: SNIFF_BYTES - len(self.head)]
+            if len(self.head) == SNIFF_BYTES and sniff_mime(self.head) is None:
+                self._discard()
+                raise UnsupportedPicture()
+        self.hasher.update(raw_data)
+        self.picture.write(raw_data)
+
+    def file_complete(self, file_size):
+        mime = sniff_mime(self.head)
+        if mime is None:
+            self._discard()
+            raise UnsupportedPicture()
+        picture = self.picture
+        picture.flush()
+        picture.seek(0)
+        picture.size = file_size
+        picture.content_type = mime
+        picture.digest = self.hasher.hexdigest()
+        return picture
+
+    def _discard(self):
+        self.picture.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """The rendering pool of this process (None when ``PROFILE_PIC_WORKERS`` is 0)."""
+    global _pool
+    if settings.PROFILE_PIC_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool[0] != os.getpid():
+            # Spawned (not forked) workers start without the web worker's
+            # memory, and are replaced after PROFILE_PIC_WORKER_MAX_TASKS
+            # images so one huge decode does not keep them large.
+            executor = ProcessPoolExecutor(
+                max_workers=settings.PROFILE_PIC_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                max_tasks_per_child=settings.PROFILE_PIC_WORKER_MAX_TASKS or None,
+            )
+            _pool = (os.getpid(), executor)
+        return _pool[1]
+
+
+def _discard_pool(executor):
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[1] is executor:
+            _pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _render(path, sizes):
+    """Render thumbnails of the image at ``path`` in the worker pool; raises ``InvalidPicture``."""
+    args = (str(path), tuple(sizes), settings.PROFILE_PIC_MAX_PIXELS)
+    pool = _get_pool()
+    try:
+        if pool is None:
+            return render_thumbnails(*args)
+        return pool.submit(render_thumbnails, *args).result()
+    except ValueError as exc:
+        raise InvalidPicture(str(exc)) from exc
+    except BrokenProcessPool as exc:
+        # A worker died mid-decode (typically killed for running out of memory).
+        _discard_pool(pool)
+        raise InvalidPicture('The image could not be decoded.') from exc
+
+
+def _missing_sizes(store, digest, sizes=None):
+    return [s for s in (sizes or thumbnail_sizes()) if not _find_thumbnail(store, digest, s)]
+
+
+def make_thumbnails(digest, sizes=None):
+    """Write the missing thumbnails of stored picture ``digest``."""
+    store = picture_store()
+    sizes = _missing_sizes(store, digest, sizes)
+    if not sizes:
+        return
+    for suffix, data in _render(store.path(digest, ORIGINAL), sizes):
+        store.write(digest, suffix, [data])
+
+
+def store_upload(upload, profile):
+    """
+    Move a file received by ``PictureUploadHandler`` into the store and make
+    it ``profile``'s picture; returns its hash.
+
+    Thumbnails are rendered first, so an upload that fails to decode raises
+    ``InvalidPicture`` and leaves nothing behind. Storing and saving the
+    profile happen under the digest's lock, so a concurrent
+    ``release_picture`` of the same picture either deletes the files before
+    they are written again here or sees the new reference and keeps them.
+    """
+    store = picture_store()
+    digest = upload.digest
+    with store.lock(digest):
+        if store.exists(digest, ORIGINAL):
+            make_thumbnails(digest)
+        else:
+            for suffix, data in _render(upload.temporary_file_path(), _missing_sizes(store, digest)):
+                store.write(digest, suffix, [data])
+            store.write_file(digest, ORIGINAL, upload.temporary_file_path())
+        profile.profile_pic_hash = digest
+        profile.profile_pic_mime = upload.content_type
+        profile.save(update_fields=['profile_pic_hash', 'profile_pic_mime'])
+    return digest
+
+
+def release_picture(digest):
+    """Delete ``digest``'s files once no profile references it any more."""
+    if not digest:
+        return
+    store = picture_store()
+    with store.lock(digest):
+        if UserProfile.objects.filter(profile_pic_hash=digest).exists():
+            return
+        store.delete(digest, ORIGINAL)
+        for size in thumbnail_sizes():
+            for suffix in thumbnail_suffixes(size):
+                store.delete(digest, suffix)
+
+
+def picture_url(request, digest, size=None):
+    url = reverse('profile_picture', args=[digest])
+    if size is not None:
+        url = f'{url}?size={size}'
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _find_thumbnail(store, digest, size):
+    for suffix in thumbnail_suffixes(size):
+        if store.exists(digest, suffix):
+            return suffix
+    return None
+
+
+def picture_response(request, digest, mime, size=None, cache_control=IMMUTABLE):
+    """
+    Stream stored picture ``digest`` (or its ``size`` thumbnail).
+
+    Returns None when the picture is not in the store.
+    """
+    store = picture_store()
+    if not store.exists(digest, ORIGINAL):
+        return None
+
+    if size is None:
+        suffix, content_type = ORIGINAL, mime or 'application/octet-stream'
+    else:
+        suffix = _find_thumbnail(store, digest, size)
+        if suffix is None:
+            try:
+                make_thumbnails(digest, [size])
+                suffix = _find_thumbnail(store, digest, size)
+            except InvalidPicture:
+                logger.warning('Serving undecodable picture %s without thumbnails', digest)
+        if suffix is None:
+            suffix, content_type = ORIGINAL, mime or 'application/octet-stream'
+        else:
+            content_type = THUMBNAIL_TYPES[suffix[suffix.rindex('.'):]]
+
+    etag = f'"{digest}{suffix}"'
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    elif settings.PROFILE_PIC_ACCEL_PREFIX:
+        relative = store.path(digest, suffix).relative_to(store.root).as_posix()
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.PROFILE_PIC_ACCEL_PREFIX.rstrip('/') + '/' + relative
+    else:
+        response = FileResponse(store.open(digest, suffix), content_type=content_type)
+        response.headers.pop('Content-Disposition', None)
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
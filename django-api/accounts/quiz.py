@@ -0,0 +1,73 @@
+"""
+Whole-course quiz payloads.
+
+A quiz is every question of a course with its options (never
+``CorrectOption``), loaded with one prefetch query and rendered once. The
+rendered body and its ETag are cached per course in the Django cache named
+by ``QUIZ_CACHE_ALIAS``, which must be shared by all worker processes (the
+default ``CACHES`` is) or other workers keep serving a dropped entry.
+``accounts.signals`` drops the entry when one of the course's questions or
+options changes. Keys also carry the catalog version, so anything that bumps
+it (a course edit, ``seed_db``, the load-data generator) drops every quiz at
+once, including after writes that sent no signals. Quizzes are also kept in
+the catalog's process-local layer, so other workers may serve a dropped
+quiz for up to ``CATALOG_LOCAL_TTL`` seconds.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+from accounts.catalog import catalog_version, local_delete, local_get, local_set
+from accounts.http_cache import make_etag, render_json
+from accounts.models import Course, Question
+from accounts.serializers import QuestionDetailSerializer
+
+
+def _cache():
+    return caches[getattr(settings, 'QUIZ_CACHE_ALIAS', 'default')]
+
+
+def _cache_key(course_id):
+    return f'quiz:{catalog_version()}:{course_id}'
+
+
+def build_quiz(course_id):
+    """Render the quiz for ``course_id``; returns ``(body, etag)`` or None if the course is missing."""
+    if not Course.objects.filter(pk=course_id).exists():
+        return None
+
+    questions = (
+        Question.objects.filter(CourseID_id=course_id)
+        .order_by('QuestionID')
+        .prefetch_related('options')
+    )
+    body = render_json(
+        {
+            'course_id': course_id,
+            'questions': QuestionDetailSerializer(questions, many=True).data,
+        }
+    )
+    return body, make_etag(body)
+
+
+def get_quiz(course_id):
+    key = _cache_key(course_id)
+    quiz = local_get(key)
+    if quiz is not None:
+        return quiz
+
+    cache = _cache()
+    quiz = cache.get(key)
+    if quiz is None:
+        quiz = build_quiz(course_id)
+        if quiz is None:
+            return None
+        cache.set(key, quiz, timeout=getattr(settings, 'QUIZ_CACHE_TIMEOUT', 300))
+    local_set(key, quiz)
+    return quiz
+
+
+def invalidate_quiz(course_id):
+    key = _cache_key(course_id)
+    local_delete(key)
+    _cache().delete(key)
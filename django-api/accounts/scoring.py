@@ -0,0 +1,76 @@
+"""
+Course score bookkeeping.
+
+``UserProfile.score`` is the sum of the user's best score on every completed
+course. Instead of re-aggregating ``UserCourse`` on each read, every recorded
+attempt applies the change in that sum as an ``F()`` delta inside the same
+transaction that updates the course row. ``recalculate_scores`` and
+``check_score_consistency`` rebuild the value from scratch when needed.
+"""
+
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounts.models import UserCourse, UserProfile
+
+COMPLETED = 'completed'
+
+
+def expected_score_expression():
+    """Sum of the user's completed course scores, usable against UserProfile rows."""
+    completed_totals = (
+        UserCourse.objects.filter(UserID=OuterRef('user_id'), CourseFlag=COMPLETED)
+        .order_by()
+        .values('UserID')
+        .annotate(total=Sum('CourseScore'))
+        .values('total')
+    )
+    return Coalesce(Subquery(completed_totals, output_field=IntegerField()), Value(0))
+
+
+def drifted_profiles(queryset=None):
+    """Profiles whose stored score differs from their completed course total."""
+    if queryset is None:
+        queryset = UserProfile.objects.all()
+    return queryset.annotate(expected_score=expected_score_expression()).exclude(score=F('expected_score'))
+
+
+def record_course_score(user, course_id, score):
+    """
+    Mark course ``course_id`` completed for ``user`` with ``score`` and keep the best result.
+
+    Returns ``(user_course, improved)`` where ``improved`` is True when an
+    existing attempt was beaten. The profile total moves by the same delta as
+    the course's contribution, atomically with the course row.
+
+    ``select_for_update`` only locks a row that already exists. Two
+    concurrent first submissions are serialized by the ``unique_user_course``
+    constraint instead: the losing insert raises IntegrityError inside
+    ``get_or_create``'s savepoint, which then fetches (and locks) the winner's
+    row, so that submission is applied as a second attempt.
+    """
+    with transaction.atomic():
+        user_course, created = UserCourse.objects.select_for_update().get_or_create(
+            CourseID_id=course_id,
+            UserID=user,
+            defaults={'CourseScore': score, 'CourseFlag': COMPLETED},
+        )
+
+        improved = False
+        if created:
+            delta = score
+        else:
+            previous = user_course.CourseScore if user_course.CourseFlag == COMPLETED else 0
+            improved = score > user_course.CourseScore
+            best = max(user_course.CourseScore, score)
+            delta = best - previous
+            if improved or user_course.CourseFlag != COMPLETED:
+                user_course.CourseScore = best
+                user_course.CourseFlag = COMPLETED
+                user_course.save(update_fields=['CourseScore', 'CourseFlag'])
+
+        if delta:
+            UserProfile.objects.filter(user=user).update(score=F('score') + delta)
+
+    return user_course, improved
@@ -0,0 +1,233 @@
+"""
+Loading SQL seed files (``sqls/db_seed.sql``, a ``pg_dump`` in plain format).
+
+``plan_sql_file`` scans the file once and sorts its statements into the
+phases ``pg_dump`` already lays out:
+
+* session settings (``SET ...``, ``set_config``), replayed on every connection;
+* pre-data: everything before the first ``COPY`` (tables, sequences);
+* data: one ``CopyBlock`` per ``COPY ... FROM stdin``, recorded as a byte
+  range of the file rather than read into memory;
+* post-data: sequence values, primary keys, unique constraints and indexes,
+  grouped by table;
+* foreign keys, which need the referenced keys to exist.
+
+``load`` runs pre-data on one connection, then streams every ``COPY`` block
+straight from the file into ``copy_expert`` with up to ``jobs`` tables
+loading at once over separate connections, then builds each table's keys and
+indexes (again ``jobs`` tables at a time) only after all rows are in, which
+is much cheaper than maintaining them row by row. Foreign keys are added last
+on a single connection: adding two of them in parallel that reference the
+same table would only queue on its lock.
+
+Phases commit as they finish, so a failed load can leave tables that have
+rows but no keys or indexes. ``mark_incomplete`` creates the
+``seed_db_incomplete`` table before a load starts (in the same transaction
+as the schema reset) and ``mark_complete`` drops it once foreign keys are in.
+While it exists ``seed_db`` treats the database as unseeded and loads again,
+however much data the failed run left behind.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+COPY_RE = re.compile(r'^COPY\s+([^\s(]+)', re.IGNORECASE)
+TABLE_RE = re.compile(r'(?:ALTER TABLE(?: ONLY)?|CREATE (?:UNIQUE )?INDEX\s+\S+\s+ON(?: ONLY)?)\s+([^\s(]+)', re.IGNORECASE)
+COPY_CHUNK = 256 * 1024
+INCOMPLETE_MARKER = 'seed_db_incomplete'
+
+
+class CopyBlock:
+    """A ``COPY ... FROM stdin`` statement and the byte range of its data in the file."""
+
+    def __init__(self, table, sql, start, end):
+        self.table = table
+        self.sql = sql
+        self.start = start
+        self.end = end
+
+
+class SeedPlan:
+    def __init__(self):
+        self.session = []
+        self.pre_data = []
+        self.copies = []
+        self.post_data = {}
+        self.foreign_keys = []
+
+    def add_post_data(self, statement):
+        # Statements not tied to one table (sequence values) share a group.
+        match = TABLE_RE.match(statement)
+        table = match.group(1) if match else ''
+        self.post_data.setdefault(table, []).append(statement)
+
+
+class _CopySource:
+    """Read-only view of ``[start, end)`` of an open binary file, for ``copy_expert``."""
+
+    def __init__(self, fh, start, end):
+        fh.seek(start)
+        self.fh = fh
+        self.remaining = end - start
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def mark_incomplete(cursor):
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {INCOMPLETE_MARKER} (id integer)')
+
+
+def mark_complete():
+    with connections['default'].cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {INCOMPLETE_MARKER}')
+
+
+def is_incomplete():
+    """Whether a previous load started and never finished."""
+    connection = connections['default']
+    with connection.cursor() as cursor:
+        return INCOMPLETE_MARKER in connection.introspection.table_names(cursor)
+
+
+def _strip_comments(statement):
+    return '\n'.join(ln for ln in statement.splitlines() if not ln.strip().startswith('--')).strip()
+
+
+def plan_sql_file(path):
+    """Scan ``path`` once and return its ``SeedPlan``; ``COPY`` data is only located, not read."""
+    plan = SeedPlan()
+    buffer = []
+    offset = 0
+    copy = None
+
+    def classify(statement):
+        upper = statement.upper()
+        if upper.startswith('SET ') or upper.startswith('SELECT PG_CATALOG.SET_CONFIG'):
+            plan.session.append(statement)
+        elif not plan.copies:
+            plan.pre_data.append(statement)
+        elif 'FOREIGN KEY' in upper:
+            plan.foreign_keys.append(statement)
+        else:
+            plan.add_post_data(statement)
+
+    with open(path, 'rb') as fh:
+        for raw_line in fh:
+            offset += len(raw_line)
+            if copy is not None:
+                if raw_line.rstrip(b'\r\n') == b'\\.':
+                    copy.end = offset - len(raw_line)
+                    plan.copies.append(copy)
+                    copy = None
+                continue
+
+            line = raw_line.decode('utf-8')
+            buffer.append(line)
+            stripped = line.strip()
+            if not stripped or stripped.startswith('--') or ';' not in line:
+                continue
+
+            statement = _strip_comments(''.join(buffer))
+            buffer = []
+            if not statement:
+                continue
+            match = COPY_RE.match(statement)
+            if match and 'FROM STDIN' in statement.upper():
+                copy = CopyBlock(match.group(1), statement, offset, None)
+                continue
+            classify(statement)
+
+    trailing = _strip_comments(''.join(buffer))
+    if trailing:
+        classify(trailing)
+    return plan
+
+
+def _run_on_own_connection(plan, work):
+    """Run ``work(cursor)`` on this thread's connection with the dump's session settings applied."""
+    connection = connections['default']
+    try:
+        with connection.cursor() as cursor:
+            for statement in plan.session:
+                cursor.execute(statement)
+            return work(cursor)
+    finally:
+        connection.close()
+
+
+def _copy_table(plan, path, block):
+    def work(cursor):
+        started = time.monotonic()
+        with open(path, 'rb') as fh:
+            cursor.copy_expert(block.sql, _CopySource(fh, block.start, block.end), size=COPY_CHUNK)
+        return block.table, cursor.rowcount, time.monotonic() - started
+
+    return _run_on_own_connection(plan, work)
+
+
+def _build_table(plan, table, statements):
+    def work(cursor):
+        started = time.monotonic()
+        for statement in statements:
+            cursor.execute(statement)
+        return table, len(statements), time.monotonic() - started
+
+    return _run_on_own_connection(plan, work)
+
+
+def _parallel(jobs, fn, items):
+    if jobs <= 1:
+        for item in items:
+            yield fn(*item)
+        return
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='seed') as pool:
+        yield from pool.map(lambda item: fn(*item), items)
+
+
+def load(path, plan, jobs=4, on_phase=None, on_table=None):
+    """
+    Apply ``plan`` (from ``plan_sql_file(path)``) to the default database.
+
+    ``on_table(phase, table, count, seconds)`` is called as each table's rows
+    are loaded (``count`` = rows) or its keys and indexes are built
+    (``count`` = statements); ``on_phase(phase, seconds)`` after each phase.
+    """
+    on_phase = on_phase or (lambda *args: None)
+    on_table = on_table or (lambda *args: None)
+
+    def phase(name, work):
+        started = time.monotonic()
+        work()
+        on_phase(name, time.monotonic() - started)
+
+    def pre_data():
+        _run_on_own_connection(plan, lambda cursor: [cursor.execute(statement) for statement in plan.pre_data])
+
+    def data():
+        # Biggest tables first so a large one does not start last and run alone.
+        blocks = sorted(plan.copies, key=lambda b: b.end - b.start, reverse=True)
+        for table, rows, seconds in _parallel(jobs, _copy_table, [(plan, path, b) for b in blocks]):
+            on_table('data', table, rows, seconds)
+
+    def post_data():
+        items = [(plan, table, statements) for table, statements in plan.post_data.items()]
+        for table, count, seconds in _parallel(jobs, _build_table, items):
+            on_table('post-data', table, count, seconds)
+
+    def foreign_keys():
+        _run_on_own_connection(plan, lambda cursor: [cursor.execute(statement) for statement in plan.foreign_keys])
+
+    phase('pre-data', pre_data)
+    phase('data', data)
+    phase('post-data', post_data)
+    phase('foreign keys', foreign_keys)
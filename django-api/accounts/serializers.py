@@ -12,7 +12,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['score', 'rank', 'login_streak_days', 'last_login_date', 'has_profile_pic', 'profile_pic_mime', 'bookmarked_subject_id', 'bookmarked_subject_name', 'bookmarked_subject_updated_at']
 
     def get_has_profile_pic(self, obj):
-        return bool(obj.profile_pic)
+        return bool(obj.profile_pic_hash)
 
     def get_bookmarked_subject_id(self, obj):
         try:
@@ -40,6 +40,7 @@ class UserSerializer(serializers.ModelSerializer):
             user_name=validated_data['user_name'],
             email=validated_data['email'],
             password=validated_data['password'],
+            password_hash=validated_data.get('password_hash'),
             License=validated_data.get('License')
         )
         return user
@@ -48,7 +49,7 @@ class UserSerializer(serializers.ModelSerializer):
 class UserActivitySerializer(serializers.ModelSerializer):
     class Meta:
         model = UserActivity
-        fields = ['activity_type', 'timestamp', 'details']
+        fields = ['id', 'activity_type', 'timestamp', 'payload']
 
 
 class SubjectSerializer(serializers.ModelSerializer):
@@ -63,6 +64,12 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = ['CourseID', 'SubjectID', 'CourseTitle', 'CourseDescription', 'CourseDifficulty', 'Content']
 
 
+class CourseSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Course
+        fields = ['CourseID', 'SubjectID', 'CourseTitle', 'CourseDescription', 'CourseDifficulty']
+
+
 class UserCourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserCourse
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts import answer_keys
+from accounts.achievement_engine import invalidate_rules
+from accounts.catalog import bump_catalog_version
+from accounts.quiz import invalidate_quiz
+from accounts.models import Achievement, Course, Option, Question, Subject
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    bump_catalog_version()
+    answer_keys.invalidate_course(instance.pk)
+    invalidate_quiz(instance.pk)
+    invalidate_rules()
+
+
+@receiver([post_save, post_delete], sender=Achievement)
+def achievement_changed(sender, instance, **kwargs):
+    invalidate_rules()
+
+
+def _invalidate_courses(*course_ids):
+    for course_id in {c for c in course_ids if c is not None}:
+        answer_keys.invalidate_course(course_id)
+        invalidate_quiz(course_id)
+
+
+def _question_course(question_id):
+    return Question.objects.filter(pk=question_id).values_list('CourseID_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Question)
+def question_moving(sender, instance, **kwargs):
+    # A question moved to another course must also leave the old course's caches.
+    instance._previous_course_id = _question_course(instance.pk) if instance.pk is not None else None
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    _invalidate_courses(instance.CourseID_id, getattr(instance, '_previous_course_id', None))
+
+
+@receiver(pre_save, sender=Option)
+def option_moving(sender, instance, **kwargs):
+    previous_question_id = None
+    if instance.pk is not None:
+        previous_question_id = Option.objects.filter(pk=instance.pk).values_list('QuestionID_id', flat=True).first()
+    moved = previous_question_id not in (None, instance.QuestionID_id)
+    instance._previous_course_id = _question_course(previous_question_id) if moved else None
+
+
+@receiver([post_save, post_delete], sender=Option)
+def option_changed(sender, instance, **kwargs):
+    answer_keys.invalidate_option(instance.pk)
+    _invalidate_courses(_question_course(instance.QuestionID_id), getattr(instance, '_previous_course_id', None))
@@ -0,0 +1,166 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.achievement_engine import (
+    LOGIN,
+    SCORE,
+    RuleIndex,
+    UserContext,
+    compile_rule,
+    course_trigger,
+    diff_user_achievements,
+    invalidate_rules,
+    refresh_user_achievements,
+)
+from accounts.models import Achievement, Course, Subject, User, UserAchievement, UserProfile
+from accounts.scoring import record_course_score
+
+NOW = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def context(streak=0, score=0, completed=()):
+    return UserContext(streak, score, set(completed))
+
+
+class CompileRuleTests(SimpleTestCase):
+    def test_course_set_counts_completed_courses(self):
+        rule = compile_rule(1, {'type': 'course_set', 'course_ids': [10, 11, 12], 'count': 2}, {})
+        self.assertEqual(rule.triggers, {course_trigger(10), course_trigger(11), course_trigger(12)})
+        self.assertEqual(rule.evaluate(context(completed=[10])), (1, False))
+        self.assertEqual(rule.evaluate(context(completed=[10, 12, 99])), (2, True))
+
+    def test_course_set_defaults_to_every_course(self):
+        rule = compile_rule(1, {'type': 'course_set', 'course_ids': [10, 11]}, {})
+        self.assertEqual(rule.target, 2)
+
+    def test_streak(self):
+        rule = compile_rule(1, {'type': 'streak', 'days': 5}, {})
+        self.assertEqual(rule.triggers, {LOGIN})
+        # Progress is capped at the target.
+        self.assertEqual(rule.evaluate(context(streak=9)), (5, True))
+
+    def test_subject_complete_uses_the_subjects_courses(self):
+        rule = compile_rule(1, {'type': 'subject_complete', 'subject_id': 3}, {3: frozenset({30, 31})})
+        self.assertEqual(rule.triggers, {course_trigger(30), course_trigger(31)})
+        self.assertEqual(rule.evaluate(context(completed=[30, 31])), (2, True))
+
+    def test_subject_without_courses_never_unlocks(self):
+        rule = compile_rule(1, {'type': 'subject_complete', 'subject_id': 3}, {})
+        self.assertEqual(rule.evaluate(context()), (0, False))
+
+    def test_score(self):
+        rule = compile_rule(1, {'type': 'score', 'min_score': 100}, {})
+        self.assertEqual(rule.triggers, {SCORE})
+        self.assertEqual(rule.evaluate(context(score=40)), (40, False))
+
+    def test_malformed_rules(self):
+        for rule in [None, {'type': 'nope'}, {'type': 'streak'}, {'type': 'score', 'min_score': 'x'}]:
+            with self.subTest(rule=rule), self.assertRaises(ValueError):
+                compile_rule(1, rule, {})
+
+
+class RuleIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = RuleIndex({
+            1: compile_rule(1, {'type': 'streak', 'days': 5}, {}),
+            2: compile_rule(2, {'type': 'course_set', 'course_ids': [10]}, {}),
+            3: compile_rule(3, {'type': 'course_set', 'course_ids': [10, 11]}, {}),
+        })
+
+    def ids(self, triggers):
+        return sorted(rule.achievement_id for rule in self.index.for_triggers(triggers))
+
+    def test_selects_rules_by_trigger(self):
+        self.assertEqual(self.ids({LOGIN}), [1])
+        self.assertEqual(self.ids({course_trigger(10)}), [2, 3])
+        self.assertEqual(self.ids({course_trigger(11), LOGIN}), [1, 3])
+        self.assertEqual(self.ids({SCORE}), [])
+
+    def test_none_selects_every_rule(self):
+        self.assertEqual(self.ids(None), [1, 2, 3])
+
+
+class DiffUserAchievementsTests(SimpleTestCase):
+    def setUp(self):
+        self.rule = compile_rule(7, {'type': 'streak', 'days': 3}, {})
+
+    def test_creates_missing_rows(self):
+        to_create, to_update = diff_user_achievements(1, [self.rule], context(streak=3), {}, now=NOW)
+        self.assertEqual(to_update, [])
+        [row] = to_create
+        self.assertEqual((row.achievement_id, row.progress, row.unlocked, row.unlocked_at), (7, 3, True, NOW))
+
+    def test_skips_unchanged_rows(self):
+        existing = {7: UserAchievement(user_id=1, achievement_id=7, progress=2, unlocked=False)}
+        self.assertEqual(diff_user_achievements(1, [self.rule], context(streak=2), existing, now=NOW), ([], []))
+
+    def test_unlocking_and_relocking(self):
+        row = UserAchievement(user_id=1, achievement_id=7, progress=2, unlocked=False)
+        _, [updated] = diff_user_achievements(1, [self.rule], context(streak=3), {7: row}, now=NOW)
+        self.assertTrue(updated.unlocked)
+        self.assertEqual(updated.unlocked_at, NOW)
+
+        _, [updated] = diff_user_achievements(1, [self.rule], context(streak=0), {7: row}, now=NOW)
+        self.assertFalse(updated.unlocked)
+        self.assertIsNone(updated.unlocked_at)
+
+
+class RefreshAchievementsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        subject = Subject.objects.create(SubjectName='S', SubjectDescription='')
+        cls.courses = [
+            Course.objects.create(SubjectID=subject, CourseTitle=f'C{i}', CourseDescription='', CourseDifficulty=1)
+            for i in range(2)
+        ]
+        cls.subject_done = Achievement.objects.create(
+            key='test_subject', category='test', title='', description='', icon='', target=2,
+            metadata={'rule': {'type': 'subject_complete', 'subject_id': subject.pk}},
+        )
+        cls.high_score = Achievement.objects.create(
+            key='test_score', category='test', title='', description='', icon='', target=10,
+            metadata={'rule': {'type': 'score', 'min_score': 10}},
+        )
+
+    def setUp(self):
+        invalidate_rules()
+        self.user = User.objects.create_user('achiever', 'achiever@example.com', 'pw-123456')
+
+    def row(self, achievement):
+        return UserAchievement.objects.get(user=self.user, achievement=achievement)
+
+    def test_course_triggers_only_touch_course_rules(self):
+        record_course_score(self.user, self.courses[0].pk, 20)
+        refresh_user_achievements(self.user, {course_trigger(self.courses[0].pk)})
+        self.assertEqual((self.row(self.subject_done).progress, self.row(self.subject_done).unlocked), (1, False))
+        self.assertFalse(UserAchievement.objects.filter(user=self.user, achievement=self.high_score).exists())
+
+        record_course_score(self.user, self.courses[1].pk, 20)
+        refresh_user_achievements(self.user, {course_trigger(self.courses[1].pk), SCORE})
+        self.assertTrue(self.row(self.subject_done).unlocked)
+        self.assertTrue(self.row(self.high_score).unlocked)
+
+    def test_writes_nothing_when_nothing_changed(self):
+        UserProfile.objects.filter(user=self.user).update(score=15)
+        self.assertEqual(refresh_user_achievements(self.user, {SCORE}), 1)
+        self.assertEqual(refresh_user_achievements(self.user, {SCORE}), 0)
+
+
+class AchievementsEndpointTests(TestCase):
+    def setUp(self):
+        invalidate_rules()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'pw-123456')
+        UserProfile.objects.filter(user=self.user).update(login_streak_days=7)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reading_never_writes(self):
+        response = self.client.get(reverse('achievements'))
+        self.assertEqual(response.status_code, 200)
+        streaks = {a['id']: a for a in response.data['achievements'] if a['type'] == 'login_streak'}
+        self.assertEqual((streaks['login_streak_5']['progress'], streaks['login_streak_5']['unlocked']), (5, True))
+        self.assertEqual(streaks['login_streak_10']['progress'], 7)
+        self.assertFalse(UserAchievement.objects.filter(user=self.user).exists())
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.analytics import InvalidCursor, activity_feed, decode_cursor, encode_cursor
+from accounts.models import User, UserActivity
+
+START = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        cursor = encode_cursor(UserActivity(pk=42, timestamp=START))
+        self.assertEqual(decode_cursor(cursor), (START, 42))
+
+    def test_rejects_garbage(self):
+        for cursor in ['', '!!!', encode_cursor(UserActivity(pk=1, timestamp=START))[:-3] + 'xyz', 'bm9waXBl']:
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+
+class ActivityFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'pw-123456')
+        other = User.objects.create_user('other', 'other@example.com', 'pw-123456')
+        rows = []
+        for i in range(7):
+            # Pairs of rows share a timestamp, so the id breaks ties.
+            stamp = START - timedelta(minutes=i // 2)
+            kind = 'LOGIN' if i % 3 else 'COURSE_SUBMISSION'
+            rows.append(UserActivity(user=cls.user, activity_type=kind, timestamp=stamp))
+        rows.append(UserActivity(user=other, activity_type='LOGIN', timestamp=START))
+        UserActivity.objects.bulk_create(rows)
+        cls.expected = list(
+            UserActivity.objects.filter(user=cls.user).order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+
+    def pages(self, limit, types=None):
+        ids, cursor = [], None
+        while True:
+            rows, cursor = activity_feed(self.user, cursor, limit, types)
+            ids.append([row.pk for row in rows])
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for limit in (1, 2, 3, 7, 50):
+            with self.subTest(limit=limit):
+                pages = self.pages(limit)
+                self.assertEqual([pk for page in pages for pk in page], self.expected)
+                self.assertTrue(all(len(page) <= limit for page in pages))
+
+    def test_last_full_page_has_no_cursor(self):
+        rows, cursor = activity_feed(self.user, None, 7)
+        self.assertEqual(len(rows), 7)
+        self.assertIsNone(cursor)
+
+    def test_type_filter(self):
+        ids = [pk for page in self.pages(2, ['COURSE_SUBMISSION']) for pk in page]
+        kinds = set(UserActivity.objects.filter(pk__in=ids).values_list('activity_type', flat=True))
+        self.assertEqual(kinds, {'COURSE_SUBMISSION'})
+
+    def test_endpoint_rejects_bad_cursor(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('activity_list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,78 @@
+import threading
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from accounts import activity
+from accounts.models import User, UserActivity
+
+
+class MonthHelperTests(SimpleTestCase):
+    def test_add_months_crosses_years(self):
+        self.assertEqual(activity.add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(activity.add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+
+    def test_partition_name(self):
+        self.assertEqual(activity.partition_name(date(2026, 3, 1)), 'accounts_useractivity_p202603')
+
+
+class BufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('active', 'active@example.com', 'pw-123456')
+
+    def row(self, at):
+        return UserActivity(user_id=self.user.pk, activity_type='LOGIN', payload={}, timestamp=at)
+
+    def test_flush_writes_buffered_rows_in_one_insert_with_their_own_time(self):
+        # A long interval keeps the flusher thread asleep; the test flushes itself.
+        buffer = activity._Buffer(batch_size=100, interval=3600)
+        earlier = timezone.now() - timedelta(minutes=5)
+        buffer.add(self.row(earlier))
+        buffer.add(self.row(earlier + timedelta(minutes=1)))
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(
+            list(UserActivity.objects.order_by('timestamp').values_list('timestamp', flat=True)),
+            [earlier, earlier + timedelta(minutes=1)],
+        )
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_failed_flush_is_logged_and_dropped(self):
+        buffer = activity._Buffer(batch_size=100, interval=3600)
+        buffer.add(self.row(timezone.now()))
+        with mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=DatabaseError), \
+                self.assertLogs('accounts.activity', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.rows, [])
+
+    def test_log_activity_buffers_after_commit(self):
+        buffer = mock.Mock()
+        with mock.patch('accounts.activity._get_buffer', return_value=buffer):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                activity.log_activity(self.user, 'LOGIN', {'ip': 'x'})
+            buffer.add.assert_not_called()
+            for callback in callbacks:
+                callback()
+        [row], _ = buffer.add.call_args
+        self.assertEqual((row.activity_type, row.payload, row.user_id), ('LOGIN', {'ip': 'x'}, self.user.pk))
+        self.assertFalse(UserActivity.objects.exists())
+
+    @override_settings(ACTIVITY_LOG_BUFFERED=False)
+    def test_unbuffered_writes_immediately(self):
+        activity.log_activity(self.user, 'LOGOUT')
+        self.assertEqual(list(UserActivity.objects.values_list('activity_type', 'payload')), [('LOGOUT', {})])
+
+
+class FlusherThreadTests(SimpleTestCase):
+    def test_full_batch_wakes_the_flusher(self):
+        flushed = threading.Event()
+        with mock.patch.object(activity._Buffer, 'flush', side_effect=lambda: flushed.set()):
+            buffer = activity._Buffer(batch_size=2, interval=3600)
+            buffer.add(object())
+            self.assertFalse(flushed.wait(0.1))
+            buffer.add(object())
+            self.assertTrue(flushed.wait(5))
@@ -0,0 +1,88 @@
+from django.test import TestCase, override_settings
+
+from accounts import answer_keys
+from accounts.models import Course, Option, Question, Subject
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'answer-keys'}}
+
+
+class AnswerKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(SubjectName='S', SubjectDescription='')
+        cls.course = Course.objects.create(SubjectID=cls.subject, CourseTitle='A', CourseDescription='', CourseDifficulty=1)
+        cls.other = Course.objects.create(SubjectID=cls.subject, CourseTitle='B', CourseDescription='', CourseDifficulty=1)
+        cls.question = Question.objects.create(CourseID=cls.course, QuestionDescription='?')
+        cls.right = Option.objects.create(QuestionID=cls.question, OptionText='yes', CorrectOption=True)
+        cls.wrong = Option.objects.create(QuestionID=cls.question, OptionText='no', CorrectOption=False)
+
+    def setUp(self):
+        answer_keys.clear()
+        self.addCleanup(answer_keys.clear)
+
+    def test_load_answer_key(self):
+        key = answer_keys.load_answer_key(self.course.pk)
+        self.assertEqual((key.course_id, key.subject_id), (self.course.pk, self.subject.pk))
+        self.assertEqual(key.question_ids, {self.question.pk})
+        self.assertEqual(
+            key.options, {self.right.pk: (self.question.pk, True), self.wrong.pk: (self.question.pk, False)}
+        )
+        self.assertIsNone(answer_keys.load_answer_key(987654))
+
+    def test_cached_key_needs_no_queries(self):
+        key = answer_keys.get_answer_key(self.course.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(answer_keys.get_answer_key(self.course.pk), key)
+            self.assertEqual(answer_keys.find_option(self.wrong.pk), (self.question.pk, False))
+
+    @override_settings(ANSWER_KEY_CACHE_TTL=0)
+    def test_expired_key_is_reloaded(self):
+        answer_keys.get_answer_key(self.course.pk)
+        with self.assertNumQueries(3):
+            answer_keys.get_answer_key(self.course.pk)
+
+    @override_settings(ANSWER_KEY_CACHE_SIZE=1)
+    def test_least_recently_used_key_is_evicted_with_its_options(self):
+        answer_keys.get_answer_key(self.course.pk)
+        answer_keys.get_answer_key(self.other.pk)
+        self.assertEqual(list(answer_keys._local), [self.other.pk])
+        self.assertNotIn(self.right.pk, answer_keys._option_courses)
+
+    def test_find_option_loads_the_options_course(self):
+        self.assertEqual(answer_keys.find_option(self.right.pk), (self.question.pk, True))
+        self.assertIn(self.course.pk, answer_keys._local)
+        self.assertIsNone(answer_keys.find_option(987654))
+
+    def test_option_edit_invalidates_the_key(self):
+        answer_keys.get_answer_key(self.course.pk)
+        self.wrong.CorrectOption = True
+        self.wrong.save()
+        self.assertEqual(answer_keys.get_answer_key(self.course.pk).options[self.wrong.pk], (self.question.pk, True))
+
+    def test_moving_a_question_invalidates_both_courses(self):
+        answer_keys.get_answer_key(self.course.pk)
+        answer_keys.get_answer_key(self.other.pk)
+        self.question.CourseID = self.other
+        self.question.save()
+        self.assertEqual(answer_keys.get_answer_key(self.course.pk).question_ids, frozenset())
+        self.assertEqual(answer_keys.get_answer_key(self.other.pk).question_ids, {self.question.pk})
+
+    def test_moving_an_option_invalidates_both_courses(self):
+        target = Question.objects.create(CourseID=self.other, QuestionDescription='??')
+        answer_keys.get_answer_key(self.course.pk)
+        answer_keys.get_answer_key(self.other.pk)
+        self.wrong.QuestionID = target
+        self.wrong.save()
+        self.assertNotIn(self.wrong.pk, answer_keys.get_answer_key(self.course.pk).options)
+        self.assertEqual(answer_keys.get_answer_key(self.other.pk).options, {self.wrong.pk: (target.pk, False)})
+
+    @override_settings(CACHES=LOCMEM, ANSWER_KEY_CACHE_ALIAS='default')
+    def test_shared_cache_serves_other_processes(self):
+        key = answer_keys.get_answer_key(self.course.pk)
+        answer_keys.clear()  # as seen from a worker with an empty local cache
+        with self.assertNumQueries(0):
+            self.assertEqual(answer_keys.get_answer_key(self.course.pk).options, key.options)
+
+        answer_keys.invalidate_course(self.course.pk)
+        with self.assertNumQueries(3):
+            answer_keys.get_answer_key(self.course.pk)
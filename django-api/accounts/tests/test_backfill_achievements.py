@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from accounts.achievement_engine import get_rule_index, invalidate_rules
+from accounts.management.commands import backfill_achievements
+from accounts.models import User, UserAchievement, UserProfile
+
+
+class BackfillAchievementsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            User.objects.create_user(f'u{i}', f'u{i}@example.com', 'pw-123456')
+        UserProfile.objects.update(login_streak_days=6)
+        cls.first_profile = UserProfile.objects.order_by('id').values_list('id', flat=True).first()
+
+    def setUp(self):
+        invalidate_rules()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.checkpoint = os.path.join(directory, 'backfill.json')
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('backfill_achievements', '--checkpoint', self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfills_every_user_and_rewrites_nothing_after(self):
+        out = self.run_command('--batch-size', '2')
+        rules = len(get_rule_index().rules)
+        self.assertIn(f'Backfilled 5 user(s); {5 * rules} achievement row(s) written.', out)
+        self.assertEqual(UserAchievement.objects.filter(achievement__key='login_streak_5', unlocked=True).count(), 5)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        self.assertIn('Backfilled 5 user(s); 0 achievement row(s) written.', self.run_command('--batch-size', '2'))
+
+    def test_interrupted_run_resumes_from_the_checkpoint(self):
+        real = backfill_achievements._backfill_range
+        calls = []
+
+        def crash_on_second_chunk(start, stop):
+            calls.append(start)
+            if len(calls) == 2:
+                raise RuntimeError('worker died')
+            return real(start, stop)
+
+        with mock.patch.object(backfill_achievements, '_backfill_range', crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_command('--batch-size', '2')
+        with open(self.checkpoint) as fh:
+            self.assertEqual(json.load(fh), {'batch_size': 2, 'done': [self.first_profile]})
+
+        out = self.run_command('--batch-size', '2')
+        self.assertIn('Resuming: 1 chunk(s) already done, 2 left.', out)
+        self.assertIn('Backfilled 3 user(s)', out)
+        self.assertEqual(UserAchievement.objects.values('user').distinct().count(), 5)
+
+    def test_checkpoint_from_another_batch_size(self):
+        with open(self.checkpoint, 'w') as fh:
+            json.dump({'batch_size': 3, 'done': [self.first_profile]}, fh)
+        with self.assertRaisesMessage(CommandError, 'use the same batch size or pass --reset'):
+            self.run_command('--batch-size', '2')
+        self.assertIn('Backfilled 5 user(s)', self.run_command('--batch-size', '2', '--reset'))
@@ -0,0 +1,77 @@
+import json
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts import catalog
+from accounts.models import Course, Subject
+
+
+class CatalogCacheTests(TestCase):
+    """Runs against the default database cache backend, as shipped."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(SubjectName='Maths', SubjectDescription='')
+        cls.course = Course.objects.create(SubjectID=cls.subject, CourseTitle='A', CourseDescription='', CourseDifficulty=1)
+
+    def setUp(self):
+        catalog._cache().clear()
+        catalog.clear_local()
+        self.addCleanup(catalog.clear_local)
+        self.client = APIClient()
+        self.url = reverse('subjects_list')
+
+    def names(self, response):
+        return [s['SubjectName'] for s in json.loads(response.content)]
+
+    def test_repeat_hits_need_no_queries(self):
+        for name, args in [('subjects_list', []), ('courses_by_subject', [self.subject.pk]), ('course_detail', [self.course.pk])]:
+            with self.subTest(route=name):
+                url = reverse(name, args=args)
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertEqual((second.content, second['ETag']), (first.content, first['ETag']))
+
+    @override_settings(CATALOG_LOCAL_TTL=0)
+    def test_without_the_local_layer_hits_read_the_shared_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):  # version, then the rendered body
+            self.client.get(self.url)
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_saving_a_subject_bumps_the_version(self):
+        version = catalog.catalog_version()
+        self.client.get(self.url)
+        Subject.objects.create(SubjectName='Physics', SubjectDescription='')
+        self.assertGreater(catalog.catalog_version(), version)
+        self.assertEqual(self.names(self.client.get(self.url)), ['Maths', 'Physics'])
+
+    def test_bump_in_another_worker_is_seen_after_the_local_ttl(self):
+        self.client.get(self.url)
+        Subject.objects.bulk_create([Subject(SubjectName='Physics', SubjectDescription='')])
+        # Another worker bumps the shared version; this one has its own copy.
+        catalog._cache().incr(catalog.VERSION_KEY)
+        self.assertEqual(self.names(self.client.get(self.url)), ['Maths'])
+
+        later = time.monotonic() + 60
+        with mock.patch('accounts.catalog.time.monotonic', return_value=later):
+            self.assertEqual(self.names(self.client.get(self.url)), ['Maths', 'Physics'])
+
+    def test_missing_course_is_not_cached(self):
+        url = reverse('course_detail', args=[987654])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertNotIn(f'catalog:{catalog.catalog_version()}:course:987654', catalog._local)
+
+    @override_settings(CATALOG_LOCAL_SIZE=2)
+    def test_local_layer_is_bounded(self):
+        for i in range(5):
+            catalog.local_set(f'k{i}', i)
+        self.assertEqual(list(catalog._local), ['k3', 'k4'])
@@ -0,0 +1,116 @@
+import gzip
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.course_content import IDENTITY, _parse_range, content_store, materialize, section_bounds
+from accounts.models import Course, Subject
+
+TEXT = 'First paragraph.\n\nSecond paragraph.\n\nThird.'
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_satisfiable_ranges(self):
+        cases = {
+            'bytes=0-0': (0, 1),
+            'bytes=2-4': (2, 5),
+            'bytes=2-': (2, 10),
+            'bytes=2-100': (2, 10),
+            'bytes=-3': (7, 10),
+            'bytes=-100': (0, 10),
+            ' bytes=0-9 ': (0, 10),
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(_parse_range(header, 10), expected)
+
+    def test_invalid_ranges_are_ignored(self):
+        for header in ['bytes=5-2', 'bytes=-', 'bytes=0-1,3-4', 'items=0-1', 'bytes=a-b', '']:
+            with self.subTest(header=header):
+                self.assertIsNone(_parse_range(header, 10))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ['bytes=10-', 'bytes=10-20', 'bytes=-0']:
+            with self.subTest(header=header):
+                self.assertIs(_parse_range(header, 10), False)
+
+
+class SectionBoundsTests(SimpleTestCase):
+    def test_sections_end_on_paragraph_breaks(self):
+        data = b'aaaa\n\nbbbb\n\ncccc'
+        bounds = section_bounds(data, 5)
+        self.assertEqual(bounds, [[0, 6], [6, 12], [12, 16]])
+        self.assertEqual(b''.join(data[s:e] for s, e in bounds), data)
+
+    def test_short_text_is_one_section(self):
+        self.assertEqual(section_bounds(b'short', 1024), [[0, 5]])
+        self.assertEqual(section_bounds(b'', 1024), [[0, 0]])
+
+
+class ContentEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        subject = Subject.objects.create(SubjectName='S', SubjectDescription='')
+        cls.course = Course.objects.create(
+            SubjectID=subject, CourseTitle='A', CourseDescription='', CourseDifficulty=1, Content=TEXT
+        )
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(COURSE_CONTENT_ROOT=root, COURSE_CONTENT_SECTION_BYTES=10)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.url = reverse('course_content', args=[self.course.pk])
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def get_section(self, section):
+        response = self.client.get(self.url, {'section': section})
+        return response, b''.join(response.streaming_content)
+
+    def test_full_body(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, TEXT.encode())
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_gzip_variant(self):
+        response, body = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), TEXT.encode())
+
+    def test_ranges(self):
+        response, body = self.get(HTTP_RANGE='bytes=0-4')
+        self.assertEqual((response.status_code, body), (206, b'First'))
+        self.assertEqual(response['Content-Range'], f'bytes 0-4/{len(TEXT)}')
+
+        response, _ = self.get(HTTP_RANGE=f'bytes={len(TEXT)}-')
+        self.assertEqual(response.status_code, 416)
+
+        response, body = self.get(HTTP_RANGE='bytes=4-0')
+        self.assertEqual((response.status_code, body), (200, TEXT.encode()))
+
+    def test_sections(self):
+        response, body = self.get_section(1)
+        self.assertEqual(body, b'Second paragraph.\n\n')
+        self.assertEqual(response['X-Content-Sections'], '3')
+        self.assertEqual(self.client.get(self.url, {'section': 3}).status_code, 404)
+
+    def test_truncated_file_is_rewritten(self):
+        digest = materialize(self.course.pk)
+        path = content_store().path(digest, IDENTITY)
+        with open(path, 'r+b') as handle:
+            handle.truncate(3)
+        self.assertEqual(materialize(self.course.pk), digest)
+        self.assertEqual(self.get()[1], TEXT.encode())
+
+    def test_missing_course(self):
+        self.assertEqual(self.client.get(reverse('course_content', args=[987654])).status_code, 404)
@@ -0,0 +1,95 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts import events
+from accounts.achievement_engine import LOGIN, SCORE, course_trigger, invalidate_rules
+from accounts.models import Achievement, AchievementEvent, Course, Subject, User, UserAchievement
+from accounts.scoring import record_course_score
+
+
+class GroupEventsTests(SimpleTestCase):
+    def test_collapses_duplicates_per_user(self):
+        grouped = events.group_events([(1, LOGIN), (2, SCORE), (1, LOGIN), (1, SCORE)])
+        self.assertEqual(grouped, {1: {LOGIN, SCORE}, 2: {SCORE}})
+
+
+class DispatcherTests(SimpleTestCase):
+    def test_batches_queued_events_into_one_refresh(self):
+        with mock.patch('accounts.events.refresh_achievements') as refresh:
+            dispatcher = events._Dispatcher(workers=1, batch_size=10, max_wait=0.2)
+            dispatcher.put(1, [LOGIN, SCORE])
+            dispatcher.put(1, [LOGIN])
+            dispatcher.put(2, [SCORE])
+            dispatcher.stop()
+        grouped = {}
+        for (batch,), _ in refresh.call_args_list:
+            for user_id, triggers in batch.items():
+                grouped.setdefault(user_id, set()).update(triggers)
+        self.assertEqual(grouped, {1: {LOGIN, SCORE}, 2: {SCORE}})
+
+    def test_a_failing_batch_does_not_stop_the_worker(self):
+        with mock.patch('accounts.events.refresh_achievements', side_effect=[RuntimeError, None]) as refresh, \
+                self.assertLogs('accounts.events', 'ERROR'):
+            dispatcher = events._Dispatcher(workers=1, batch_size=1, max_wait=0)
+            dispatcher.put(1, [LOGIN])
+            dispatcher.put(2, [LOGIN])
+            dispatcher.stop()
+        self.assertEqual(refresh.call_count, 2)
+
+
+class EventBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        subject = Subject.objects.create(SubjectName='S', SubjectDescription='')
+        cls.course = Course.objects.create(SubjectID=subject, CourseTitle='A', CourseDescription='', CourseDifficulty=1)
+        cls.achievement = Achievement.objects.create(
+            key='test_course', category='test', title='', description='', icon='', target=1,
+            metadata={'rule': {'type': 'course_set', 'course_ids': [cls.course.pk]}},
+        )
+
+    def setUp(self):
+        invalidate_rules()
+        self.user = User.objects.create_user('eventful', 'eventful@example.com', 'pw-123456')
+
+    def complete_course(self):
+        record_course_score(self.user, self.course.pk, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            events.course_completed.send(sender=None, user_id=self.user.pk, course_id=self.course.pk)
+
+    def unlocked(self):
+        return UserAchievement.objects.filter(user=self.user, achievement=self.achievement, unlocked=True).exists()
+
+    @override_settings(ACHIEVEMENT_EVENTS_BACKEND=events.SYNC)
+    def test_sync_backend_refreshes_after_commit(self):
+        self.complete_course()
+        self.assertTrue(self.unlocked())
+
+    @override_settings(ACHIEVEMENT_EVENTS_BACKEND=events.THREAD)
+    def test_thread_backend_queues_after_commit(self):
+        dispatcher = mock.Mock()
+        with mock.patch('accounts.events._get_dispatcher', return_value=dispatcher):
+            self.complete_course()
+        dispatcher.put.assert_called_once_with(self.user.pk, [course_trigger(self.course.pk), SCORE])
+
+    @override_settings(ACHIEVEMENT_EVENTS_BACKEND=events.OUTBOX)
+    def test_outbox_backend_stores_events_until_processed(self):
+        self.complete_course()
+        self.assertFalse(self.unlocked())
+        self.assertEqual(
+            set(AchievementEvent.objects.values_list('user_id', 'trigger')),
+            {(self.user.pk, course_trigger(self.course.pk)), (self.user.pk, SCORE)},
+        )
+
+        out = StringIO()
+        call_command('process_achievement_events', '--batch-size', '1', stdout=out)
+        self.assertIn('Processed 2 achievement event(s).', out.getvalue())
+        self.assertTrue(self.unlocked())
+        self.assertFalse(AchievementEvent.objects.exists())
+
+    @override_settings(ACHIEVEMENT_EVENTS_BACKEND=events.OUTBOX)
+    def test_login_event(self):
+        events.login_recorded.send(sender=None, user_id=self.user.pk)
+        self.assertEqual(list(AchievementEvent.objects.values_list('trigger', flat=True)), [LOGIN])
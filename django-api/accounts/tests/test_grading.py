@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase, TestCase
+
+from accounts.answer_keys import AnswerKey
+from accounts.grading import GradingError, grade_submission
+from accounts.models import Course, Option, Question, Subject
+
+# Course 1: question 10 (options 100 correct, 101), question 11 (options 110, 111 correct).
+KEY = AnswerKey(
+    course_id=1,
+    subject_id=1,
+    question_ids=frozenset({10, 11}),
+    options={100: (10, True), 101: (10, False), 110: (11, False), 111: (11, True)},
+)
+
+
+def answers(*pairs):
+    return [{'question_id': q, 'option_id': o} for q, o in pairs]
+
+
+class GradeSubmissionTests(SimpleTestCase):
+    def test_scores_every_question(self):
+        result = grade_submission(KEY, answers((10, 100), (11, 110)))
+        self.assertEqual(result['total'], 2)
+        self.assertEqual(result['correct'], 1)
+        self.assertEqual(
+            result['per_question'],
+            [
+                {'question_id': 10, 'option_id': 100, 'correct': True},
+                {'question_id': 11, 'option_id': 110, 'correct': False},
+            ],
+        )
+
+    def test_accepts_numeric_strings(self):
+        result = grade_submission(KEY, answers(('10', '100'), ('11', '111')))
+        self.assertEqual(result['correct'], 2)
+
+    def test_answers_must_be_a_list(self):
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(KEY, {'question_id': 10})
+        self.assertEqual(ctx.exception.payload, {'detail': 'answers must be a list.'})
+
+    def test_reports_every_malformed_item(self):
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(KEY, ['x', {'question_id': 'a', 'option_id': 1}])
+        self.assertEqual([e['index'] for e in ctx.exception.payload['errors']], [0, 1])
+
+    def test_missing_questions(self):
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(KEY, answers((10, 100)))
+        self.assertEqual(ctx.exception.payload['missing_question_ids'], [11])
+
+    def test_questions_from_another_course(self):
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(KEY, answers((10, 100), (11, 111), (99, 990)))
+        self.assertEqual(ctx.exception.payload['extra_question_ids'], [99])
+
+    def test_option_of_another_question(self):
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(KEY, answers((10, 111), (11, 110)))
+        self.assertEqual(ctx.exception.payload['detail'], 'Option does not belong to the submitted question.')
+        self.assertEqual(ctx.exception.payload['question_id'], 10)
+
+    def test_course_without_questions(self):
+        empty = AnswerKey(2, 1, frozenset(), {})
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(empty, [])
+        self.assertEqual(ctx.exception.payload, {'detail': 'Course has no questions.'})
+
+
+class GradeSubmissionOptionLookupTests(TestCase):
+    """Options outside the answer key are looked up to tell unknown from foreign ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        subject = Subject.objects.create(SubjectName='S', SubjectDescription='')
+        course = Course.objects.create(SubjectID=subject, CourseTitle='Other', CourseDescription='', CourseDifficulty=1)
+        question = Question.objects.create(CourseID=course, QuestionDescription='?')
+        cls.foreign_option = Option.objects.create(QuestionID=question, OptionText='a', CorrectOption=True)
+
+    def test_unknown_option(self):
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(KEY, answers((10, 100), (11, 987654)))
+        self.assertEqual(ctx.exception.payload['detail'], 'Option not found.')
+
+    def test_option_from_another_course(self):
+        with self.assertRaises(GradingError) as ctx:
+            grade_submission(KEY, answers((10, 100), (11, self.foreign_option.pk)))
+        self.assertEqual(ctx.exception.payload['detail'], 'Option does not belong to the submitted question.')
@@ -0,0 +1,82 @@
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts import hashers
+from accounts.hashers import HashingBusy, TunedScryptPasswordHasher, hashing_slot, verify_password
+from accounts.models import User
+
+# Cheap scrypt parameters keep the suite fast; the code paths are the same.
+FAST_SCRYPT = {'PASSWORD_SCRYPT_WORK_FACTOR': 2 ** 10, 'PASSWORD_HASHING_TIMEOUT': 0.05}
+
+
+@override_settings(PASSWORD_HASHING_CONCURRENCY=1, **FAST_SCRYPT)
+class HashingSlotTests(TestCase):
+    def setUp(self):
+        hashers._slots = None
+        self.addCleanup(setattr, hashers, '_slots', None)
+
+    def test_busy_when_every_slot_is_taken(self):
+        with hashing_slot():
+            with self.assertRaises(HashingBusy):
+                with hashing_slot():
+                    pass
+        with hashing_slot():
+            pass
+
+    def test_login_fails_fast_with_503(self):
+        User.objects.create_user('busy', 'busy@example.com', 'pw-123456')
+        with hashing_slot():
+            response = APIClient().post(
+                reverse('login'), {'user_name': 'busy', 'password': 'pw-123456'}, format='json'
+            )
+        self.assertEqual(response.status_code, 503)
+
+
+@override_settings(PASSWORD_HASHING_CONCURRENCY=1, **FAST_SCRYPT)
+class VerifyPasswordTests(TestCase):
+    def setUp(self):
+        hashers._slots = None
+        self.addCleanup(setattr, hashers, '_slots', None)
+        self.user = User.objects.create_user('hashed', 'hashed@example.com', 'pw-123456')
+
+    def test_outdated_hash_is_upgraded_outside_the_slot(self):
+        self.user.password = make_password('pw-123456', hasher='pbkdf2_sha1')
+        self.user.save(update_fields=['password'])
+        saves = []
+        real_save = self.user.save
+
+        def save(**kwargs):
+            # The only slot must be free while the row is written.
+            free = hashers._get_slots().acquire(blocking=False)
+            if free:
+                hashers._get_slots().release()
+            saves.append(free)
+            real_save(**kwargs)
+
+        self.user.save = save
+        self.assertTrue(verify_password(self.user, 'pw-123456'))
+        self.assertEqual(saves, [True])
+        self.user.refresh_from_db()
+        self.assertEqual(identify_hasher(self.user.password).algorithm, 'scrypt')
+        self.assertTrue(verify_password(self.user, 'pw-123456'))
+
+    def test_current_hash_is_not_rewritten(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(verify_password(self.user, 'pw-123456'))
+
+    def test_wrong_password(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(verify_password(self.user, 'wrong'))
+
+
+class TunedHasherTests(TestCase):
+    @override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10)
+    def test_cost_comes_from_settings(self):
+        hasher = TunedScryptPasswordHasher()
+        encoded = hasher.encode('pw', hasher.salt())
+        self.assertEqual(hasher.decode(encoded)['work_factor'], 2 ** 10)
+        self.assertFalse(hasher.must_update(encoded))
+        with self.settings(PASSWORD_SCRYPT_WORK_FACTOR=2 ** 11):
+            self.assertTrue(hasher.must_update(encoded))
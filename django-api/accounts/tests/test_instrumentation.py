@@ -0,0 +1,102 @@
+import json
+from unittest import mock
+
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from accounts import instrumentation
+from accounts.instrumentation import Histogram, Registry, RequestMetricsMiddleware, fingerprint, metrics
+from accounts.models import User
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_in_lists_collapse(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'), fingerprint('SELECT 1 FROM t WHERE id IN (%s)')
+        )
+        self.assertNotEqual(fingerprint('SELECT 1 FROM t WHERE a = %s'), fingerprint('SELECT 1 FROM t WHERE b = %s'))
+
+
+class HistogramTests(SimpleTestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram('h', 'Help.', (1, 5), ('route',))
+        for value in (0.5, 1, 3, 9):
+            histogram.observe(('r',), value)
+        lines = histogram.render(7)
+        self.assertIn('h_bucket{route="r",pid="7",le="1"} 2', lines)
+        self.assertIn('h_bucket{route="r",pid="7",le="5"} 3', lines)
+        self.assertIn('h_bucket{route="r",pid="7",le="+Inf"} 4', lines)
+        self.assertIn('h_sum{route="r",pid="7"} 13.500000', lines)
+        self.assertIn('h_count{route="r",pid="7"} 4', lines)
+
+    def test_label_values_are_escaped(self):
+        histogram = Histogram('h', 'Help.', (1,), ('route',))
+        histogram.observe(('a"b',), 0)
+        self.assertIn('h_count{route="a\\"b",pid="1"} 1', histogram.render(1))
+
+
+@override_settings(REQUEST_METRICS_DUPLICATE_THRESHOLD=3, REQUEST_METRICS_SLOW_QUERIES=2)
+class MiddlewareTests(TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        patcher = mock.patch.object(instrumentation, 'registry', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_request(self, lookups):
+        def view(request):
+            for pk in range(lookups):
+                User.objects.filter(pk=pk).exists()
+            return HttpResponse('ok')
+
+        return RequestMetricsMiddleware(view)(RequestFactory().get('/x'))
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_gets_timing_and_a_log_line(self):
+        with self.assertLogs('accounts.requests', 'INFO') as logs:
+            response = self.run_request(4)
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="4 queries", cpu;dur=[\d.]+$')
+        [record] = logs.records
+        line = json.loads(record.getMessage())
+        self.assertEqual((line['route'], line['status'], line['queries']), ('unmatched', 200, 4))
+        self.assertEqual(len(line['slowest']), 2)
+        [duplicate] = line['duplicates']
+        self.assertEqual(duplicate['count'], 4)
+        self.assertEqual(self.registry.duplicates, {'unmatched': 1})
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_queries_below_the_threshold_are_not_duplicates(self):
+        with self.assertLogs('accounts.requests', 'INFO') as logs:
+            self.run_request(2)
+        self.assertEqual(json.loads(logs.records[0].getMessage())['duplicates'], [])
+        self.assertEqual(self.registry.duplicates, {})
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_is_only_timed(self):
+        with self.assertNoLogs('accounts.requests', 'INFO'):
+            response = self.run_request(1)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(list(self.registry.duration.series), [('unmatched', 'GET', '200')])
+        self.assertEqual(self.registry.queries.series, {})
+
+
+class MetricsViewTests(SimpleTestCase):
+    def get(self, **headers):
+        return metrics(RequestFactory().get('/metrics', **headers))
+
+    @override_settings(REQUEST_METRICS_TOKEN='secret', DEBUG=True)
+    def test_token_is_required_when_set(self):
+        with self.assertRaises(Http404):
+            self.get()
+        with self.assertRaises(Http404):
+            self.get(HTTP_AUTHORIZATION='Bearer wrong')
+        response = self.get(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE api_request_duration_seconds histogram', response.content)
+
+    @override_settings(REQUEST_METRICS_TOKEN='', DEBUG=False)
+    def test_hidden_without_a_token_outside_debug(self):
+        with self.assertRaises(Http404):
+            self.get()
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.get().status_code, 200)
@@ -0,0 +1,95 @@
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from accounts.load_data import Catalog, _copy_value, _CopyStream, plan_user
+from accounts.models import Course, Subject, User, UserCourse, UserProfile
+
+AS_OF = date(2026, 1, 1)
+
+
+def small_catalog():
+    subjects = [(1, 'A'), (2, 'B')]
+    courses = [(10, 1, 'A1', 4), (11, 1, 'A2', 4), (20, 2, 'B1', 3)]
+    return Catalog(subjects, courses)
+
+
+class PlanUserTests(SimpleTestCase):
+    def plan(self, index, seed=7):
+        return plan_user(seed, index, small_catalog(), AS_OF, 'load_', 20)
+
+    def snapshot(self, plan):
+        return {name: getattr(plan, name) for name in plan.__slots__}
+
+    def test_same_seed_and_index_give_the_same_user(self):
+        self.assertEqual(self.snapshot(self.plan(3)), self.snapshot(self.plan(3)))
+        self.assertNotEqual(self.plan(3).user_id, self.plan(3, seed=8).user_id)
+        self.assertNotEqual(self.snapshot(self.plan(3)), self.snapshot(self.plan(4)))
+
+    def test_plans_are_consistent(self):
+        catalog = small_catalog()
+        for index in range(200):
+            plan = self.plan(index)
+            done = {course_id for course_id, _, _ in plan.completions}
+            self.assertEqual(len(done), len(plan.completions))
+            for course_id, score, at in plan.completions:
+                self.assertLessEqual(score, catalog.by_id[course_id][3])
+                self.assertLessEqual(at.date(), AS_OF)
+            self.assertLessEqual(len(plan.logins), 20)
+            expected = [s for s, courses in catalog.subject_courses.items() if courses <= done]
+            self.assertEqual(sorted(plan.certificates), sorted(expected))
+
+
+class CopyStreamTests(SimpleTestCase):
+    def test_values_are_escaped_for_copy_text(self):
+        self.assertEqual(_copy_value(None), '\\N')
+        self.assertEqual((_copy_value(True), _copy_value(False)), ('t', 'f'))
+        self.assertEqual(_copy_value('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+        self.assertEqual(_copy_value({'k': 1}), '{"k": 1}')
+        self.assertEqual(_copy_value(datetime(2026, 1, 1, tzinfo=dt_timezone.utc)), '2026-01-01T00:00:00+00:00')
+
+    def test_small_reads_stream_every_row(self):
+        rows = [(i, f'row {i}') for i in range(50)]
+        stream = _CopyStream(iter(rows))
+        data = b''.join(iter(lambda: stream.read(7), b''))
+        self.assertEqual(data, ''.join(f'{i}\trow {i}\n' for i in range(50)).encode())
+        self.assertEqual(stream.count, 50)
+
+
+class GenerateLoadDataCommandTests(TestCase):
+    def run_command(self, *args):
+        out = StringIO()
+        call_command(
+            'generate_load_data', '--users', '5', '--subjects', '2', '--courses-per-subject', '2',
+            '--questions-per-course', '3', '--options-per-question', '2', '--max-activity', '5',
+            '--seed', '3', '--as-of', AS_OF.isoformat(), '--workers', '1', '--skip-ranks', *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def test_chunks_write_the_rows_their_plans_describe(self):
+        out = self.run_command('--chunk-size', '2')
+        self.assertIn('Users 4-4:', out)
+        self.assertEqual(User.objects.filter(user_name__startswith='load_').count(), 5)
+
+        # Rebuilt from the database, the catalogue reproduces every user's rows.
+        catalog = Catalog(
+            list(Subject.objects.order_by('SubjectID').values_list('SubjectID', 'SubjectName')),
+            [(c.CourseID, c.SubjectID_id, c.CourseTitle, 3) for c in Course.objects.order_by('CourseID')],
+        )
+        for index in range(5):
+            plan = plan_user(3, index, catalog, AS_OF, 'load_', 5)
+            self.assertEqual(
+                set(UserCourse.objects.filter(UserID_id=plan.user_id).values_list('CourseID_id', 'CourseScore')),
+                {(course_id, score) for course_id, score, _ in plan.completions},
+            )
+            self.assertEqual(
+                UserProfile.objects.get(user_id=plan.user_id).score, sum(score for _, score, _ in plan.completions)
+            )
+
+    def test_refuses_an_existing_prefix(self):
+        self.run_command()
+        with self.assertRaisesMessage(CommandError, 'Users named load_* already exist'):
+            self.run_command()
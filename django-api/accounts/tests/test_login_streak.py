@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserProfile
+from accounts.views.auth import LoginView
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, ACTIVITY_LOG_BUFFERED=False)
+class LoginStreakTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('streaker', 'streaker@example.com', 'pw-123456')
+        self.client = APIClient()
+
+    def set_profile(self, streak, last_login):
+        UserProfile.objects.filter(user=self.user).update(login_streak_days=streak, last_login_date=last_login)
+
+    def login(self):
+        response = self.client.post(reverse('login'), {'user_name': 'streaker', 'password': 'pw-123456'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['user']['profile']['login_streak_days']
+
+    def stored(self):
+        return UserProfile.objects.values_list('login_streak_days', 'last_login_date').get(user=self.user)
+
+    def test_first_login_starts_a_streak(self):
+        self.assertEqual(self.login(), 1)
+        self.assertEqual(self.stored(), (1, date.today()))
+
+    def test_login_the_next_day_extends_it(self):
+        self.set_profile(4, date.today() - timedelta(days=1))
+        self.assertEqual(self.login(), 5)
+        self.assertEqual(self.stored(), (5, date.today()))
+
+    def test_a_missed_day_resets_it(self):
+        self.set_profile(4, date.today() - timedelta(days=2))
+        self.assertEqual(self.login(), 1)
+
+    def test_second_login_of_the_day_writes_nothing(self):
+        self.set_profile(4, date.today())
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            LoginView().update_login_streak(user)
+        self.assertEqual(self.stored(), (4, date.today()))
+
+    def test_concurrent_logins_count_once(self):
+        self.set_profile(4, date.today() - timedelta(days=1))
+        first = User.objects.select_related('profile').get(pk=self.user.pk)
+        second = User.objects.select_related('profile').get(pk=self.user.pk)
+        LoginView().update_login_streak(first)
+        # ``second`` was loaded before the first login wrote; its UPDATE matches no row.
+        LoginView().update_login_streak(second)
+        self.assertEqual(self.stored(), (5, date.today()))
+
+    def test_wrong_password(self):
+        response = self.client.post(reverse('login'), {'user_name': 'streaker', 'password': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.stored(), (0, None))
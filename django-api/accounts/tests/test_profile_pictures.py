@@ -0,0 +1,250 @@
+import fcntl
+import hashlib
+import io
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.files.uploadhandler import SkipFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.blobstore import BlobStore
+from accounts.models import User, UserProfile
+from accounts.profile_pictures import (
+    MULTIPART_OVERHEAD,
+    ORIGINAL,
+    PictureTooLarge,
+    PictureUploadHandler,
+    UnsupportedPicture,
+    picture_store,
+    release_picture,
+    store_upload,
+)
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n\x00\x00\x00\r'
+
+
+def png_bytes(size=(8, 8)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def lock_is_held(store, digest):
+    with open(store.root / digest[:2] / '.lock', 'a') as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(fh, fcntl.LOCK_UN)
+        return False
+
+
+class BlobStoreTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.store = BlobStore(root)
+        self.digest = 'ab' + '0' * 62
+
+    def mode(self, suffix):
+        return stat.S_IMODE(self.store.path(self.digest, suffix).stat().st_mode)
+
+    def test_written_blobs_are_world_readable(self):
+        self.store.write(self.digest, '.a', [b'data'])
+        self.assertEqual(self.mode('.a'), 0o644)
+
+    def test_moved_files_are_world_readable(self):
+        fd, source = tempfile.mkstemp()
+        os.close(fd)
+        self.store.write_file(self.digest, '.b', source)
+        self.assertEqual(self.mode('.b'), 0o644)
+        self.assertFalse(os.path.exists(source))
+
+    def test_lock_excludes_other_holders(self):
+        acquired = threading.Event()
+
+        def take():
+            with self.store.lock(self.digest):
+                acquired.set()
+
+        with self.store.lock(self.digest):
+            thread = threading.Thread(target=take)
+            thread.start()
+            self.assertFalse(acquired.wait(0.2))
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+
+class FakeUpload:
+    content_type = 'image/png'
+
+    def __init__(self, path, data):
+        self.path = path
+        self.digest = hashlib.sha256(data).hexdigest()
+
+    def temporary_file_path(self):
+        return self.path
+
+
+class StoreAndReleaseTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(PROFILE_PIC_ROOT=root, PROFILE_PIC_WORKERS=0, PROFILE_PIC_THUMBNAIL_SIZES=[4])
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.store = picture_store()
+        self.profile = User.objects.create_user('pic', 'pic@example.com', 'pw-123456').profile
+
+    def upload(self):
+        data = png_bytes()
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        self.addCleanup(lambda: os.path.exists(path) and os.unlink(path))
+        return FakeUpload(path, data)
+
+    def test_profile_is_saved_while_the_digest_is_locked(self):
+        upload = self.upload()
+        held = []
+        real_save = self.profile.save
+
+        def save(**kwargs):
+            held.append(lock_is_held(self.store, upload.digest))
+            real_save(**kwargs)
+
+        self.profile.save = save
+        self.assertEqual(store_upload(upload, self.profile), upload.digest)
+        self.assertEqual(held, [True])
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).profile_pic_hash, upload.digest)
+        self.assertTrue(self.store.exists(upload.digest, ORIGINAL))
+
+    def test_release_deletes_under_the_lock_once_unreferenced(self):
+        upload = self.upload()
+        store_upload(upload, self.profile)
+        release_picture(upload.digest)
+        self.assertTrue(self.store.exists(upload.digest, ORIGINAL))
+
+        UserProfile.objects.filter(pk=self.profile.pk).update(profile_pic_hash=None)
+        held = []
+        real_delete = BlobStore.delete
+
+        def delete(store, *args):
+            held.append(lock_is_held(store, upload.digest))
+            real_delete(store, *args)
+
+        with mock.patch.object(BlobStore, 'delete', delete):
+            release_picture(upload.digest)
+        self.assertTrue(held)
+        self.assertTrue(all(held))
+        self.assertFalse(self.store.exists(upload.digest, ORIGINAL))
+
+    def test_upload_after_a_release_writes_the_files_again(self):
+        first = self.upload()
+        store_upload(first, self.profile)
+        UserProfile.objects.filter(pk=self.profile.pk).update(profile_pic_hash=None)
+        release_picture(first.digest)
+
+        second = self.upload()
+        store_upload(second, self.profile)
+        self.assertTrue(self.store.exists(second.digest, ORIGINAL))
+        self.assertTrue(self.store.exists(second.digest, '.4.jpg'))
+
+
+@override_settings(PROFILE_PIC_MAX_BYTES=1024)
+class PictureUploadHandlerTests(SimpleTestCase):
+    def handler(self, field_name='file'):
+        handler = PictureUploadHandler()
+        handler.new_file(field_name, 'me.png', 'image/png', None)
+        return handler
+
+    def test_rejects_oversized_request_before_reading(self):
+        handler = PictureUploadHandler()
+        with self.assertRaises(PictureTooLarge):
+            handler.handle_raw_input(None, {}, 1024 + MULTIPART_OVERHEAD + 1, b'boundary')
+        self.assertIsNone(handler.handle_raw_input(None, {}, 1024 + MULTIPART_OVERHEAD, b'boundary'))
+
+    def test_rejects_oversized_file_while_streaming(self):
+        handler = self.handler()
+        handler.receive_data_chunk(PNG_HEADER + b'\0' * 1000, 0)
+        with self.assertRaises(PictureTooLarge):
+            handler.receive_data_chunk(b'\0' * 100, 1012)
+        self.assertTrue(handler.picture.closed)
+
+    def test_accepts_file_at_the_limit(self):
+        handler = self.handler()
+        data = PNG_HEADER + b'\0' * (1024 - len(PNG_HEADER))
+        handler.receive_data_chunk(data, 0)
+        picture = handler.file_complete(len(data))
+        self.assertEqual((picture.size, picture.content_type), (1024, 'image/png'))
+        picture.close()
+
+    def test_rejects_non_images_from_the_first_bytes(self):
+        handler = self.handler()
+        with self.assertRaises(UnsupportedPicture):
+            handler.receive_data_chunk(b'<svg xmlns="http://www.w3.org/2000/svg">', 0)
+
+    def test_type_comes_from_content_not_the_client(self):
+        handler = PictureUploadHandler()
+        handler.new_file('file', 'me.png', 'image/png', None)
+        handler.receive_data_chunk(b'GIF89a' + b'\0' * 20, 0)
+        picture = handler.file_complete(26)
+        self.assertEqual(picture.content_type, 'image/gif')
+        picture.close()
+
+    def test_rejects_files_too_short_to_sniff(self):
+        handler = self.handler()
+        handler.receive_data_chunk(b'\x89PN', 0)
+        with self.assertRaises(UnsupportedPicture):
+            handler.file_complete(3)
+
+    def test_skips_other_fields(self):
+        with self.assertRaises(SkipFile):
+            self.handler(field_name='avatar')
+
+    def test_digest_is_the_sha256_of_the_body(self):
+        data = png_bytes()
+        handler = self.handler()
+        handler.receive_data_chunk(data[:20], 0)
+        handler.receive_data_chunk(data[20:], 20)
+        picture = handler.file_complete(len(data))
+        self.assertEqual(picture.digest, hashlib.sha256(data).hexdigest())
+        picture.close()
+
+
+class ProfilePictureUploadTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings = override_settings(PROFILE_PIC_ROOT=self.root, PROFILE_PIC_WORKERS=0, PROFILE_PIC_MAX_BYTES=4096)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('pic', 'pic@example.com', 'pw-123456'))
+        self.url = reverse('me_profile_pic')
+
+    def upload(self, data):
+        return self.client.put(self.url, {'file': io.BytesIO(data)}, format='multipart')
+
+    def test_upload_and_fetch(self):
+        data = png_bytes()
+        self.assertEqual(self.upload(data).status_code, 200)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), data)
+
+    def test_oversized_upload(self):
+        self.assertEqual(self.upload(PNG_HEADER + b'\0' * 5000).status_code, 413)
+
+    def test_non_image_upload(self):
+        self.assertEqual(self.upload(b'plain text, not an image').status_code, 415)
+
+    def test_undecodable_image(self):
+        self.assertEqual(self.upload(PNG_HEADER + b'garbage').status_code, 400)
@@ -0,0 +1,78 @@
+import json
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.catalog import bump_catalog_version, clear_local
+from accounts.models import Course, Option, Question, Subject, User
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'quiz'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class QuizTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        subject = Subject.objects.create(SubjectName='S', SubjectDescription='')
+        cls.course = Course.objects.create(SubjectID=subject, CourseTitle='A', CourseDescription='', CourseDifficulty=1)
+        cls.questions = [Question.objects.create(CourseID=cls.course, QuestionDescription=f'Q{i}') for i in range(2)]
+        cls.options = [
+            Option.objects.create(QuestionID=question, OptionText=f'{question.QuestionDescription}{j}', CorrectOption=j == 0)
+            for question in cls.questions
+            for j in range(2)
+        ]
+        cls.user = User.objects.create_user('quizzer', 'quizzer@example.com', 'pw-123456')
+
+    def setUp(self):
+        caches['default'].clear()
+        clear_local()
+        self.addCleanup(clear_local)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('course_quiz', args=[self.course.pk])
+
+    def test_quiz_lists_questions_without_answers(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        quiz = json.loads(response.content)
+        self.assertEqual(quiz['course_id'], self.course.pk)
+        self.assertEqual([q['QuestionID'] for q in quiz['questions']], [q.pk for q in self.questions])
+        self.assertEqual(quiz['questions'][0]['options'], [
+            {'OptionID': self.options[0].pk, 'OptionText': 'Q00'},
+            {'OptionID': self.options[1].pk, 'OptionText': 'Q01'},
+        ])
+        self.assertNotIn(b'CorrectOption', response.content)
+
+    def test_cached_quiz_needs_no_queries(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_option_edit_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.options[0].OptionText = 'edited'
+        self.options[0].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'edited', response.content)
+
+    def test_catalog_bump_drops_cached_quizzes(self):
+        self.client.get(self.url)
+        # A write that sent no signals, followed by the bump seed_db does.
+        Option.objects.filter(pk=self.options[0].pk).update(OptionText='bulk')
+        bump_catalog_version()
+        self.assertIn(b'bulk', self.client.get(self.url).content)
+
+    def test_missing_course(self):
+        self.assertEqual(self.client.get(reverse('course_quiz', args=[987654])).status_code, 404)
@@ -0,0 +1,38 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import User, UserProfile
+
+
+class RecalculateRanksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, score in [('a', 30), ('b', 20), ('c', 20), ('d', 10)]:
+            user = User.objects.create_user(name, f'{name}@example.com', 'pw-123456')
+            UserProfile.objects.filter(user=user).update(score=score)
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('recalculate_ranks', *args, stdout=out)
+        return out.getvalue()
+
+    def ranks(self):
+        return dict(UserProfile.objects.values_list('user__user_name', 'rank'))
+
+    def test_tie_modes(self):
+        self.run_command('--tie-mode', 'ordinal')
+        self.assertEqual(self.ranks(), {'a': 1, 'b': 2, 'c': 3, 'd': 4})
+        self.run_command('--tie-mode', 'dense')
+        self.assertEqual(self.ranks(), {'a': 1, 'b': 2, 'c': 2, 'd': 3})
+        self.run_command('--tie-mode', 'competition')
+        self.assertEqual(self.ranks(), {'a': 1, 'b': 2, 'c': 2, 'd': 4})
+
+    def test_only_moved_ranks_are_written(self):
+        self.assertIn('Updated rank for 4 user(s).', self.run_command('--batch-size', '1'))
+        self.assertIn('Updated rank for 0 user(s).', self.run_command())
+
+        UserProfile.objects.filter(user__user_name='d').update(score=25)
+        self.assertIn('Updated rank for 3 user(s).', self.run_command())
+        self.assertEqual(self.ranks(), {'a': 1, 'd': 2, 'b': 3, 'c': 4})
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.db.models.query import QuerySet
+from django.test import TestCase
+
+from accounts.models import Course, Subject, User, UserCourse
+from accounts.scoring import COMPLETED, drifted_profiles, record_course_score
+
+
+class RecordCourseScoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        subject = Subject.objects.create(SubjectName='S', SubjectDescription='')
+        cls.course = Course.objects.create(SubjectID=subject, CourseTitle='A', CourseDescription='', CourseDifficulty=1)
+        cls.other = Course.objects.create(SubjectID=subject, CourseTitle='B', CourseDescription='', CourseDifficulty=1)
+
+    def setUp(self):
+        self.user = User.objects.create_user('scorer', 'scorer@example.com', 'pw-123456')
+
+    def score(self):
+        self.user.profile.refresh_from_db()
+        return self.user.profile.score
+
+    def test_first_attempt_adds_its_score(self):
+        user_course, improved = record_course_score(self.user, self.course.pk, 7)
+        self.assertFalse(improved)
+        self.assertEqual((user_course.CourseScore, user_course.CourseFlag), (7, COMPLETED))
+        self.assertEqual(self.score(), 7)
+
+    def test_better_attempt_adds_the_difference(self):
+        record_course_score(self.user, self.course.pk, 4)
+        _, improved = record_course_score(self.user, self.course.pk, 9)
+        self.assertTrue(improved)
+        self.assertEqual(self.score(), 9)
+
+    def test_worse_attempt_changes_nothing(self):
+        record_course_score(self.user, self.course.pk, 9)
+        user_course, improved = record_course_score(self.user, self.course.pk, 3)
+        self.assertFalse(improved)
+        self.assertEqual(user_course.CourseScore, 9)
+        self.assertEqual(self.score(), 9)
+
+    def test_scores_of_courses_add_up(self):
+        record_course_score(self.user, self.course.pk, 5)
+        record_course_score(self.user, self.other.pk, 6)
+        self.assertEqual(self.score(), 11)
+        self.assertFalse(drifted_profiles().filter(user=self.user).exists())
+
+    def test_completing_an_unfinished_course_counts_its_best_score(self):
+        # An unfinished row contributes nothing to the total until it is completed.
+        UserCourse.objects.create(UserID=self.user, CourseID=self.course, CourseScore=8, CourseFlag='in_progress')
+        user_course, _ = record_course_score(self.user, self.course.pk, 5)
+        self.assertEqual((user_course.CourseScore, user_course.CourseFlag), (8, COMPLETED))
+        self.assertEqual(self.score(), 8)
+
+    def test_one_row_per_user_and_course(self):
+        record_course_score(self.user, self.course.pk, 5)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserCourse.objects.create(UserID=self.user, CourseID=self.course, CourseScore=1, CourseFlag=COMPLETED)
+
+    def test_losing_a_first_submission_race_counts_as_a_second_attempt(self):
+        record_course_score(self.user, self.course.pk, 4)
+        real_get = QuerySet.get
+        calls = []
+
+        def stale_get(queryset, *args, **kwargs):
+            # The first lookup runs before the concurrent insert is visible.
+            if not calls:
+                calls.append(queryset.model)
+                raise queryset.model.DoesNotExist
+            return real_get(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'get', stale_get):
+            user_course, improved = record_course_score(self.user, self.course.pk, 6)
+
+        self.assertEqual(calls, [UserCourse])
+        self.assertTrue(improved)
+        self.assertEqual(UserCourse.objects.filter(UserID=self.user).count(), 1)
+        self.assertEqual(self.score(), 6)
@@ -0,0 +1,126 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from accounts import seeding
+from accounts.models import Subject
+
+DUMP = '''--
+-- PostgreSQL database dump
+--
+
+SET statement_timeout = 0;
+SELECT pg_catalog.set_config('search_path', '', false);
+
+CREATE TABLE public.subject (
+    id integer NOT NULL,
+    name text
+);
+
+CREATE TABLE public.course (
+    id integer NOT NULL,
+    subject_id integer
+);
+
+COPY public.subject (id, name) FROM stdin;
+1\tGit
+2\tDocker; containers
+\\.
+
+COPY public.course (id, subject_id) FROM stdin;
+10\t1
+\\.
+
+SELECT pg_catalog.setval('public.subject_id_seq', 2, true);
+
+ALTER TABLE ONLY public.subject
+    ADD CONSTRAINT subject_pkey PRIMARY KEY (id);
+
+CREATE INDEX course_subject_idx ON public.course USING btree (subject_id);
+
+ALTER TABLE ONLY public.course
+    ADD CONSTRAINT course_subject_fk FOREIGN KEY (subject_id) REFERENCES public.subject(id);
+'''
+
+
+class PlanSqlFileTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = Path(directory) / 'db_seed.sql'
+        self.path.write_text(DUMP)
+        self.plan = seeding.plan_sql_file(self.path)
+
+    def read_block(self, block, size):
+        with open(self.path, 'rb') as fh:
+            source = seeding._CopySource(fh, block.start, block.end)
+            return b''.join(iter(lambda: source.read(size), b''))
+
+    def test_sorts_statements_into_phases(self):
+        self.assertEqual(len(self.plan.session), 2)
+        self.assertEqual([s.split('(')[0].strip() for s in self.plan.pre_data],
+                         ['CREATE TABLE public.subject', 'CREATE TABLE public.course'])
+        self.assertEqual(sorted(self.plan.post_data), ['', 'public.course', 'public.subject'])
+        self.assertIn('setval', self.plan.post_data[''][0])
+        self.assertEqual(len(self.plan.foreign_keys), 1)
+        self.assertIn('course_subject_fk', self.plan.foreign_keys[0])
+
+    def test_copy_blocks_are_byte_ranges_of_their_rows(self):
+        subject, course = self.plan.copies
+        self.assertEqual((subject.table, course.table), ('public.subject', 'public.course'))
+        self.assertTrue(subject.sql.startswith('COPY public.subject (id, name) FROM stdin'))
+        self.assertEqual(self.read_block(subject, 5), b'1\tGit\n2\tDocker; containers\n')
+        self.assertEqual(self.read_block(course, 1024), b'10\t1\n')
+
+
+class IncompleteMarkerTests(TestCase):
+    def test_marker_round_trip(self):
+        self.assertFalse(seeding.is_incomplete())
+        with connection.cursor() as cursor:
+            seeding.mark_incomplete(cursor)
+            seeding.mark_incomplete(cursor)
+        self.assertTrue(seeding.is_incomplete())
+        seeding.mark_complete()
+        self.assertFalse(seeding.is_incomplete())
+
+
+class SeedDbCommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.sql_dir = Path(directory)
+        (self.sql_dir / 'seed.sql').write_text(DUMP)
+
+    def run_command(self, *args):
+        out = StringIO()
+        with mock.patch('accounts.management.commands.seed_db.load') as load:
+            call_command('seed_db', '--sql-dir', str(self.sql_dir), *args, stdout=out)
+        return load, out.getvalue()
+
+    def test_loads_an_empty_database_and_clears_the_marker(self):
+        load, out = self.run_command('--jobs', '2')
+        (path, plan), kwargs = load.call_args
+        self.assertEqual((path.name, len(plan.copies), kwargs['jobs']), ('seed.sql', 2, 2))
+        self.assertIn('seed.sql: 2 schema statement(s), 2 COPY block(s), 4 index/constraint statement(s)', out)
+        self.assertFalse(seeding.is_incomplete())
+
+    def test_skips_a_seeded_database(self):
+        Subject.objects.create(SubjectName='Git', SubjectDescription='')
+        load, out = self.run_command()
+        load.assert_not_called()
+        self.assertIn('Seed data appears to exist; skipping', out)
+
+    def test_reseeds_after_an_interrupted_load(self):
+        Subject.objects.create(SubjectName='Git', SubjectDescription='')
+        with connection.cursor() as cursor:
+            seeding.mark_incomplete(cursor)
+        load, out = self.run_command()
+        load.assert_called_once()
+        self.assertIn('A previous seed did not finish; seeding again.', out)
+        self.assertFalse(seeding.is_incomplete())
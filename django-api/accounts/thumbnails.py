@@ -0,0 +1,48 @@
+"""
+Picture decoding and thumbnail rendering.
+
+This module imports nothing from Django: ``profile_pictures`` runs
+``render_thumbnails`` in a pool of spawned worker processes, so the memory a
+large photo takes to decode is spent, and handed back to the OS when the
+worker is recycled, outside the web worker.
+"""
+
+import io
+
+from PIL import Image, ImageOps
+
+
+def render_thumbnail(image, size):
+    """Return ``(suffix, bytes)`` for ``image`` scaled to fit ``size`` x ``size``."""
+    thumb = ImageOps.exif_transpose(image)
+    thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    if thumb.mode in ('RGBA', 'LA') or (thumb.mode == 'P' and 'transparency' in thumb.info):
+        thumb.save(out, format='PNG', optimize=True)
+        ext = '.png'
+    else:
+        thumb.convert('RGB').save(out, format='JPEG', quality=85, optimize=True, progressive=True)
+        ext = '.jpg'
+    return f'.{size}{ext}', out.getvalue()
+
+
+def render_thumbnails(path, sizes, max_pixels):
+    """
+    Decode the image at ``path`` and return ``[(suffix, bytes), ...]`` for ``sizes``.
+
+    Raises ``ValueError`` if the file cannot be decoded or has more than
+    ``max_pixels`` pixels; the header is checked before any pixel data is read.
+    """
+    try:
+        with Image.open(path) as image:
+            if image.width * image.height > max_pixels:
+                raise ValueError(f'{image.width}x{image.height} exceeds the {max_pixels} pixel limit')
+            if sizes:
+                # JPEGs decode directly at a reduced scale (down to 1/8) when
+                # only thumbnails are needed, which is most of the memory saved.
+                largest = max(sizes)
+                image.draft('RGB', (largest, largest))
+            image.load()
+            return [render_thumbnail(image, size) for size in sizes]
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ValueError(str(exc)) from exc
@@ -7,14 +7,20 @@ from accounts.views import (
     set_bookmarked_subject,
     remove_bookmarked_subject,
     me_profile_pic,
+    profile_picture,
     me_change_password,
     achievements,
+    activity_list,
+    daily_active_users,
+    course_submissions,
     check_availability,
     getCourseListBySubjectID,
     getCourseByCourseID,
+    getCourseContentByCourseID,
     list_subjects,
     getQuestionListByCourseID,
     getQuestionByQuestionID,
+    getQuizByCourseID,
     verifyAnsByOptionID,
     submitCourseAnswers,
     markCourseCompletedByCourseID,
@@ -41,13 +47,19 @@ urlpatterns = [
     path('me/bookmarked-subject/', set_bookmarked_subject, name='set_bookmarked_subject'),
     path('me/bookmarked-subject/<int:subject_id>/', remove_bookmarked_subject, name='remove_bookmarked_subject'),
     path('me/profile-pic/', me_profile_pic, name='me_profile_pic'),
+    path('profile-pics/<str:digest>/', profile_picture, name='profile_picture'),
     path('achievements/', achievements, name='achievements'),
+    path('me/activity/', activity_list, name='activity_list'),
+    path('analytics/daily-active-users/', daily_active_users, name='analytics_daily_active_users'),
+    path('analytics/course-submissions/', course_submissions, name='analytics_course_submissions'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('subjects/', list_subjects, name='subjects_list'),
     path('courses/subject/<int:subject_id>/', getCourseListBySubjectID, name='courses_by_subject'),
     path('courses/<int:course_id>/', getCourseByCourseID, name='course_detail'),
+    path('courses/<int:course_id>/content/', getCourseContentByCourseID, name='course_content'),
     path('questions/course/<int:course_id>/', getQuestionListByCourseID, name='questions_by_course'),
     path('questions/<int:question_id>/', getQuestionByQuestionID, name='question_detail'),
+    path('courses/<int:course_id>/quiz/', getQuizByCourseID, name='course_quiz'),
     path('options/<int:option_id>/verify/', verifyAnsByOptionID, name='verify_option'),
     path('courses/<int:course_id>/submit/', submitCourseAnswers, name='submit_course_answers'),
     path('courses/<int:course_id>/complete/', markCourseCompletedByCourseID, name='complete_course'),
@@ -1,13 +1,16 @@
-from .profile import me, me_profile_pic, me_change_password
+from .profile import me, me_profile_pic, profile_picture, me_change_password
 from .ranking import rank
 from .bookmarks import set_bookmarked_subject, remove_bookmarked_subject
 from .achievements import achievements
+from .activity import activity_list, daily_active_users, course_submissions
 from .courses import (
     list_subjects,
     getCourseListBySubjectID,
     getCourseByCourseID,
+    getCourseContentByCourseID,
     getQuestionListByCourseID,
     getQuestionByQuestionID,
+    getQuizByCourseID,
     verifyAnsByOptionID,
     submitCourseAnswers,
     markCourseCompletedByCourseID,
@@ -28,16 +31,22 @@ from .cert import certificate_status, certificate_download
 __all__ = [
     "me",
     "me_profile_pic",
+    "profile_picture",
     "me_change_password",
     "rank",
     "set_bookmarked_subject",
     "remove_bookmarked_subject",
     "achievements",
+    "activity_list",
+    "daily_active_users",
+    "course_submissions",
     "list_subjects",
     "getCourseListBySubjectID",
     "getCourseByCourseID",
+    "getCourseContentByCourseID",
     "getQuestionListByCourseID",
     "getQuestionByQuestionID",
+    "getQuizByCourseID",
     "verifyAnsByOptionID",
     "submitCourseAnswers",
     "markCourseCompletedByCourseID",
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.analytics import InvalidCursor, activity_feed
+from accounts.models import CourseSubmissionRollup, DailyActivityRollup
+from accounts.serializers import UserActivitySerializer
+
+FEED_DEFAULT_LIMIT = 50
+FEED_MAX_LIMIT = 200
+ANALYTICS_DEFAULT_DAYS = 30
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def activity_list(request):
+    """
+    Page through the caller's activity, newest first.
+
+    Query params: ``limit`` (default 50, max 200), ``cursor`` (the
+    ``next_cursor`` of the previous page) and ``type`` (comma-separated
+    activity types).
+    """
+    try:
+        limit = int(request.query_params.get('limit', FEED_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, FEED_MAX_LIMIT))
+
+    types = [t for t in request.query_params.get('type', '').split(',') if t]
+    try:
+        rows, next_cursor = activity_feed(request.user, request.query_params.get('cursor'), limit, types)
+    except InvalidCursor:
+        return Response({'detail': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'results': UserActivitySerializer(rows, many=True).data, 'next_cursor': next_cursor})
+
+
+def _date_range(request):
+    """``(start, end)`` from the ``from``/``to`` query params; defaults to the last 30 days."""
+    end = request.query_params.get('to')
+    start = request.query_params.get('from')
+    try:
+        end = parse_date(end) if end else timezone.localdate()
+        start = parse_date(start) if start else None
+    except ValueError:
+        end = None
+    if end is None or (request.query_params.get('from') and start is None):
+        raise ValueError('from/to must be dates (YYYY-MM-DD).')
+    if start is None:
+        start = end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+    return start, end
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def daily_active_users(request):
+    """Daily activity totals from the rollup table (refresh with ``refresh_activity_rollups``)."""
+    try:
+        start, end = _date_range(request)
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = (
+        DailyActivityRollup.objects.filter(day__gte=start, day__lte=end)
+        .order_by('day')
+        .values('day', 'active_users', 'logins', 'registrations', 'submissions')
+    )
+    return Response({'from': start, 'to': end, 'days': list(rows)})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def course_submissions(request):
+    """Submissions per course and day from the rollup table; ``course_id`` narrows to one course."""
+    try:
+        start, end = _date_range(request)
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = CourseSubmissionRollup.objects.filter(day__gte=start, day__lte=end)
+    course_id = request.query_params.get('course_id')
+    if course_id is not None:
+        try:
+            rows = rows.filter(course_id=int(course_id))
+        except (TypeError, ValueError):
+            return Response({'detail': 'course_id must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = rows.order_by('day', 'course_id').values('day', 'course_id', 'submissions', 'users')
+    return Response({'from': start, 'to': end, 'rows': list(rows)})
@@ -2,15 +2,20 @@ import secrets
 from datetime import date, timedelta
 
 from django.conf import settings
+from django.contrib.auth.hashers import make_password
 from email.utils import formataddr, parseaddr
 from django.core.mail import BadHeaderError, send_mail
+from django.db.models import Case, F, Q, Value, When
 from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from accounts.models import PasswordResetToken, User, UserActivity
+from accounts.events import login_recorded
+from accounts.hashers import hashing_slot, verify_password
+from accounts.activity import log_activity
+from accounts.models import PasswordResetToken, User, UserProfile
 from accounts.serializers import UserSerializer
 
 
@@ -28,8 +33,11 @@ class RegisterView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        UserActivity.objects.create(user=user, activity_type='REGISTRATION')
+        # Only the hash runs inside the slot; the inserts do not hold it.
+        with hashing_slot():
+            password_hash = make_password(serializer.validated_data['password'])
+        user = serializer.save(password_hash=password_hash)
+        log_activity(user, 'REGISTRATION')
         refresh = RefreshToken.for_user(user)
         return Response(
             {
@@ -48,10 +56,12 @@ class LoginView(generics.GenericAPIView):
         user_name = request.data.get('user_name')
         password = request.data.get('password')
         try:
-            user = User.objects.get(user_name=user_name)
-            if user.check_password(password):
+            # One query for everything the response needs.
+            user = User.objects.select_related('profile__bookmarked_subject').get(user_name=user_name)
+            if verify_password(user, password):
                 self.update_login_streak(user)
-                UserActivity.objects.create(user=user, activity_type='LOGIN')
+                login_recorded.send(sender=User, user_id=user.pk)
+                log_activity(user, 'LOGIN')
                 refresh = RefreshToken.for_user(user)
                 return Response(
                     {
@@ -66,19 +76,26 @@ class LoginView(generics.GenericAPIView):
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
     def update_login_streak(self, user):
+        """
+        Advance the streak with a single conditional UPDATE.
+
+        Only the first login of the day writes anything, and concurrent logins
+        of the same user cannot double-count because the row no longer matches
+        ``last_login_date < today`` once one of them has updated it. The loaded
+        profile is updated in memory to match.
+        """
         profile = user.profile
         today = date.today()
-        if profile.last_login_date:
-            if profile.last_login_date == today:
-                pass
-            elif profile.last_login_date == today - timedelta(days=1):
-                profile.login_streak_days += 1
-            else:
-                profile.login_streak_days = 1
-        else:
-            profile.login_streak_days = 1
+        if profile.last_login_date == today:
+            return
+
+        yesterday = today - timedelta(days=1)
+        UserProfile.objects.filter(Q(last_login_date__lt=today) | Q(last_login_date__isnull=True), pk=profile.pk).update(
+            login_streak_days=Case(When(last_login_date=yesterday, then=F('login_streak_days') + 1), default=Value(1)),
+            last_login_date=today,
+        )
+        profile.login_streak_days = profile.login_streak_days + 1 if profile.last_login_date == yesterday else 1
         profile.last_login_date = today
-        profile.save()
 
 
 @api_view(['GET'])
@@ -187,11 +204,12 @@ def reset_password_confirm(request):
     if len(new_password) < 8:
         return Response({'detail': 'Password must be at least 8 characters long.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    user.set_password(new_password)
+    with hashing_slot():
+        user.set_password(new_password)
     user.save()
     token_obj.used = True
     token_obj.save(update_fields=['used'])
 
-    UserActivity.objects.create(user=user, activity_type='LOGIN', details='Password reset (mock)')
+    log_activity(user, 'PASSWORD_RESET')
 
     return Response({'detail': 'Password has been reset successfully.'}, status=status.HTTP_200_OK)
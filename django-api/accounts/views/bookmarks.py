@@ -5,7 +5,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.models import Subject, SubjectBookmark, UserActivity
+from accounts.activity import log_activity
+from accounts.models import Subject, SubjectBookmark
 
 
 @api_view(['POST'])
@@ -41,11 +42,7 @@ def set_bookmarked_subject(request):
         )
         SubjectBookmark.objects.filter(user=request.user).exclude(id__in=list(keep_ids)).delete()
 
-    UserActivity.objects.create(
-        user=request.user,
-        activity_type='SCORE_UPDATE',
-        details=f"Bookmarked subject set: {subject_id_int}",
-    )
+    log_activity(request.user, 'BOOKMARK', {'subject_id': subject_id_int})
 
     return Response(
         {
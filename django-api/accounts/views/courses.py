@@ -1,49 +1,87 @@
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.models import Course, Subject, Question, Option, UserCourse, UserActivity
+from accounts.models import Course, Subject, Question, UserCourse
 from accounts.serializers import (
-    CourseSerializer,
+    CourseSummarySerializer,
     SubjectSerializer,
-    QuestionSerializer,
     QuestionDetailSerializer,
 )
+from accounts.activity import log_activity
+from accounts.answer_keys import find_option, get_answer_key
+from accounts.catalog import catalog_response
+from accounts.course_content import content_response, materialize
+from accounts.events import course_completed
+from accounts.grading import GradingError, grade_submission
+from accounts.http_cache import json_response
+from accounts.quiz import get_quiz
+from accounts.scoring import record_course_score
 
 
 @api_view(['GET'])
+@authentication_classes([])
 def list_subjects(request):
-    subjects = Subject.objects.all()
-    serializer = SubjectSerializer(subjects, many=True)
-    return Response(serializer.data)
+    def render():
+        return SubjectSerializer(Subject.objects.all(), many=True).data
+
+    return catalog_response(request, 'subjects', render)
 
 
 @api_view(['GET'])
+@authentication_classes([])
 def getCourseListBySubjectID(request, subject_id):
-    courses = Course.objects.filter(SubjectID_id=subject_id).only('CourseID', 'CourseTitle')
-    serializer = CourseSerializer(courses, many=True)
-    data = [{'CourseID': item['CourseID'], 'CourseTitle': item['CourseTitle']} for item in serializer.data]
-    return Response(data)
+    def render():
+        courses = Course.objects.filter(SubjectID_id=subject_id).values_list('CourseID', 'CourseTitle')
+        return [{'CourseID': course_id, 'CourseTitle': title} for course_id, title in courses]
+
+    return catalog_response(request, f'subject:{subject_id}:courses', render)
 
 
 @api_view(['GET'])
+@authentication_classes([])
 def getCourseByCourseID(request, course_id):
-    try:
-        course = Course.objects.get(pk=course_id)
-    except Course.DoesNotExist:
+    def render():
+        course = Course.objects.summaries().filter(pk=course_id).first()
+        if course is None:
+            return None
+        data = CourseSummarySerializer(course).data
+        data['content_url'] = reverse('course_content', args=[course_id])
+        data['content_size'] = course.ContentSize
+        return data
+
+    response = catalog_response(request, f'course:{course_id}', render)
+    if response is None:
         return Response({'detail': 'Course not found.'}, status=status.HTTP_404_NOT_FOUND)
-    serializer = CourseSerializer(course)
-    return Response(serializer.data)
+    return response
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def getCourseContentByCourseID(request, course_id):
+    section = request.query_params.get('section')
+    if section is not None:
+        try:
+            section = int(section)
+        except (TypeError, ValueError):
+            return Response({'detail': 'section must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    digest = materialize(course_id)
+    if digest is None:
+        return Response({'detail': 'Course not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    response = content_response(request, digest, section=section)
+    if response is None:
+        return Response({'detail': 'Section not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return response
 
 
 @api_view(['GET'])
 def getQuestionListByCourseID(request, course_id):
-    questions = Question.objects.filter(CourseID_id=course_id).only('QuestionID')
-    serializer = QuestionSerializer(questions, many=True)
-    data = [item['QuestionID'] for item in serializer.data]
-    return Response(data)
+    return Response(list(Question.objects.filter(CourseID_id=course_id).values_list('QuestionID', flat=True)))
 
 
 @api_view(['GET'])
@@ -56,151 +94,69 @@ def getQuestionByQuestionID(request, question_id):
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+def getQuizByCourseID(request, course_id):
+    quiz = get_quiz(course_id)
+    if quiz is None:
+        return Response({'detail': 'Course not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    body, etag = quiz
+    return json_response(request, body, etag)
+
+
 @api_view(['GET'])
 def verifyAnsByOptionID(request, option_id):
-    try:
-        option = Option.objects.get(pk=option_id)
-    except Option.DoesNotExist:
+    option = find_option(option_id)
+    if option is None:
         return Response({'detail': 'Option not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-    return Response({'correct': bool(option.CorrectOption)})
+    _, correct = option
+    return Response({'correct': correct})
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def submitCourseAnswers(request, course_id):
-    try:
-        course = Course.objects.get(pk=course_id)
-    except Course.DoesNotExist:
+    answer_key = get_answer_key(course_id)
+    if answer_key is None:
         return Response({'detail': 'Course not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-    answers = request.data.get('answers')
-    if not isinstance(answers, list):
-        return Response({'detail': 'answers must be a list.'}, status=status.HTTP_400_BAD_REQUEST)
-
-    course_questions = list(Question.objects.filter(CourseID_id=course_id).only('QuestionID'))
-    course_question_ids = {q.QuestionID for q in course_questions}
-
-    if not course_question_ids:
-        return Response({'detail': 'Course has no questions.'}, status=status.HTTP_400_BAD_REQUEST)
-
-    normalized_answers = {}
-    invalid_items = []
-
-    for idx, item in enumerate(answers):
-        if not isinstance(item, dict):
-            invalid_items.append({'index': idx, 'detail': 'Each answer must be an object.'})
-            continue
-
-        question_id = item.get('question_id')
-        option_id = item.get('option_id')
-
-        try:
-            question_id_int = int(question_id)
-            option_id_int = int(option_id)
-        except (TypeError, ValueError):
-            invalid_items.append({'index': idx, 'detail': 'question_id and option_id must be integers.'})
-            continue
-
-        normalized_answers[question_id_int] = option_id_int
-
-    if invalid_items:
-        return Response({'detail': 'Invalid answers payload.', 'errors': invalid_items}, status=status.HTTP_400_BAD_REQUEST)
-
-    submitted_question_ids = set(normalized_answers.keys())
-    extra_question_ids = sorted(list(submitted_question_ids - course_question_ids))
-    if extra_question_ids:
-        return Response(
-            {'detail': 'Some submitted questions are not part of this course.', 'extra_question_ids': extra_question_ids},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    missing_question_ids = sorted(list(course_question_ids - submitted_question_ids))
-    if missing_question_ids:
-        return Response(
-            {'detail': 'You must answer all questions before submitting.', 'missing_question_ids': missing_question_ids},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    correct_count = 0
-    per_question = []
-
-    for question_id in sorted(course_question_ids):
-        option_id = normalized_answers[question_id]
+    try:
+        result = grade_submission(answer_key, request.data.get('answers'))
+    except GradingError as exc:
+        return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            option = Option.objects.get(pk=option_id)
-        except Option.DoesNotExist:
-            return Response(
-                {'detail': 'Option not found.', 'question_id': question_id, 'option_id': option_id},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if option.QuestionID_id != question_id:
-            return Response(
-                {
-                    'detail': 'Option does not belong to the submitted question.',
-                    'question_id': question_id,
-                    'option_id': option_id,
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        is_correct = bool(option.CorrectOption)
-        if is_correct:
-            correct_count += 1
-
-        per_question.append({'question_id': question_id, 'option_id': option_id, 'correct': is_correct})
-
-    total_questions = len(course_question_ids)
+    correct_count = result['correct']
+    per_question = result['per_question']
+    total_questions = result['total']
     new_score_int = int(correct_count)
 
     user = request.user
 
     try:
         profile = user.profile
-        profile.bookmarked_subject = course.SubjectID
+        profile.bookmarked_subject_id = answer_key.subject_id
         profile.bookmarked_subject_updated_at = timezone.now()
         profile.save(update_fields=['bookmarked_subject', 'bookmarked_subject_updated_at'])
     except Exception:
         pass
 
-    user_course, created = UserCourse.objects.get_or_create(
-        CourseID=course,
-        UserID=user,
-        defaults={
-            'CourseScore': str(new_score_int),
-            'CourseFlag': 'completed',
-        },
-    )
-
-    improved = False
-    if not created:
-        try:
-            existing_score_int = int(user_course.CourseScore)
-        except (TypeError, ValueError):
-            existing_score_int = 0
-
-        if new_score_int > existing_score_int:
-            user_course.CourseScore = str(new_score_int)
-            improved = True
-
-        user_course.CourseFlag = 'completed'
-        user_course.save()
+    user_course, improved = record_course_score(user, course_id, new_score_int)
+    course_completed.send(sender=UserCourse, user_id=user.pk, course_id=course_id)
 
-    UserActivity.objects.create(
-        user=user,
-        activity_type='SCORE_UPDATE',
-        details=f"Course {course_id} submitted: {correct_count}/{total_questions} (improved={improved})",
+    log_activity(
+        user,
+        'COURSE_SUBMISSION',
+        {'course_id': course_id, 'correct': correct_count, 'total': total_questions, 'improved': improved},
     )
 
     return Response(
         {
-            'course_id': course.CourseID,
+            'course_id': answer_key.course_id,
             'total': total_questions,
             'correct': correct_count,
             'score': new_score_int,
-            'best_score': int(user_course.CourseScore),
+            'best_score': user_course.CourseScore,
             'improved': improved,
             'completed': True,
             'per_question': per_question,
@@ -236,26 +192,8 @@ def markCourseCompletedByCourseID(request, course_id):
     except Exception:
         pass
 
-    user_course, created = UserCourse.objects.get_or_create(
-        CourseID=course,
-        UserID=user,
-        defaults={
-            'CourseScore': str(new_score_int),
-            'CourseFlag': 'completed',
-        },
-    )
-
-    if not created:
-        try:
-            existing_score_int = int(user_course.CourseScore)
-        except (TypeError, ValueError):
-            existing_score_int = 0
-
-        if new_score_int > existing_score_int:
-            user_course.CourseScore = str(new_score_int)
-
-        user_course.CourseFlag = 'completed'
-        user_course.save()
+    user_course, _ = record_course_score(user, course.CourseID, new_score_int)
+    course_completed.send(sender=UserCourse, user_id=user.pk, course_id=course.CourseID)
 
     return Response(
         {
@@ -278,14 +216,6 @@ def getCompletedCourse(request):
 @permission_classes([IsAuthenticated])
 def getCompletedCourseScores(request):
     user = request.user
-    completed = UserCourse.objects.filter(UserID=user, CourseFlag='completed').only('CourseID_id', 'CourseScore')
-
-    data = []
-    for item in completed:
-        try:
-            score_int = int(item.CourseScore)
-        except (TypeError, ValueError):
-            score_int = 0
-        data.append({'CourseID': item.CourseID_id, 'CourseScore': score_int})
-
+    completed = UserCourse.objects.filter(UserID=user, CourseFlag='completed').values_list('CourseID_id', 'CourseScore')
+    data = [{'CourseID': course_id, 'CourseScore': score} for course_id, score in completed]
     return Response(data)
@@ -1,13 +1,27 @@
-from django.http import HttpResponse
+import re
+
+from django.contrib.auth.hashers import check_password
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, parser_classes
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.models import SubjectBookmark, UserCourse
+from accounts.hashers import hashing_slot
+from accounts.models import SubjectBookmark, UserCourse, UserProfile
+from accounts.profile_pictures import (
+    InvalidPicture,
+    PictureUploadHandler,
+    picture_response,
+    picture_url,
+    release_picture,
+    store_upload,
+    thumbnail_sizes,
+)
 from accounts.serializers import UserSerializer
 
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -40,51 +54,64 @@ def me(request):
         if len(recent_bookmarked_subjects) >= 5:
             break
 
-    completed = UserCourse.objects.filter(UserID=user, CourseFlag="completed").only("CourseID_id", "CourseScore")
-
-    total_score = 0
-    completed_course_scores = []
-    for item in completed:
-        try:
-            score_int = int(item.CourseScore)
-        except (TypeError, ValueError):
-            score_int = 0
-        total_score += score_int
-        completed_course_scores.append({"CourseID": item.CourseID_id, "CourseScore": score_int})
+    completed = UserCourse.objects.filter(UserID=user, CourseFlag="completed").values_list("CourseID_id", "CourseScore")
+    completed_course_scores = [{"CourseID": course_id, "CourseScore": score} for course_id, score in completed]
 
     data = serializer.data
-    try:
-        if data.get("profile") is not None:
-            data["profile"]["profile_pic_url"] = request.build_absolute_uri("profile-pic/")
-    except Exception:
-        pass
-    data["total_score"] = total_score
+    profile = data.get("profile")
+    if profile is not None:
+        digest = user.profile.profile_pic_hash
+        if digest:
+            profile["profile_pic_url"] = picture_url(request, digest)
+            profile["profile_pic_thumbnails"] = {str(size): picture_url(request, digest, size) for size in thumbnail_sizes()}
+        else:
+            profile["profile_pic_url"] = None
+            profile["profile_pic_thumbnails"] = {}
+    data["total_score"] = data["profile"]["score"] if data.get("profile") is not None else 0
     data["completed_course_scores"] = completed_course_scores
     data["recent_bookmarked_subjects"] = recent_bookmarked_subjects
     return Response(data)
 
 
+def _requested_size(request):
+    """The ``?size=`` thumbnail requested, None for the original, or False if it is not a configured size."""
+    raw = request.query_params.get("size")
+    if raw is None:
+        return None
+    try:
+        size = int(raw)
+    except ValueError:
+        return False
+    return size if size in thumbnail_sizes() else False
+
+
 @api_view(["GET", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser])
 def me_profile_pic(request):
     profile = request.user.profile
+    old_digest = profile.profile_pic_hash
 
     if request.method == "GET":
-        if not profile.profile_pic:
+        size = _requested_size(request)
+        if size is False:
+            return Response({"detail": "Unsupported thumbnail size."}, status=status.HTTP_400_BAD_REQUEST)
+        response = None
+        if old_digest:
+            response = picture_response(request, old_digest, profile.profile_pic_mime, size, cache_control="private, no-cache")
+        if response is None:
             return Response({"detail": "No profile picture."}, status=status.HTTP_404_NOT_FOUND)
-
-        content_type = profile.profile_pic_mime or "application/octet-stream"
-        response = HttpResponse(bytes(profile.profile_pic), content_type=content_type)
-        response["Cache-Control"] = "no-store"
         return response
 
     if request.method == "DELETE":
-        profile.profile_pic = None
+        profile.profile_pic_hash = None
         profile.profile_pic_mime = None
-        profile.save(update_fields=["profile_pic", "profile_pic_mime"])
+        profile.save(update_fields=["profile_pic_hash", "profile_pic_mime"])
+        release_picture(old_digest)
         return Response({"detail": "Profile picture removed."})
 
+    # Must be set before the body is parsed; see PictureUploadHandler.
+    request.upload_handlers = [PictureUploadHandler(request)]
     upload = request.FILES.get("file")
     if not upload:
         return Response(
@@ -92,10 +119,38 @@ def me_profile_pic(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    profile.profile_pic = upload.read()
-    profile.profile_pic_mime = upload.content_type
-    profile.save(update_fields=["profile_pic", "profile_pic_mime"])
-    return Response({"detail": "Profile picture updated.", "profile_pic_mime": profile.profile_pic_mime})
+    try:
+        store_upload(upload, profile)
+    except InvalidPicture:
+        return Response({"detail": "The uploaded file is not a supported image."}, status=status.HTTP_400_BAD_REQUEST)
+    finally:
+        upload.close()
+    if old_digest != profile.profile_pic_hash:
+        release_picture(old_digest)
+    return Response(
+        {
+            "detail": "Profile picture updated.",
+            "profile_pic_mime": profile.profile_pic_mime,
+            "profile_pic_url": picture_url(request, profile.profile_pic_hash),
+        }
+    )
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([])
+def profile_picture(request, digest):
+    """Public, immutable URL of a stored picture; ``?size=`` selects a thumbnail."""
+    size = _requested_size(request)
+    response = None
+    if DIGEST_RE.match(digest) and size is not False:
+        # Only pictures some profile still uses are served.
+        row = UserProfile.objects.filter(profile_pic_hash=digest).values_list("profile_pic_mime").first()
+        if row is not None:
+            response = picture_response(request, digest, row[0], size)
+    if response is None:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    return response
 
 
 @api_view(["POST"])
@@ -117,12 +172,13 @@ def me_change_password(request):
         )
 
     user = request.user
-    if not user.check_password(current_password):
-        return Response(
-            {"detail": "Current password is incorrect."},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    user.set_password(new_password)
+    with hashing_slot():
+        # The function form never re-hashes and saves; the password is replaced below anyway.
+        if not check_password(current_password, user.password):
+            return Response(
+                {"detail": "Current password is incorrect."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        user.set_password(new_password)
     user.save(update_fields=["password"])
     return Response({"detail": "Password updated successfully."}, status=status.HTTP_200_OK)
@@ -2,7 +2,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.models import User
+from accounts.leaderboard import position_of, serialize_entry, top_entries
+from accounts.models import UserProfile
 
 
 @api_view(['GET'])
@@ -18,41 +19,27 @@ def rank(request):
 
     user = request.user
 
-    ordered_users = list(
-        User.objects.select_related('profile')
-        .order_by('-profile__score', 'profile__rank', 'user_name')
-    )
-
-    def serialize_user(u, position):
-        profile = getattr(u, 'profile', None)
-        return {
-            'user_name': u.user_name,
-            'rank': getattr(profile, 'rank', None) if profile is not None else None,
-            'score': getattr(profile, 'score', 0) if profile is not None else 0,
-            'position': position,
-        }
-
-    top_users = ordered_users[:10]
-    data = [serialize_user(u, idx + 1) for idx, u in enumerate(top_users)]
-
-    for entry in data:
-        if entry['user_name'] == user.user_name:
+    top_profiles = top_entries(10)
+    data = [serialize_entry(p, idx + 1) for idx, p in enumerate(top_profiles)]
+
+    for profile in top_profiles:
+        if profile.user_id == user.pk:
             return Response(data)
 
-    # Caller not in top 10; append their row if they exist in the table.
     try:
-        caller_index = next(idx for idx, u in enumerate(ordered_users) if u.pk == user.pk)
-        caller_serialized = serialize_user(ordered_users[caller_index], caller_index + 1)
-        data.append(caller_serialized)
-    except StopIteration:
+        profile = user.profile
+    except UserProfile.DoesNotExist:
         # User might not have a profile row; fall back to zero score at end.
         data.append(
             {
                 'user_name': user.user_name,
-                'rank': getattr(getattr(user, 'profile', None), 'rank', None),
-                'score': getattr(getattr(user, 'profile', None), 'score', 0),
+                'rank': None,
+                'score': 0,
                 'position': None,
             }
         )
+        return Response(data)
 
+    # Caller not in top 10; append their row with a COUNT-based position.
+    data.append(serialize_entry(profile, position_of(profile)))
     return Response(data)
@@ -11,9 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,7 +29,7 @@ SECRET_KEY = config('DJANGO_SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DJANGO_DEBUG', default=False, cast=bool)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = config('DJANGO_ALLOWED_HOSTS', default='', cast=Csv())
 
 
 # Application definition
@@ -63,6 +64,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'accounts.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -123,6 +125,29 @@ DATABASES = {
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Password hashing (see accounts/hashers.py): scrypt | argon2 (needs argon2-cffi) | pbkdf2
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='scrypt')
+_PASSWORD_HASHERS = {
+    'scrypt': 'accounts.hashers.TunedScryptPasswordHasher',
+    'argon2': 'accounts.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'accounts.hashers.TunedPBKDF2PasswordHasher',
+}
+if PASSWORD_HASHER not in _PASSWORD_HASHERS:
+    raise ImproperlyConfigured(f"PASSWORD_HASHER must be one of {', '.join(_PASSWORD_HASHERS)}")
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 15, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=1, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=19456, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=1, cast=int)
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=0, cast=int)
+# Per process: with N worker processes set it to about cores / N (gunicorn.conf.py does this itself).
+PASSWORD_HASHING_CONCURRENCY = config('PASSWORD_HASHING_CONCURRENCY', default=os.cpu_count() or 2, cast=int)
+PASSWORD_HASHING_TIMEOUT = config('PASSWORD_HASHING_TIMEOUT', default=2.0, cast=float)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -171,3 +196,87 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER or 'no-reply@example.com')
 RESET_PASSWORD_FRONTEND_URL = config('RESET_PASSWORD_FRONTEND_URL', default='http://localhost:3000/reset-password')
+
+# Shared cache. Every worker process must see the same entries (catalog
+# version, rendered quizzes), so the default is a table in the main database
+# (created by migration 0030). Catalog and quiz hits are served from a
+# per-process layer in front of it (CATALOG_LOCAL_TTL below), so they reach
+# the table only on a local miss; point CACHE_BACKEND/CACHE_LOCATION at Redis
+# (django.core.cache.backends.redis.RedisCache, redis://...) to take the
+# remaining cache reads off PostgreSQL.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='django_cache'),
+    },
+}
+
+# Grading answer-key cache (see accounts/answer_keys.py)
+ANSWER_KEY_CACHE_SIZE = config('ANSWER_KEY_CACHE_SIZE', default=256, cast=int)
+ANSWER_KEY_CACHE_TTL = config('ANSWER_KEY_CACHE_TTL', default=300, cast=int)
+ANSWER_KEY_CACHE_ALIAS = config('ANSWER_KEY_CACHE_ALIAS', default='') or None
+
+# Rendered whole-course quiz payloads (see accounts/quiz.py)
+QUIZ_CACHE_ALIAS = config('QUIZ_CACHE_ALIAS', default='default')
+QUIZ_CACHE_TIMEOUT = config('QUIZ_CACHE_TIMEOUT', default=300, cast=int)
+
+# Catalog (subjects/courses) response cache (see accounts/catalog.py)
+CATALOG_CACHE_ALIAS = config('CATALOG_CACHE_ALIAS', default='default')
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=3600, cast=int)
+CATALOG_CACHE_CONTROL = config('CATALOG_CACHE_CONTROL', default='public, max-age=60')
+# Seconds a worker serves catalog/quiz entries (and the catalog version) from
+# memory before checking the shared cache again; 0 disables the local layer.
+CATALOG_LOCAL_TTL = config('CATALOG_LOCAL_TTL', default=5, cast=float)
+CATALOG_LOCAL_SIZE = config('CATALOG_LOCAL_SIZE', default=512, cast=int)
+
+# Achievement progress updates (see accounts/events.py): thread | outbox | sync
+ACHIEVEMENT_EVENTS_BACKEND = config('ACHIEVEMENT_EVENTS_BACKEND', default='thread')
+ACHIEVEMENT_EVENTS_WORKERS = config('ACHIEVEMENT_EVENTS_WORKERS', default=1, cast=int)
+ACHIEVEMENT_EVENTS_BATCH_SIZE = config('ACHIEVEMENT_EVENTS_BATCH_SIZE', default=200, cast=int)
+ACHIEVEMENT_EVENTS_MAX_WAIT = config('ACHIEVEMENT_EVENTS_MAX_WAIT', default=0.5, cast=float)
+# Seconds a worker keeps its compiled achievement rule index (see accounts/achievement_engine.py)
+ACHIEVEMENT_RULES_TTL = config('ACHIEVEMENT_RULES_TTL', default=300, cast=int)
+
+# Buffered activity log and monthly partition archives (see accounts/activity.py)
+ACTIVITY_LOG_BUFFERED = config('ACTIVITY_LOG_BUFFERED', default=True, cast=bool)
+ACTIVITY_LOG_BATCH_SIZE = config('ACTIVITY_LOG_BATCH_SIZE', default=200, cast=int)
+ACTIVITY_LOG_FLUSH_INTERVAL = config('ACTIVITY_LOG_FLUSH_INTERVAL', default=2.0, cast=float)
+ACTIVITY_ARCHIVE_DIR = config('ACTIVITY_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'var', 'activity_archive'))
+
+# Pre-compressed course content files (see accounts/course_content.py)
+COURSE_CONTENT_ROOT = config('COURSE_CONTENT_ROOT', default=os.path.join(BASE_DIR, 'var', 'course_content'))
+COURSE_CONTENT_SECTION_BYTES = config('COURSE_CONTENT_SECTION_BYTES', default=16 * 1024, cast=int)
+
+# Profile pictures and thumbnails (see accounts/profile_pictures.py)
+PROFILE_PIC_ROOT = config('PROFILE_PIC_ROOT', default=os.path.join(BASE_DIR, 'var', 'profile_pics'))
+PROFILE_PIC_THUMBNAIL_SIZES = config('PROFILE_PIC_THUMBNAIL_SIZES', default='64,256', cast=Csv(int))
+PROFILE_PIC_ACCEL_PREFIX = config('PROFILE_PIC_ACCEL_PREFIX', default='')
+PROFILE_PIC_MAX_BYTES = config('PROFILE_PIC_MAX_BYTES', default=5 * 1024 * 1024, cast=int)
+PROFILE_PIC_MAX_PIXELS = config('PROFILE_PIC_MAX_PIXELS', default=40_000_000, cast=int)
+PROFILE_PIC_WORKERS = config('PROFILE_PIC_WORKERS', default=2, cast=int)
+PROFILE_PIC_WORKER_MAX_TASKS = config('PROFILE_PIC_WORKER_MAX_TASKS', default=50, cast=int)
+
+# Request timing and SQL instrumentation (see accounts/instrumentation.py)
+REQUEST_METRICS_SAMPLE_RATE = config('REQUEST_METRICS_SAMPLE_RATE', default=0.05, cast=float)
+REQUEST_METRICS_SLOW_QUERIES = config('REQUEST_METRICS_SLOW_QUERIES', default=3, cast=int)
+REQUEST_METRICS_DUPLICATE_THRESHOLD = config('REQUEST_METRICS_DUPLICATE_THRESHOLD', default=3, cast=int)
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=True, cast=bool)
+REQUEST_METRICS_TOKEN = config('REQUEST_METRICS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'requests': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'accounts.requests': {
+            'handlers': ['requests'],
+            'level': config('REQUEST_METRICS_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
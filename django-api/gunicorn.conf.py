@@ -0,0 +1,84 @@
+"""
+Gunicorn configuration for serving ``backend_project.wsgi`` in production.
+
+    gunicorn -c gunicorn.conf.py
+
+``GUNICORN_PRESET`` picks workers and threads per worker from the CPU cores
+available to the container:
+
+* ``balanced`` (default): cores + 1 workers with 4 threads each;
+* ``io``: one worker per core with 8 threads, for traffic that mostly waits
+  on the database;
+* ``cpu``: 2 * cores + 1 single-threaded workers, for traffic dominated by
+  password hashing and other Python work that holds the GIL;
+* ``small``: 2 workers with 2 threads, for a laptop or a shared host.
+
+``GUNICORN_WORKERS`` and ``GUNICORN_THREADS`` override the preset.
+
+The application is imported once in the master (``GUNICORN_PRELOAD``)
+before workers are forked. Workers share its memory copy-on-write and start
+quickly. Nothing opens a database connection at import time, and the
+background threads (activity log, achievement events) and the picture
+decoding pool start lazily in each worker. A worker is replaced after
+``GUNICORN_MAX_REQUESTS`` requests, with jitter so that workers do not all
+restart together. This bounds memory growth.
+
+``kill -HUP <master>`` replaces workers gracefully: in-flight requests get
+``GUNICORN_GRACEFUL_TIMEOUT`` seconds. New configuration is picked up, but
+preloaded code is not. To deploy new code, either restart the container or
+send ``USR2`` and then ``QUIT`` to the old master. ``GUNICORN_RELOAD=True``
+restarts workers when a source file changes, for development; it turns
+preloading off.
+"""
+
+import os
+
+# ``config`` would clash with Gunicorn's own setting of that name.
+from decouple import config as env
+
+PRESETS = {
+    'balanced': lambda cores: (cores + 1, 4),
+    'io': lambda cores: (cores, 8),
+    'cpu': lambda cores: (2 * cores + 1, 1),
+    'small': lambda cores: (2, 2),
+}
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+preset = env('GUNICORN_PRESET', default='balanced')
+if preset not in PRESETS:
+    raise RuntimeError(f"GUNICORN_PRESET must be one of {', '.join(PRESETS)}")
+cores = available_cores()
+preset_workers, preset_threads = PRESETS[preset](cores)
+
+wsgi_app = 'backend_project.wsgi:application'
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = env('GUNICORN_WORKERS', default=preset_workers, cast=int)
+threads = env('GUNICORN_THREADS', default=preset_threads, cast=int)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+reload = env('GUNICORN_RELOAD', default=False, cast=bool)
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool) and not reload
+max_requests = env('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', default=100, cast=int)
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Worker heartbeats go to tmpfs, not the container's overlay filesystem.
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+accesslog = '-'
+errorlog = '-'
+forwarded_allow_ips = env('GUNICORN_FORWARDED_ALLOW_IPS', default='127.0.0.1')
+
+# These settings are per process and default to sizes meant for one process
+# per host. Split the host between the workers unless they are set explicitly.
+for name, value in (('PASSWORD_HASHING_CONCURRENCY', max(1, cores // workers)), ('PROFILE_PIC_WORKERS', 1)):
+    if env(name, default='') == '':
+        os.environ[name] = str(value)